@@ -0,0 +1,69 @@
+"""
+Per-tick cost of hero energy sharing versus hero count.
+
+Run from the project root:
+    python -m benchmarks.bench_energy_sharing
+"""
+from __future__ import annotations
+
+import time
+
+from controller.config import Scenario
+from controller.engine import SimulationEngine
+from model.hero import ReedRichards, SueStorm, JohnnyStorm, BenGrimm
+
+HERO_CLASSES = [ReedRichards, SueStorm, JohnnyStorm, BenGrimm]
+# Heroes start at full energy; walking and repairing spread it out. Crowded rosters
+# finish the mission sooner, which only stops the warm-up early.
+WARMUP_STEPS = 30
+
+
+def pairwise_share_energy(engine: SimulationEngine) -> None:
+    """The previous all-pairs implementation, kept here as the comparison baseline."""
+    width = engine.mars.get_width()
+    height = engine.mars.get_height()
+    for a in engine.heroes:
+        for b in engine.heroes:
+            if a is b:
+                continue
+            dx = abs(a.get_location().get_x() - b.get_location().get_x())
+            dy = abs(a.get_location().get_y() - b.get_location().get_y())
+            dx = min(dx, width - dx)
+            dy = min(dy, height - dy)
+            if dx + dy == 1 and a.energy - b.energy >= 20 and a.energy > 20 and b.energy < b.max_energy:
+                give = min(10, a.energy - b.energy)
+                a.energy -= give
+                b.energy = min(b.max_energy, b.energy + give)
+
+
+def build(count: int) -> SimulationEngine:
+    """A default world with a roster of ``count`` heroes, stepped until their energies differ."""
+    roster = tuple(HERO_CLASSES[i % len(HERO_CLASSES)] for i in range(count))
+    engine = SimulationEngine(seed=0, scenario=Scenario(heroes=roster))
+    engine.run_steps(WARMUP_STEPS)
+    return engine
+
+
+def time_per_tick(fn, engine: SimulationEngine, repeats: int) -> float:
+    energies = [h.energy for h in engine.heroes]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(engine)
+    elapsed = time.perf_counter() - start
+    for hero, energy in zip(engine.heroes, energies):
+        hero.energy = energy
+    return elapsed / repeats
+
+
+def main() -> None:
+    print(f"{'heroes':>7} {'neighbour (us)':>15} {'pairwise (us)':>14} {'speed-up':>9}")
+    for count in (4, 16, 64, 128, 256, 384):
+        engine = build(count)
+        repeats = max(5, 20000 // (count * count) + 5)
+        neighbour = time_per_tick(SimulationEngine._share_energy, engine, repeats)
+        pairwise = time_per_tick(pairwise_share_energy, engine, repeats)
+        print(f"{count:>7} {neighbour * 1e6:>15.1f} {pairwise * 1e6:>14.1f} {pairwise / neighbour:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Cost of forking a running simulation versus world size: SimulationEngine.fork against
+copy.deepcopy of the engine.
+
+"fork" is the fork alone; "fork+moves" also moves every hero of the fork one cell, a small
+divergence that copies the rows it writes. A step itself is left out, as its routing cost
+grows with the world whether or not it runs in a fork. Deep copies are only timed up to
+DEEPCOPY_MAX_SIZE, above which a single one takes seconds.
+
+Run from the project root:
+    python -m benchmarks.bench_fork
+"""
+from __future__ import annotations
+
+import copy
+import time
+
+from controller.config import Scenario
+from controller.engine import SimulationEngine
+
+SIZES = (20, 64, 200, 500, 1000)
+DEEPCOPY_MAX_SIZE = 200
+WARMUP_STEPS = 30
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def fork_and_move(engine: SimulationEngine) -> None:
+    fork = engine.fork()
+    mars = fork.mars
+    for hero in fork.heroes:
+        location = hero.get_location()
+        for target in mars.get_free_adjacent_locations(location)[:1]:
+            mars.set_agent(None, location)
+            mars.set_agent(hero, target)
+            hero.set_location(target)
+
+
+def main() -> None:
+    print(f"{'size':>5} {'fork (us)':>10} {'fork+moves (us)':>16} {'deepcopy (us)':>14}")
+    for size in SIZES:
+        engine = SimulationEngine(seed=size, scenario=Scenario(width=size, height=size, surfer_spawn_step=5))
+        engine.run_steps(WARMUP_STEPS)
+        fork = best_of(engine.fork, 200)
+        fork_moves = best_of(lambda: fork_and_move(engine), 200)
+        deep = f"{best_of(lambda: copy.deepcopy(engine), 3) * 1e6:>14.0f}" if size <= DEEPCOPY_MAX_SIZE else f"{'-':>14}"
+        print(f"{size:>5} {fork * 1e6:>10.1f} {fork_moves * 1e6:>16.1f} {deep}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Memory per hero and time per tick: Hero objects versus the struct-of-arrays HeroPopulation.
+
+"state" counts only what stores the heroes themselves (objects and their __dict__, or
+handles and the population arrays); "engine" is everything an engine allocates per hero,
+including the grid registry entries both modes share. Tick time is dominated by routing,
+which both modes share too.
+
+Run from the project root:
+    python -m benchmarks.bench_hero_population
+"""
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+
+from controller.config import Scenario
+from controller.engine import SimulationEngine
+from model.hero import ReedRichards, SueStorm, JohnnyStorm, BenGrimm
+
+HERO_CLASSES = (ReedRichards, SueStorm, JohnnyStorm, BenGrimm)
+WORLD = 200
+TICKS = 10
+
+
+def scenario(count: int, storage: str) -> Scenario:
+    roster = tuple(HERO_CLASSES[i % len(HERO_CLASSES)] for i in range(count))
+    return Scenario(width=WORLD, height=WORLD, bridge_count=200, surfer_spawn_step=5,
+                    galactus_spawn_step=10_000, heroes=roster, hero_storage=storage)
+
+
+def engine_bytes(count: int, storage: str) -> int:
+    """Bytes still allocated after building an engine, including its grid and bridges."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    engine = SimulationEngine(seed=0, scenario=scenario(count, storage))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del engine
+    return after - before
+
+
+def bytes_per_hero(count: int, storage: str) -> float:
+    # The difference against a small roster cancels out the grid, bridges and flyweights.
+    return (engine_bytes(count, storage) - engine_bytes(4, storage)) / (count - 4)
+
+
+def state_bytes_per_hero(count: int, storage: str) -> float:
+    engine = SimulationEngine(seed=0, scenario=scenario(count, storage))
+    population = engine.hero_population
+    if population is None:
+        total = sum(sys.getsizeof(hero) + sys.getsizeof(hero.__dict__) for hero in engine.heroes)
+    else:
+        total = sum(sys.getsizeof(handle) for handle in population.handles)
+        total += sum(sys.getsizeof(buffer) for buffer in (population.xs, population.ys,
+                                                           population.energy, population.roles,
+                                                           population.recharging))
+    return total / count
+
+
+def time_per_tick(count: int, storage: str) -> float:
+    engine = SimulationEngine(seed=0, scenario=scenario(count, storage))
+    start = time.perf_counter()
+    ticks = engine.run_steps(TICKS)
+    return (time.perf_counter() - start) / max(1, ticks)
+
+
+def main() -> None:
+    print(f"{'heroes':>7} {'state B/hero':>22} {'engine B/hero':>22} {'ms/tick':>22}")
+    print(f"{'':>7} {'objects':>11}{'arrays':>11} {'objects':>11}{'arrays':>11} {'objects':>11}{'arrays':>11}")
+    for count in (100, 1000, 5000):
+        row = []
+        for measure in (state_bytes_per_hero, bytes_per_hero):
+            row.extend(f"{measure(count, storage):>11.0f}" for storage in ("objects", "arrays"))
+        row.extend(f"{time_per_tick(count, storage) * 1e3:>11.1f}" for storage in ("objects", "arrays"))
+        print(f"{count:>7} " + "".join(row[:2]) + " " + "".join(row[2:4]) + " " + "".join(row[4:]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Benchmark suite for the model and view hot paths, with stored baselines.
+
+Every case builds its world from a fixed seed, so each round repeats exactly the same
+work; the reported time is the best round, per operation. Times are also expressed
+relative to a fixed pure-Python calibration loop measured in the same run, and it is
+those relative costs that are compared with the baseline, so a baseline recorded on one
+machine still means something on another.
+
+Run from the project root:
+    python -m benchmarks.suite                       # compare with benchmarks/baseline.json
+    python -m benchmarks.suite --save                # record a new baseline
+    python -m benchmarks.suite --filter tick --threshold 15
+
+The exit status is 1 if any case got more than ``--threshold`` percent slower.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from controller.config import Scenario
+from controller.engine import DEFAULT_HEROES, SimulationEngine
+from model.hero import ReedRichards
+from model.location import Location
+from model.silver_surfer import SilverSurfer
+from view.headless_canvas import HeadlessCanvas
+from view.renderer import WorldRenderer
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 25.0
+
+# (world size, incomplete bridges, share of cells holding an agent)
+PATH_WORLDS = ((20, 7, 0.05), (64, 30, 0.05), (64, 30, 0.20), (200, 100, 0.05))
+# (world size, incomplete bridges, share of cells holding a rock); agents as above at 5%
+ROCK_WORLDS = ((64, 30, 0.30), (200, 100, 0.30))
+BRIDGE_WORLDS = ((20, 7), (64, 60), (200, 400))
+TICK_WORLDS = ((20, 7, 4), (64, 30, 80), (128, 60, 160))
+RENDER_WORLDS = (20, 64, 128)
+# Fork cost should not grow with the world; sizes far apart show it.
+FORK_WORLDS = (20, 200, 500)
+
+
+class Case(NamedTuple):
+    """
+    One benchmark: ``setup`` builds fresh state and returns the timed callable.
+
+    Attributes:
+        name (str): Unique name that encodes the parameters, e.g. ``tick/64/b30/h80``.
+        setup (Callable): Returns a callable that performs ``ops`` operations.
+        ops (int): Operations per timed call, to report a per-operation cost.
+    """
+
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    ops: int
+
+
+def populated_engine(size: int, bridges: int, density: float, seed: int, rocks: float = 0.0) -> SimulationEngine:
+    """An engine whose grid also holds idle heroes on random cells, up to ``density``."""
+    engine = SimulationEngine(seed=seed, scenario=Scenario(width=size, height=size, bridge_count=bridges,
+                                                           rock_probability=rocks))
+    mars = engine.mars
+    rng = random.Random(seed)
+    free = [(x, y) for y in range(size) for x in range(size) if mars.is_free_at(x, y)]
+    wanted = max(0, int(size * size * density) - len(engine.heroes))
+    for x, y in rng.sample(free, min(wanted, len(free))):
+        location = mars.location(x, y)
+        mars.set_agent(ReedRichards(location), location)
+    return engine
+
+
+def free_cells(engine: SimulationEngine, count: int, seed: int) -> List[Location]:
+    """``count`` distinct empty cells, drawn with a fixed seed."""
+    mars = engine.mars
+    size = mars.get_width() * mars.get_height()
+    rng = random.Random(seed)
+    cells: Dict[int, Location] = {}
+    while len(cells) < count:
+        cell = rng.randrange(size)
+        x, y = cell % mars.get_width(), cell // mars.get_width()
+        if cell not in cells and mars.is_free_at(x, y):
+            cells[cell] = mars.location(x, y)
+    return list(cells.values())
+
+
+def occupied_cells(engine: SimulationEngine, count: int) -> List[Location]:
+    """The first ``count`` occupied cells in row order."""
+    mars = engine.mars
+    cells = []
+    for y in range(mars.get_height()):
+        for x in range(mars.get_width()):
+            if mars.get_agent_at(x, y) is not None:
+                cells.append(mars.location(x, y))
+                if len(cells) == count:
+                    return cells
+    return cells
+
+
+def path_case(kind: str, size: int, bridges: int, density: float, pairs: int = 20,
+              rocks: float = 0.0) -> Case:
+    def setup() -> Callable[[], object]:
+        engine = populated_engine(size, bridges, density, seed=size, rocks=rocks)
+        mars = engine.mars
+        ends = free_cells(engine, pairs * 2, seed=size + 1)
+        mover = (ReedRichards if kind == "hero" else SilverSurfer)(ends[0])
+        bfs_path = mover.bfs_path
+
+        def run() -> None:
+            for i in range(0, len(ends), 2):
+                bfs_path(ends[i], ends[i + 1], mars)
+        return run
+    name = f"{kind}_bfs_path/{size}/d{int(density * 100)}"
+    if rocks:
+        name += f"/r{int(rocks * 100)}"
+    return Case(name, setup, pairs)
+
+
+def bridge_case(size: int, bridges: int, queries: int = 200) -> Case:
+    def setup() -> Callable[[], object]:
+        engine = populated_engine(size, bridges, 0.0, seed=size)
+        mars = engine.mars
+        heroes = [ReedRichards(location) for location in free_cells(engine, queries, seed=size + 2)]
+
+        def run() -> None:
+            for hero in heroes:
+                hero.find_nearest_bridge(mars)
+        return run
+    return Case(f"find_nearest_bridge/{size}/b{bridges}", setup, queries)
+
+
+def free_adjacent_case(size: int, density: float, queries: int = 2000) -> Case:
+    def setup() -> Callable[[], object]:
+        engine = populated_engine(size, 0, density, seed=size)
+        mars = engine.mars
+        rng = random.Random(size)
+        cells = [mars.location(rng.randrange(size), rng.randrange(size)) for _ in range(queries)]
+        get_free_adjacent_locations = mars.get_free_adjacent_locations
+
+        def run() -> None:
+            for cell in cells:
+                get_free_adjacent_locations(cell)
+        return run
+    return Case(f"free_adjacent/{size}/d{int(density * 100)}", setup, queries)
+
+
+def tick_case(size: int, bridges: int, heroes: int, ticks: int = 20) -> Case:
+    roster = tuple(DEFAULT_HEROES[i % len(DEFAULT_HEROES)] for i in range(heroes))
+    scenario = Scenario(width=size, height=size, bridge_count=bridges, surfer_spawn_step=0,
+                        galactus_spawn_step=ticks // 2, heroes=roster)
+
+    def setup() -> Callable[[], object]:
+        engine = SimulationEngine(seed=size, scenario=scenario)
+        return lambda: engine.run_steps(ticks)
+    return Case(f"tick/{size}/b{bridges}/h{heroes}", setup, ticks)
+
+
+def render_case(size: int, incremental: bool, frames: int = 10) -> Case:
+    def setup() -> Callable[[], object]:
+        engine = populated_engine(size, size // 2, 0.05, seed=size)
+        mars = engine.mars
+        renderer = WorldRenderer(HeadlessCanvas(), mars, {})
+        renderer.render()
+        if not incremental:
+            def run() -> None:
+                for _ in range(frames):
+                    renderer.invalidate()
+                    renderer.render()
+            return run
+
+        # Each frame moves a tenth of the agents between two fixed cells, as a busy tick would.
+        movers = [mars.get_agent(cell) for cell in occupied_cells(engine, size * size // 200 + 1)]
+        targets = free_cells(engine, len(movers), seed=size + 3)
+        homes = [mover.get_location() for mover in movers]
+
+        def run() -> None:
+            for frame in range(frames):
+                for mover, home, target in zip(movers, homes, targets):
+                    src, dst = (home, target) if frame % 2 == 0 else (target, home)
+                    mars.set_agent(None, src)
+                    mars.set_agent(mover, dst)
+                    mover.set_location(dst)
+                renderer.render()
+        return run
+    return Case(f"render_{'incremental' if incremental else 'full'}/{size}", setup, frames)
+
+
+def fork_case(size: int, forks: int = 50) -> Case:
+    scenario = Scenario(width=size, height=size, surfer_spawn_step=5)
+
+    def setup() -> Callable[[], object]:
+        engine = SimulationEngine(seed=size, scenario=scenario)
+        engine.run_steps(30)
+
+        # Each fork then moves every hero one cell, a small divergence.
+        def run() -> None:
+            for _ in range(forks):
+                fork = engine.fork()
+                mars = fork.mars
+                for hero in fork.heroes:
+                    location = hero.get_location()
+                    for target in mars.get_free_adjacent_locations(location)[:1]:
+                        mars.set_agent(None, location)
+                        mars.set_agent(hero, target)
+                        hero.set_location(target)
+        return run
+    return Case(f"fork/{size}", setup, forks)
+
+
+def cases() -> Iterator[Case]:
+    for size, bridges, density in PATH_WORLDS:
+        yield path_case("hero", size, bridges, density)
+        yield path_case("surfer", size, bridges, density)
+    for size, bridges, rocks in ROCK_WORLDS:
+        yield path_case("hero", size, bridges, 0.05, rocks=rocks)
+    for size, bridges in BRIDGE_WORLDS:
+        yield bridge_case(size, bridges)
+    for size, _bridges, density in PATH_WORLDS:
+        yield free_adjacent_case(size, density)
+    for size, bridges, heroes in TICK_WORLDS:
+        yield tick_case(size, bridges, heroes)
+    for size in RENDER_WORLDS:
+        yield render_case(size, incremental=False)
+        yield render_case(size, incremental=True)
+    for size in FORK_WORLDS:
+        yield fork_case(size)
+
+
+def calibration_workload() -> int:
+    """A fixed pure-Python workload: the unit relative costs are expressed in."""
+    table: Dict[int, int] = {}
+    total = 0
+    for i in range(50_000):
+        table[i & 1023] = table.get(i & 1023, 0) + i
+        total += i % 7
+    return total
+
+
+def measure(case: Case, rounds: int) -> Tuple[float, float]:
+    """
+    Time ``rounds`` freshly set-up rounds of a case, each next to a calibration run.
+
+    Interleaving means both see the same machine state (clock speed, other load), which
+    keeps their ratio far steadier than either time on its own.
+
+    Returns:
+        tuple: Best seconds per operation, and best calibration seconds.
+    """
+    best = calibration = float("inf")
+    clock = time.perf_counter
+    for _ in range(rounds):
+        started = clock()
+        calibration_workload()
+        calibration = min(calibration, clock() - started)
+        run = case.setup()
+        # As timeit does: a collection triggered by setup garbage would land in the timing.
+        gc.collect()
+        gc.disable()
+        try:
+            started = clock()
+            run()
+            best = min(best, clock() - started)
+        finally:
+            gc.enable()
+    return best / case.ops, calibration
+
+
+def run_suite(rounds: int = 7, name_filter: str = "") -> dict:
+    """
+    Measure every case whose name contains ``name_filter``.
+
+    Returns:
+        dict: ``calibration_s`` (best calibration time), platform details and ``cases``:
+        name -> seconds per op and cost relative to the calibration loop.
+    """
+    results = {}
+    calibrations = []
+    for case in cases():
+        if name_filter and name_filter not in case.name:
+            continue
+        seconds, calibration = measure(case, rounds)
+        calibrations.append(calibration)
+        results[case.name] = {"seconds_per_op": seconds, "relative": seconds / calibration}
+    return {
+        "calibration_s": min(calibrations, default=0.0),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[Tuple[str, float]]:
+    """
+    Returns (case name, percent slower) for every case that regressed beyond ``threshold``.
+
+    Cases missing from either side are skipped, so adding a benchmark does not fail the run.
+    """
+    regressions = []
+    for name, result in current["cases"].items():
+        reference = baseline.get("cases", {}).get(name)
+        if reference is None or reference["relative"] <= 0:
+            continue
+        slower = (result["relative"] / reference["relative"] - 1.0) * 100.0
+        if slower > threshold:
+            regressions.append((name, slower))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the simulation hot paths.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="percent slowdown against the baseline that fails the run")
+    parser.add_argument("--rounds", type=int, default=7, help="rounds per case; the best is kept")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.rounds, args.filter)
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+
+    print(f"{'case':<34} {'us/op':>10} {'relative':>10} {'baseline':>10} {'change':>8}")
+    for name, result in current["cases"].items():
+        reference = baseline.get("cases", {}).get(name)
+        if reference:
+            change = f"{(result['relative'] / reference['relative'] - 1.0) * 100.0:+7.1f}%"
+            base = f"{reference['relative']:>10.4f}"
+        else:
+            change, base = "", f"{'-':>10}"
+        print(f"{name:<34} {result['seconds_per_op'] * 1e6:>10.1f} {result['relative']:>10.4f} {base} {change:>8}")
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(current, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        print(f"# baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(current, baseline, args.threshold)
+    for name, slower in regressions:
+        print(f"# REGRESSION {name}: {slower:.1f}% slower than baseline (threshold {args.threshold:.0f}%)")
+    if not baseline:
+        print(f"# no baseline at {args.baseline}; run with --save to record one")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Monte Carlo batch runner: many independent headless simulations across seeds.
+
+    python -m controller.batch --runs 10000 --workers 16
+
+Results are streamed as chunks of runs finish, so memory use does not grow with --runs.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, NamedTuple, Optional, TextIO
+
+from controller import snapshot
+from controller.config import Scenario
+from controller.engine import SimulationEngine
+
+
+class RunResult(NamedTuple):
+    """Compact summary of one finished (or timed-out) simulation."""
+
+    seed: int
+    outcome: str
+    steps: int
+    status_reason: str
+    bridges_complete: int
+    bridges_damaged: int
+    bridges_total: int
+    heroes_with_energy: int
+    hero_energy: int
+
+
+COLUMNS = RunResult._fields
+
+
+def run_simulation(seed: int, max_steps: int = 5000, scenario: Optional[Scenario] = None,
+                   snapshot_path: Optional[str] = None) -> RunResult:
+    """
+    Run one headless simulation to completion (or ``max_steps``) and summarise it.
+
+    Args:
+        seed (int): Seed for this run.
+        max_steps (int): Step budget; runs still going afterwards are reported as "timeout".
+        scenario (Scenario, optional): World parameters; defaults to the classroom setup.
+        snapshot_path (str, optional): Start from this snapshot instead of a fresh world,
+            reseeded with ``seed``; ``scenario`` is ignored then.
+    """
+    if snapshot_path is not None:
+        engine = snapshot.load(snapshot_path, reseed=seed)
+    else:
+        engine = SimulationEngine(seed=seed, scenario=scenario)
+    engine.run_until_done(max_steps)
+    return summarise(engine, seed)
+
+
+def summarise(engine: SimulationEngine, seed: int) -> RunResult:
+    """Build a RunResult from an engine's current state."""
+    if engine.mission_completed:
+        outcome = "completed"
+    elif engine.mission_failed:
+        outcome = "failed"
+    else:
+        outcome = "timeout"
+    # Heroes never leave the roster. One that Galactus walks over, or whose cell another
+    # hero moves onto, drops off the grid but acts again, so the grid would undercount.
+    population = engine.hero_population
+    energy = population.energy if population is not None else [hero.energy for hero in engine.heroes]
+    return RunResult(
+        seed=seed,
+        outcome=outcome,
+        steps=engine.step_count,
+        status_reason=engine.status_reason,
+        bridges_complete=sum(1 for b in engine.bridges if b.is_complete()),
+        bridges_damaged=sum(1 for b in engine.bridges if b.damaged),
+        bridges_total=len(engine.bridges),
+        heroes_with_energy=sum(1 for e in energy if e > 0),
+        hero_energy=sum(energy),
+    )
+
+
+def _run_chunk(seeds: List[int], max_steps: int, scenario: Optional[Scenario] = None,
+               snapshot_path: Optional[str] = None) -> List[RunResult]:
+    return [run_simulation(seed, max_steps, scenario, snapshot_path) for seed in seeds]
+
+
+def _chunks(seeds: Iterable[int], size: int) -> Iterator[List[int]]:
+    chunk: List[int] = []
+    for seed in seeds:
+        chunk.append(seed)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_results(seeds: Iterable[int], workers: Optional[int] = None, max_steps: int = 5000,
+                 chunk_size: int = 16, scenario: Optional[Scenario] = None,
+                 snapshot_path: Optional[str] = None) -> Iterator[RunResult]:
+    """
+    Run one simulation per seed in a process pool and yield results as they finish.
+
+    Only ``workers * 2`` chunks are in flight at a time, so neither the pending work nor
+    the results are ever held in memory all at once. Results arrive in completion order.
+
+    Args:
+        seeds (Iterable[int]): Seeds to run; may be a lazy iterator.
+        workers (int, optional): Worker processes; defaults to os.cpu_count(). 1 runs inline.
+        max_steps (int): Step budget per run.
+        chunk_size (int): Seeds per task, to amortise inter-process overhead on short runs.
+        scenario (Scenario, optional): World parameters shared by every run.
+        snapshot_path (str, optional): Start every run from this snapshot, reseeded per run.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(seeds, chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _run_chunk(chunk, max_steps, scenario, snapshot_path)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: set[Future] = set()
+
+        def submit_next() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            pending.add(pool.submit(_run_chunk, chunk, max_steps, scenario, snapshot_path))
+            return True
+
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                submit_next()
+                yield from future.result()
+
+
+def format_row(result: RunResult) -> str:
+    """Format a result as one tab-separated table row."""
+    return "\t".join(str(value) for value in result)
+
+
+def run_batch(runs: int, workers: Optional[int] = None, base_seed: int = 0, max_steps: int = 5000,
+              chunk_size: int = 16, out: TextIO = sys.stdout, rows: bool = True,
+              scenario: Optional[Scenario] = None, snapshot_path: Optional[str] = None) -> Counter:
+    """
+    Stream a table of ``runs`` results to ``out`` and finish with a one-line summary.
+
+    Returns:
+        Counter: Number of runs per outcome.
+    """
+    outcomes: Counter = Counter()
+    if rows:
+        out.write("\t".join(COLUMNS) + "\n")
+    for result in iter_results(range(base_seed, base_seed + runs), workers, max_steps, chunk_size,
+                                 scenario, snapshot_path):
+        outcomes[result.outcome] += 1
+        if rows:
+            out.write(format_row(result) + "\n")
+    total = sum(outcomes.values())
+    rate = outcomes["completed"] / total if total else 0.0
+    out.write(f"# runs={total} completed={outcomes['completed']} failed={outcomes['failed']} "
+              f"timeout={outcomes['timeout']} success_rate={rate:.4f}\n")
+    return outcomes
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run many headless simulations in parallel.")
+    parser.add_argument("--runs", type=int, default=100, help="number of simulations")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first run; run i uses seed + i")
+    parser.add_argument("--max-steps", type=int, default=5000, help="step budget per run")
+    parser.add_argument("--chunk-size", type=int, default=16, help="runs per worker task")
+    parser.add_argument("--summary-only", action="store_true", help="print only the summary line")
+    defaults = Scenario()
+    parser.add_argument("--width", type=int, default=defaults.width, help="world columns")
+    parser.add_argument("--height", type=int, default=defaults.height, help="world rows")
+    parser.add_argument("--bridges", type=int, default=defaults.bridge_count, help="bridge sites")
+    parser.add_argument("--rocks", type=float, default=defaults.rock_probability,
+                        help="share of cells holding a rock")
+    parser.add_argument("--aliens", type=float, default=defaults.alien_probability,
+                        help="share of cells holding an alien")
+    parser.add_argument("--snapshot", default=None,
+                        help="start every run from this snapshot file (world options are ignored)")
+    args = parser.parse_args(argv)
+    scenario = Scenario(width=args.width, height=args.height, bridge_count=args.bridges,
+                        rock_probability=args.rocks, alien_probability=args.aliens)
+    run_batch(args.runs, args.workers, args.seed, args.max_steps, args.chunk_size,
+              rows=not args.summary_only, scenario=scenario, snapshot_path=args.snapshot)
+
+
+if __name__ == "__main__":
+    main()
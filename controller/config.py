@@ -1,3 +1,6 @@
+from typing import NamedTuple, Optional, Tuple
+
+
 class Config:
     """Class representing configuration parameters for a simulation."""
 
@@ -11,3 +14,36 @@ class Config:
     rock_creation_probability = 0.3
 
     initial_num_rovers = 2
+    bridge_count = 7
+    surfer_spawn_step = 12
+    galactus_spawn_step = 24
+
+
+class Scenario(NamedTuple):
+    """
+    Per-simulation world parameters; the defaults reproduce the classroom setup in Config.
+
+    Attributes:
+        width (int): Number of grid columns.
+        height (int): Number of grid rows.
+        bridge_count (int): Bridge sites placed at random at the start.
+        surfer_spawn_step (int): Step on which the Silver Surfer arrives.
+        galactus_spawn_step (int): Step on which the Galactus projection arrives.
+        heroes (tuple, optional): Hero classes to place around the centre, in roster order;
+            None means the Fantastic Four. A class may appear more than once.
+        hero_storage (str): "objects" for one Hero object per hero, or "arrays" for a
+            struct-of-arrays HeroPopulation suited to thousands of heroes.
+        rock_probability (float): Chance of a cell holding a rock; Config's
+            rock_creation_probability gives the dense classroom field. Off by default.
+        alien_probability (float): Chance of a cell holding an alien, likewise.
+    """
+
+    width: int = Config.world_size
+    height: int = Config.world_size
+    bridge_count: int = Config.bridge_count
+    surfer_spawn_step: int = Config.surfer_spawn_step
+    galactus_spawn_step: int = Config.galactus_spawn_step
+    heroes: Optional[Tuple[type, ...]] = None
+    hero_storage: str = "objects"
+    rock_probability: float = 0.0
+    alien_probability: float = 0.0
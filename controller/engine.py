@@ -0,0 +1,608 @@
+from __future__ import annotations
+
+import copy
+import random
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from controller.config import Scenario
+from controller.profiling import TickProfiler
+from controller.scheduler import AgentScheduler
+from model.location import Location
+from model.mars import Mars
+from model.bridge import Bridge
+from model.hero import ReedRichards, SueStorm, JohnnyStorm, BenGrimm
+from model.hero_population import HeroPopulation
+from model.obstacles import ALIEN, ROCK, ObstacleMap
+from model.silver_surfer import SilverSurfer
+from model.galactus import GalactusProjection
+
+DEFAULT_HEROES = (ReedRichards, SueStorm, JohnnyStorm, BenGrimm)
+
+
+class SimulationEngine:
+    """
+    Headless simulation model: world generation, stepping and mission checks.
+
+    The engine never touches tkinter; views attach themselves as observers and are
+    notified after every step and after every reset.
+    """
+
+    def __init__(self, seed: Optional[int] = None, array_backed: bool = False,
+                 scenario: Optional[Scenario] = None) -> None:
+        """
+        Initialise the engine and generate the starting world.
+
+        Args:
+            seed (int, optional): Seed for this simulation's private RNG. A fresh seed is
+                drawn (and kept in ``self.seed``) when omitted, so every run can be replayed.
+            array_backed (bool): Give Mars a typed-array mirror for vectorised queries.
+            scenario (Scenario, optional): World size, bridge count, spawn steps, hero
+                roster and obstacle density; defaults to the classroom setup.
+        """
+        self._setup(seed, array_backed, scenario)
+        self._generate_initial_world()
+
+    def _setup(self, seed: Optional[int], array_backed: bool, scenario: Optional[Scenario]) -> None:
+        """Create an empty world and the engine state around it, without populating it."""
+        self._observers: List[Callable[['SimulationEngine'], None]] = []
+
+        self.seed = self._choose_seed(seed)
+        self.rng = random.Random(self.seed)
+
+        self.scenario = scenario or Scenario()
+        self.step_count = 0
+        self.mars = Mars(self.scenario.width, self.scenario.height, array_backed=array_backed)
+
+        self.mission_failed = False
+        self.mission_completed = False
+        self.status_reason: str = ""
+        # Optional phase timer; see controller.profiling. Kept across resets.
+        self.profiler: Optional[TickProfiler] = None
+        # Skip steps, or the phases of a step, in which no hero can do anything; see
+        # _heroes_quiet. Kept across resets.
+        self.fast_forward = True
+        # Steps of the current run whose heroes phase was skipped that way.
+        self.quiet_steps = 0
+
+        self.heroes: list = []
+        self.hero_population: Optional[HeroPopulation] = None
+        # Heroes with nothing to do sleep until a wake step or an event; see _heroes_due.
+        self.hero_scheduler = AgentScheduler(0)
+        self._hero_events: Optional[tuple] = None
+        self.surfer: SilverSurfer | None = None
+        self.galactus: GalactusProjection | None = None
+
+        self.bridges: list[Bridge] = []
+        self.franklin_location = self.mars.location(0, 0)
+        self.surfer_spawn_step = self.scenario.surfer_spawn_step
+        self.galactus_spawn_step = self.scenario.galactus_spawn_step
+
+    @staticmethod
+    def _choose_seed(seed: Optional[int]) -> int:
+        if seed is None:
+            return random.SystemRandom().getrandbits(63)
+        return seed
+
+    def add_observer(self, observer: Callable[['SimulationEngine'], None]) -> None:
+        """
+        Register a callable notified with the engine after every step and reset.
+
+        Args:
+            observer (Callable): Called as ``observer(engine)``.
+        """
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: Callable[['SimulationEngine'], None]) -> None:
+        """Detach a previously registered observer; unknown observers are ignored."""
+        if observer in self._observers:
+            self._observers.remove(observer)
+
+    def _notify(self) -> None:
+        for observer in list(self._observers):
+            observer(self)
+
+    def is_done(self) -> bool:
+        """Return True once the mission has either failed or been completed."""
+        return self.mission_failed or self.mission_completed
+
+    def step(self) -> bool:
+        """
+        Advance the world by a single step.
+
+        Returns:
+            bool: True if the simulation can keep running, False once it is done.
+        """
+        if self.is_done():
+            return False
+        self.step_count += 1
+        self._update()
+        self._notify()
+        return not self.is_done()
+
+    def run_steps(self, n: int) -> int:
+        """
+        Advance the world by up to ``n`` steps, stopping early if the mission ends.
+
+        While nobody observes the engine, stretches in which every hero sleeps and neither
+        the Surfer nor Galactus is on the grid are applied in one jump (see _idle_stretch);
+        the resulting state is exactly that of stepping through them.
+
+        Returns:
+            int: The number of steps actually executed.
+        """
+        executed = 0
+        while executed < n and not self.is_done():
+            idle = self._idle_stretch(n - executed)
+            if idle:
+                self.step_count += idle
+                self.quiet_steps += idle
+                executed += idle
+                continue
+            self.step()
+            executed += 1
+        return executed
+
+    def run_until_done(self, max_steps: int = 10_000) -> bool:
+        """
+        Step until the mission ends or ``max_steps`` steps have been executed.
+
+        Returns:
+            bool: True if the mission ended within the step budget.
+        """
+        self.run_steps(max_steps)
+        return self.is_done()
+
+    def _generate_initial_world(self) -> None:
+        width  = self.mars.get_width()
+        height = self.mars.get_height()
+
+        centre_x = width // 2
+        centre_y = height // 2
+
+        scenario = self.scenario
+        hero_classes = scenario.heroes or DEFAULT_HEROES
+        forbidden = {(centre_x, centre_y)}
+        offsets = self._hero_offsets(width // 2 + height // 2)
+        hero_cells = []
+        for _ in hero_classes:
+            for dx, dy in offsets:
+                cell = ((centre_x + dx) % width, (centre_y + dy) % height)
+                if cell not in forbidden:
+                    break
+            else:
+                raise ValueError(f"A {width}x{height} world has no room for {len(hero_classes)} heroes")
+            forbidden.add(cell)
+            hero_cells.append(cell)
+
+        if scenario.hero_storage == "arrays":
+            self.hero_population = HeroPopulation(self.mars, hero_classes, hero_cells)
+            self.heroes.extend(self.hero_population.handles)
+        elif scenario.hero_storage == "objects":
+            for cls, cell in zip(hero_classes, hero_cells):
+                loc = self.mars.location(*cell)
+                hero = cls(loc)
+                self.heroes.append(hero)
+                self.mars.set_agent(hero, loc)
+        else:
+            raise ValueError(f"Unknown hero storage {scenario.hero_storage!r}")
+
+        self._place_obstacles(forbidden)
+
+        self.bridges.clear()
+        sites = self._bridge_sites(scenario.bridge_count, forbidden,
+                                   self.mars.location(centre_x, centre_y))
+        for loc in sites:
+            br = Bridge(loc)
+            self.bridges.append(br)
+            self.mars.add_bridge(br)
+
+        self.franklin_location = self.mars.location(0, 0)
+        self.surfer_spawn_step = scenario.surfer_spawn_step
+        self.galactus_spawn_step = scenario.galactus_spawn_step
+        self._reset_hero_schedule()
+
+    def _place_obstacles(self, forbidden: set) -> None:
+        """
+        Scatter rocks and aliens over the free cells in one draw, per the scenario.
+
+        Each probability is applied as the share of the world's cells that get that
+        obstacle, at uniformly random free cells, which costs O(obstacles) rather than a
+        coin flip per cell. Nothing is drawn when both are zero.
+        """
+        scenario = self.scenario
+        rock_p = scenario.rock_probability
+        alien_p = scenario.alien_probability
+        if rock_p < 0 or alien_p < 0 or rock_p + alien_p > 1:
+            raise ValueError(f"Obstacle probabilities must be non-negative and sum to at most 1, "
+                             f"got rocks {rock_p} and aliens {alien_p}")
+        width = self.mars.get_width()
+        height = self.mars.get_height()
+        rocks = round(rock_p * width * height)
+        aliens = round(alien_p * width * height)
+        if not rocks + aliens:
+            return
+        cells = self.mars.sample_free_cells(rocks + aliens, self.rng, exclude=forbidden)
+        kinds = bytearray(width * height)
+        for i, loc in enumerate(cells):
+            kinds[loc.get_y() * width + loc.get_x()] = ROCK if i < rocks else ALIEN
+        self.mars.set_obstacles(ObstacleMap(width, height, bytes(kinds)))
+
+    def _bridge_sites(self, count: int, forbidden: set, hq: Location) -> List[Location]:
+        """
+        Draw ``count`` distinct free cells that the heroes can reach from HQ.
+
+        Candidates walled off by obstacles are rejected by region label and redrawn; on
+        open worlds the first draw is always accepted.
+
+        Raises:
+            ValueError: If too few reachable free cells remain.
+        """
+        mars = self.mars
+        sites: List[Location] = []
+        excluded = set(forbidden)
+        while len(sites) < count:
+            drawn = mars.sample_free_cells(count - len(sites), self.rng, exclude=excluded)
+            if not drawn:
+                width, height = mars.get_width(), mars.get_height()
+                raise ValueError(f"A {width}x{height} world has no room for {count} reachable bridges")
+            for loc in drawn:
+                excluded.add((loc.get_x(), loc.get_y()))
+                if mars.reachable(hq, loc):
+                    sites.append(loc)
+        return sites
+
+    @staticmethod
+    def _hero_offsets(max_radius: int) -> Iterator[Tuple[int, int]]:
+        """
+        Yields offsets from the centre for hero placement: the four orthogonal neighbours
+        first, then ring after ring of cells further out (by Manhattan distance), up to
+        ``max_radius``, which is enough to reach every cell of the torus.
+        """
+        yield from ((-1, 0), (1, 0), (0, -1), (0, 1))
+        radius = 2
+        while radius <= max_radius:
+            for dx in range(-radius, radius + 1):
+                rest = radius - abs(dx)
+                yield dx, -rest
+                if rest:
+                    yield dx, rest
+            radius += 1
+
+    def _update(self) -> None:
+        profiler = self.profiler
+        if profiler is not None and profiler.enabled:
+            self._update_profiled(profiler)
+            return
+        self._spawn_surfer()
+        self._spawn_galactus()
+        if self._heroes_quiet():
+            self.quiet_steps += 1
+        else:
+            self._act_heroes()
+            self._share_energy()
+        self._act_surfer()
+        self._act_galactus()
+        self._check_mission()
+
+    def _update_profiled(self, profiler: TickProfiler) -> None:
+        """The same phases as _update, each timed into the profiler."""
+        clock = profiler.clock
+        add = profiler.add
+        started = clock()
+        self._spawn_surfer()
+        t = clock()
+        add("surfer_spawn", t - started)
+        self._spawn_galactus()
+        t, started = clock(), t
+        add("galactus_spawn", t - started)
+        quiet = self._heroes_quiet()
+        if quiet:
+            self.quiet_steps += 1
+        elif self.hero_population is not None:
+            self._act_heroes()
+        else:
+            # One sample per hero act, keyed by class, as well as the phase total.
+            mars = self.mars
+            heroes = self.heroes
+            for i in self._heroes_due():
+                hero = heroes[i]
+                hero_started = clock()
+                self._act_hero(i, hero, mars)
+                add("heroes." + type(hero).__name__, clock() - hero_started)
+            self._end_heroes_phase()
+        t, started = clock(), t
+        add("heroes", t - started)
+        if not quiet:
+            self._share_energy()
+        t, started = clock(), t
+        add("share_energy", t - started)
+        self._act_surfer()
+        t, started = clock(), t
+        add("surfer", t - started)
+        self._act_galactus()
+        t, started = clock(), t
+        add("galactus", t - started)
+        self._check_mission()
+        add("mission_checks", clock() - t)
+        profiler.ticks += 1
+
+    def _spawn_surfer(self) -> None:
+        if self.surfer is None and self.step_count >= self.surfer_spawn_step:
+            # On a full grid the Surfer waits for a cell to free up.
+            loc = self.mars.random_free_cell(self.rng)
+            if loc is not None:
+                self.surfer = SilverSurfer(loc, rng=self.rng)
+                self.mars.set_agent(self.surfer, loc)
+
+    def _spawn_galactus(self) -> None:
+        if self.galactus is None and self.step_count >= self.galactus_spawn_step:
+            loc = self.mars.location(self.mars.get_width() - 1, self.mars.get_height() - 1)
+            self.galactus = GalactusProjection(loc, self.franklin_location)
+            self.mars.set_agent(self.galactus, loc)
+
+    def _reset_hero_schedule(self) -> None:
+        """Wake every hero; call whenever heroes or the world were changed from outside."""
+        self.hero_scheduler = AgentScheduler(len(self.heroes))
+        self._hero_events = None
+
+    def _heroes_due(self):
+        """
+        Returns the roster indices of the heroes that act this step, in roster order.
+
+        A hero whose act did nothing sleeps until the step Hero.idle_until names. Its
+        answer assumes the incomplete bridges stay the same and no Surfer joins or leaves
+        the grid, so any such change, before or during the previous heroes phase, wakes
+        everyone; energy sharing wakes the heroes it touches.
+        """
+        self._check_hero_events()
+        return self.hero_scheduler.due(self.step_count)
+
+    def _end_heroes_phase(self) -> None:
+        # Heroes put to sleep early in the phase may have seen a state a later hero changed.
+        self._check_hero_events()
+
+    def _check_hero_events(self) -> None:
+        events = self._hero_event_state()
+        if events != self._hero_events:
+            self.hero_scheduler.wake_all()
+            self._hero_events = events
+
+    def _hero_event_state(self) -> tuple:
+        mars = self.mars
+        return mars.bridge_work_version(), mars.find_agent(SilverSurfer) is not None
+
+    def _heroes_quiet(self) -> bool:
+        """
+        Returns True if this step's heroes phase and energy sharing can be skipped.
+
+        That holds while every hero sleeps past this step and no event has woken them:
+        nobody acts, and sharing finds nothing to do, since every hero has the energy and
+        position it had in the last sharing round, and that round woke nobody.
+        """
+        if not self.fast_forward:
+            return False
+        scheduler = self.hero_scheduler
+        if scheduler.sleeping < scheduler.count:
+            return False
+        wake = scheduler.next_wake()
+        if wake is not None and wake <= self.step_count:
+            return False
+        return self._hero_event_state() == self._hero_events
+
+    def _idle_stretch(self, limit: int) -> int:
+        """
+        Returns how many of the next ``limit`` steps would change nothing at all.
+
+        Without the Surfer or Galactus on the grid, a step in which the heroes are quiet
+        leaves the world as it was, so every step up to the next hero wake-up or spawn can
+        be skipped outright. Only unobserved, unprofiled runs skip steps this way.
+        """
+        scheduler = self.hero_scheduler
+        if (not self.fast_forward or scheduler.sleeping < scheduler.count or self._observers
+                or self.surfer is not None or self.galactus is not None):
+            return 0
+        profiler = self.profiler
+        if profiler is not None and profiler.enabled:
+            return 0
+        step = self.step_count
+        idle = min(limit, self.surfer_spawn_step - 1 - step, self.galactus_spawn_step - 1 - step)
+        wake = scheduler.next_wake()
+        if wake is not None:
+            idle = min(idle, wake - 1 - step)
+        if idle <= 0 or self._hero_event_state() != self._hero_events:
+            return 0
+        return idle
+
+    def _act_hero(self, index: int, hero, mars: Mars) -> None:
+        location = hero.get_location()
+        energy = hero.energy
+        hero.act(mars)
+        if hero.energy == energy and hero.get_location() is location:
+            step = self.step_count
+            wake = hero.idle_until(mars, step)
+            if wake is None or wake > step + 1:
+                self.hero_scheduler.sleep(index, wake)
+
+    def _act_heroes(self) -> None:
+        mars = self.mars
+        step = self.step_count
+        due = self._heroes_due()
+        population = self.hero_population
+        if population is not None:
+            xs = population.xs
+            ys = population.ys
+            energy = population.energy
+            before = [(xs[i], ys[i], energy[i]) for i in due]
+            population.act_all(mars, None if len(due) == len(population) else due)
+            scheduler = self.hero_scheduler
+            for i, state in zip(due, before):
+                if state == (xs[i], ys[i], energy[i]):
+                    wake = population.idle_until(i, mars, step)
+                    if wake is None or wake > step + 1:
+                        scheduler.sleep(i, wake)
+        else:
+            heroes = self.heroes
+            for i in due:
+                self._act_hero(i, heroes[i], mars)
+        self._end_heroes_phase()
+
+    def _act_surfer(self) -> None:
+        if self.surfer:
+            self.surfer.act(self.mars)
+
+    def _act_galactus(self) -> None:
+        if self.galactus:
+            self.galactus.act(self.mars)
+
+    def _check_mission(self) -> None:
+        if not self.mission_failed:
+            if self.bridges and all((not br.damaged) and br.is_complete() for br in self.bridges):
+                self.mission_completed = True
+                self.status_reason = "All bridges complete and undamaged"
+
+        if not self.mission_completed and hasattr(self.mars, "mission_failed") and self.mars.mission_failed:
+            # Try to infer the cause for a friendly message
+            if self.galactus and self._is_at(self.galactus.get_location(), self.franklin_location):
+                self.status_reason = "Galactus reached Franklin"
+            else:
+                self.status_reason = "Environment signaled mission failure"
+            self.mission_failed = True
+
+    def _share_energy(self) -> None:
+        """
+        Let each hero top up orthogonally adjacent heroes that are at least 20 energy behind.
+
+        Neighbours are found through a cell -> heroes index built once per step, and each
+        hero's neighbours are visited in roster order, so transfers happen in exactly the
+        order of the old all-pairs comparison without its O(n^2) distance checks. Heroes
+        whose energy changes are woken, since their idle_until no longer holds.
+        """
+        heroes = self.heroes
+        if len(heroes) < 2:
+            return
+        scheduler = self.hero_scheduler
+        width = self.mars.get_width()
+        height = self.mars.get_height()
+        by_cell: dict[tuple[int, int], list[int]] = {}
+        cells = []
+        for i, hero in enumerate(heroes):
+            loc = hero.get_location()
+            cell = (loc.get_x() % width, loc.get_y() % height)
+            cells.append(cell)
+            by_cell.setdefault(cell, []).append(i)
+
+        for i, a in enumerate(heroes):
+            x, y = cells[i]
+            neighbour_cells = {((x - 1) % width, y), ((x + 1) % width, y),
+                               (x, (y - 1) % height), (x, (y + 1) % height)}
+            neighbour_cells.discard((x, y))
+            neighbours = []
+            for cell in neighbour_cells:
+                found = by_cell.get(cell)
+                if found:
+                    neighbours.extend(found)
+            if not neighbours:
+                continue
+            neighbours.sort()
+            for j in neighbours:
+                b = heroes[j]
+                if a.energy - b.energy >= 20 and a.energy > 20 and b.energy < b.max_energy:
+                    give = min(10, a.energy - b.energy)
+                    a.energy -= give
+                    b.energy = min(b.max_energy, b.energy + give)
+                    scheduler.wake(i)
+                    scheduler.wake(j)
+
+    @staticmethod
+    def _is_at(a: Location, b: Location) -> bool:
+        return a.get_x() == b.get_x() and a.get_y() == b.get_y()
+
+    def reset(self, seed: Optional[int] = None) -> None:
+        """
+        Clear the world and regenerate it from scratch, then notify observers.
+
+        Args:
+            seed (int, optional): Seed for the new world; a fresh one is drawn when omitted.
+        """
+        self.mars.clear()
+        if hasattr(self.mars, "mission_failed"):
+            self.mars.mission_failed = False
+
+        self.step_count = 0
+        self.quiet_steps = 0
+        self.mission_failed = False
+        self.mission_completed = False
+        self.status_reason = ""
+
+        self.heroes.clear()
+        self.hero_population = None
+        self.bridges.clear()
+        self.surfer = None
+        self.galactus = None
+
+        self.seed = self._choose_seed(seed)
+        self.rng.seed(self.seed)
+
+        self._generate_initial_world()
+        self._notify()
+
+    def fork(self) -> SimulationEngine:
+        """
+        Returns an independent, headless copy of the simulation to look ahead in.
+
+        The fork carries the RNG state, the hero schedule and a copy of every agent and
+        bridge, so it continues exactly as this engine would; neither sees the other's
+        later steps. The world itself is forked copy-on-write (see Mars.fork): a fork costs
+        O(agents + bridges) and a pointer per grid row, however large the world, and then
+        only pays for the cells it changes. Observers and the profiler stay behind.
+
+        Returns:
+            SimulationEngine: The fork.
+        """
+        fork = SimulationEngine.__new__(SimulationEngine)
+        fork._observers = []
+        fork.seed = self.seed
+        fork.rng = random.Random()
+        fork.rng.setstate(self.rng.getstate())
+        fork.scenario = self.scenario
+        fork.step_count = self.step_count
+        fork.mission_failed = self.mission_failed
+        fork.mission_completed = self.mission_completed
+        fork.status_reason = self.status_reason
+        fork.profiler = None
+        fork.fast_forward = self.fast_forward
+        fork.quiet_steps = 0
+
+        if self.hero_population is not None:
+            fork.hero_population = self.hero_population.fork()
+            fork.heroes = list(fork.hero_population.handles)
+        else:
+            fork.hero_population = None
+            fork.heroes = [copy.copy(hero) for hero in self.heroes]
+        agents = {id(hero): twin for hero, twin in zip(self.heroes, fork.heroes)}
+        fork.surfer = None
+        if self.surfer is not None:
+            fork.surfer = copy.copy(self.surfer)
+            if self.surfer.rng is self.rng:
+                fork.surfer.rng = fork.rng
+            else:
+                fork.surfer.rng = random.Random()
+                fork.surfer.rng.setstate(self.surfer.rng.getstate())
+            agents[id(self.surfer)] = fork.surfer
+        fork.galactus = None
+        if self.galactus is not None:
+            fork.galactus = copy.copy(self.galactus)
+            agents[id(self.galactus)] = fork.galactus
+
+        fork.mars = self.mars.fork(agents)
+        if fork.hero_population is not None:
+            fork.hero_population.mars = fork.mars
+        fork.hero_scheduler = self.hero_scheduler.copy()
+        fork._hero_events = self._hero_events
+        # Bridges Galactus removed stay in the roster, detached.
+        fork.bridges = [fork.mars.get_bridge(bridge.location) if bridge.world is self.mars else bridge.copy()
+                        for bridge in self.bridges]
+        fork.franklin_location = self.franklin_location
+        fork.surfer_spawn_step = self.surfer_spawn_step
+        fork.galactus_spawn_step = self.galactus_spawn_step
+        return fork
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+FRAME_RATE = 30
+FRAME_INTERVAL_MS = 1000.0 / FRAME_RATE
+
+
+class AdaptiveStepBatch:
+    """
+    Chooses how many model steps to run per frame so that stepping fills a time budget.
+
+    After each batch the measured cost per step is used to resize the next batch towards
+    the budget. Growth and shrinkage are limited to a factor of two per frame so one slow
+    or fast outlier step does not make the batch size swing wildly.
+    """
+
+    def __init__(self, initial: int = 1, max_steps: int = 10_000) -> None:
+        self.steps = max(1, initial)
+        self.max_steps = max_steps
+
+    def record(self, executed: int, elapsed_s: float, budget_ms: float) -> int:
+        """
+        Update the batch size from a batch that just ran.
+
+        Args:
+            executed (int): Steps the batch actually executed.
+            elapsed_s (float): Wall-clock seconds the batch took.
+            budget_ms (float): Milliseconds the next batch may spend stepping.
+
+        Returns:
+            int: The batch size to use next.
+        """
+        if executed <= 0:
+            return self.steps
+        if elapsed_s <= 0:
+            ideal = self.steps * 2
+        else:
+            ideal = int(budget_ms / (elapsed_s * 1000.0 / executed))
+        lower = max(1, self.steps // 2)
+        upper = min(self.max_steps, self.steps * 2)
+        self.steps = min(upper, max(lower, ideal))
+        return self.steps
+
+
+class FixedTimestepClock:
+    """
+    Wall-clock deadlines for running model steps at a fixed rate.
+
+    Deadlines are spaced exactly one period apart from the moment the clock started, so
+    time spent stepping and rendering does not push later steps back. When a tick fires
+    after several deadlines have passed, ``due`` asks for the missed steps too, up to
+    ``max_catch_up``; anything beyond that is dropped so a slow machine does not spiral.
+
+    Attributes:
+        lag_ms (float): Smoothed delay between a deadline and the tick that served it.
+    """
+
+    def __init__(self, rate: float, max_catch_up: int = 5, clock=time.perf_counter) -> None:
+        self.max_catch_up = max(1, max_catch_up)
+        self.lag_ms = 0.0
+        self.__clock = clock
+        self.__period = 1.0 / max(0.1, rate)
+        self.__deadline = clock() + self.__period
+
+    @property
+    def rate(self) -> float:
+        return 1.0 / self.__period
+
+    def set_rate(self, rate: float) -> None:
+        """Change the step rate; the next deadline moves so it is one new period after the last one."""
+        previous = self.__deadline - self.__period
+        self.__period = 1.0 / max(0.1, rate)
+        self.__deadline = previous + self.__period
+
+    def restart(self) -> None:
+        """Forget any backlog, e.g. after a pause, and start counting from now."""
+        self.__deadline = self.__clock() + self.__period
+        self.lag_ms = 0.0
+
+    def due(self) -> int:
+        """
+        Returns how many steps should run now and advances the deadline past them.
+        """
+        now = self.__clock()
+        if now < self.__deadline:
+            return 0
+        late = now - self.__deadline
+        missed = int(late / self.__period) + 1
+        self.lag_ms += (late * 1000.0 - self.lag_ms) * 0.2
+        if missed > self.max_catch_up:
+            self.__deadline = now + self.__period
+            return self.max_catch_up
+        self.__deadline += missed * self.__period
+        return missed
+
+    def delay_ms(self) -> float:
+        """Milliseconds until the next deadline (0 if it has already passed)."""
+        return max(0.0, (self.__deadline - self.__clock()) * 1000.0)
+
+
+class RateMeter:
+    """Steps per second achieved over a sliding window of recent wall-clock time."""
+
+    def __init__(self, window_s: float = 2.0, clock=time.perf_counter) -> None:
+        self.window_s = window_s
+        self.__clock = clock
+        self.__samples: Deque[Tuple[float, int]] = deque()
+        self.__total = 0
+
+    def record(self, steps: int) -> None:
+        """Note that ``steps`` steps just finished."""
+        now = self.__clock()
+        self.__samples.append((now, steps))
+        self.__total += steps
+        self.__trim(now)
+
+    def reset(self) -> None:
+        self.__samples.clear()
+        self.__total = 0
+
+    def rate(self) -> float:
+        """Returns the achieved steps/s over the window, or 0.0 before two samples exist."""
+        now = self.__clock()
+        self.__trim(now)
+        if len(self.__samples) < 2:
+            return 0.0
+        span = now - self.__samples[0][0]
+        if span <= 0:
+            return 0.0
+        # The oldest sample only marks where the window starts.
+        return (self.__total - self.__samples[0][1]) / span
+
+    def __trim(self, now: float) -> None:
+        while self.__samples and now - self.__samples[0][0] > self.window_s:
+            _, steps = self.__samples.popleft()
+            self.__total -= steps
@@ -0,0 +1,337 @@
+"""
+Append-only trajectory recording and replay.
+
+A recording is a file header followed by frames. Each frame is either a keyframe (a
+full snapshot, see controller.snapshot) or a delta holding only what changed during one
+step: agents that moved, spawned, changed energy or left the grid, bridges whose health,
+damage or presence changed, and the mission status. A keyframe is written when
+recording starts, every ``keyframe_interval`` steps, and whenever the engine is reset
+or restored, which also starts a new run within the file.
+
+    recorder = Recorder(engine, "run.rec")      # records every step from now on
+    ...
+    recorder.close()
+
+    replay = Replay("run.rec")
+    engine = replay.seek(412)                   # nearest keyframe + deltas, no re-simulation
+"""
+from __future__ import annotations
+
+import struct
+from bisect import bisect_right
+from typing import BinaryIO, List, NamedTuple, Optional
+
+from controller import snapshot
+from controller.engine import SimulationEngine
+from model.galactus import GalactusProjection
+from model.silver_surfer import SilverSurfer
+
+MAGIC = b"MARSREC\0"
+VERSION = 1
+
+FILE_HEADER = struct.Struct("<8sHxxxxxx")
+# kind, step, payload length
+FRAME = struct.Struct("<BxxxQI")
+RUN_START = 0
+KEYFRAME = 1
+DELTA = 2
+# flags (snapshot mission bits, 8 = status text follows), status length, agents, bridges
+DELTA_HEADER = struct.Struct("<BxHII")
+# agent id, then snapshot.AGENT_RECORD fields, then the grid cell the agent occupies or -1
+AGENT_DELTA = struct.Struct("<IBBxxiiiiiii")
+# bridge index, health, flags (bit 0 damaged, bit 1 on Mars)
+BRIDGE_DELTA = struct.Struct("<IiBxxx")
+
+STATUS_CHANGED = 8
+
+
+def _agents(engine: SimulationEngine) -> List:
+    """
+    Returns the engine's agents indexed by recording id.
+
+    Heroes keep their roster position as id; the Surfer and Galactus get the two ids
+    after the roster, whether or not they have spawned yet (None until then).
+    """
+    return engine.heroes + [engine.surfer, engine.galactus]
+
+
+def _grid_cell(mars, agent) -> int:
+    location = mars.get_agent_location(agent)
+    if location is None or mars.get_agent(location) is not agent:
+        return -1
+    return location.get_y() * mars.get_width() + location.get_x()
+
+
+def _flags(engine: SimulationEngine) -> int:
+    return ((snapshot.MISSION_FAILED if engine.mission_failed else 0)
+            | (snapshot.MISSION_COMPLETED if engine.mission_completed else 0)
+            | (snapshot.MARS_MISSION_FAILED if engine.mars.mission_failed else 0))
+
+
+class Recorder:
+    """
+    Observes an engine and appends a frame to a recording file after every step.
+
+    Only differences from the previous step are written, so a quiet step costs a few
+    bytes. Attach it to the engine whose steps should be recorded; it detaches on close.
+    """
+
+    def __init__(self, engine: SimulationEngine, path: str, keyframe_interval: int = 100) -> None:
+        """
+        Args:
+            engine (SimulationEngine): The engine to record.
+            path (str): Recording file; created, or appended to if it exists.
+            keyframe_interval (int): Steps between keyframes; smaller seeks faster, larger is smaller.
+        """
+        self.engine = engine
+        self.path = path
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.frames_written = 0
+        self.__file: Optional[BinaryIO] = open(path, "ab")
+        if self.__file.tell() == 0:
+            self.__file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        self.__agents: List[Optional[tuple]] = []
+        self.__bridges: List[tuple] = []
+        self.__status = ""
+        self.__last_step: Optional[int] = None
+        self.__keyframe(RUN_START)
+        engine.add_observer(self._on_engine_changed)
+
+    def close(self) -> None:
+        """Stop recording and close the file."""
+        if self.__file is None:
+            return
+        self.engine.remove_observer(self._on_engine_changed)
+        self.__file.close()
+        self.__file = None
+
+    def _on_engine_changed(self, engine: SimulationEngine) -> None:
+        step = engine.step_count
+        if step != self.__last_step + 1:
+            self.__keyframe(RUN_START)
+        elif step % self.keyframe_interval == 0:
+            self.__delta()
+            self.__keyframe(KEYFRAME)
+        else:
+            self.__delta()
+
+    def __write(self, kind: int, payload: bytes) -> None:
+        self.__file.write(FRAME.pack(kind, self.engine.step_count, len(payload)))
+        self.__file.write(payload)
+        self.frames_written += 1
+
+    def __keyframe(self, kind: int) -> None:
+        engine = self.engine
+        mars = engine.mars
+        self.__write(kind, snapshot.encode(engine))
+        self.__file.flush()
+        self.__agents = [None if agent is None else snapshot.agent_fields(agent) + (_grid_cell(mars, agent),)
+                         for agent in _agents(engine)]
+        self.__bridges = [(bridge.health, bridge.damaged, bridge.world is mars) for bridge in engine.bridges]
+        self.__status = engine.status_reason
+        self.__last_step = engine.step_count
+
+    def __delta(self) -> None:
+        engine = self.engine
+        mars = engine.mars
+        agent_fields = snapshot.agent_fields
+
+        agents = bytearray()
+        n_agents = 0
+        previous = self.__agents
+        for rid, agent in enumerate(_agents(engine)):
+            if agent is None:
+                continue
+            fields = agent_fields(agent) + (_grid_cell(mars, agent),)
+            if fields != previous[rid]:
+                previous[rid] = fields
+                agents += AGENT_DELTA.pack(rid, *fields)
+                n_agents += 1
+
+        bridges = bytearray()
+        n_bridges = 0
+        known = self.__bridges
+        for index, bridge in enumerate(engine.bridges):
+            state = (bridge.health, bridge.damaged, bridge.world is mars)
+            if state != known[index]:
+                known[index] = state
+                bridges += BRIDGE_DELTA.pack(index, state[0], int(state[1]) | (2 if state[2] else 0))
+                n_bridges += 1
+
+        flags = _flags(engine)
+        status = b""
+        if engine.status_reason != self.__status:
+            self.__status = engine.status_reason
+            status = engine.status_reason.encode("utf-8")
+            flags |= STATUS_CHANGED
+        self.__write(DELTA, DELTA_HEADER.pack(flags, len(status), n_agents, n_bridges)
+                     + status + bytes(agents) + bytes(bridges))
+        self.__last_step = engine.step_count
+
+
+class Frame(NamedTuple):
+    kind: int
+    step: int
+    offset: int
+    length: int
+
+
+class Replay:
+    """
+    Random access to the steps of a recording without re-simulating them.
+
+    The file is split into runs (each started by a keyframe that does not follow on from
+    the previous frame). Seeking restores the nearest keyframe at or before the target
+    step and applies the deltas after it; seeking forward from the current step only
+    applies the deltas in between.
+    """
+
+    def __init__(self, path: str, run: int = -1) -> None:
+        """
+        Args:
+            path (str): Recording file.
+            run (int): Which run in the file to replay; the last one by default.
+
+        Raises:
+            snapshot.SnapshotError: If the file is not a recording.
+        """
+        with open(path, "rb") as handle:
+            self.__data = handle.read()
+        if len(self.__data) < FILE_HEADER.size:
+            raise snapshot.SnapshotError("Not a Mars recording")
+        magic, version = FILE_HEADER.unpack_from(self.__data)
+        if magic != MAGIC or version != VERSION:
+            raise snapshot.SnapshotError("Not a Mars recording, or an unsupported version")
+        self.runs = self.__index()
+        if not self.runs:
+            raise snapshot.SnapshotError("Recording holds no frames")
+        self.frames = self.runs[run]
+        self.__steps = [frame.step for frame in self.frames]
+        self.__keyframes = [i for i, frame in enumerate(self.frames) if frame.kind != DELTA]
+        self.__keyframe_steps = [self.frames[i].step for i in self.__keyframes]
+        self.engine: Optional[SimulationEngine] = None
+        self.__position = -1
+
+    def __index(self) -> List[List[Frame]]:
+        runs: List[List[Frame]] = []
+        data = self.__data
+        offset = FILE_HEADER.size
+        while offset + FRAME.size <= len(data):
+            kind, step, length = FRAME.unpack_from(data, offset)
+            offset += FRAME.size
+            if offset + length > len(data):
+                break  # a frame cut short by a crash; everything before it is usable
+            if kind == RUN_START:
+                runs.append([])
+            if runs:
+                runs[-1].append(Frame(kind, step, offset, length))
+            offset += length
+        return runs
+
+    @property
+    def first_step(self) -> int:
+        return self.frames[0].step
+
+    @property
+    def last_step(self) -> int:
+        return self.frames[-1].step
+
+    @property
+    def step(self) -> Optional[int]:
+        """The step the replay engine currently shows, or None before the first seek."""
+        return None if self.__position < 0 else self.frames[self.__position].step
+
+    def seek(self, step: int, engine: Optional[SimulationEngine] = None) -> SimulationEngine:
+        """
+        Bring the replay engine to the recorded state of ``step`` (clamped to the run).
+
+        Args:
+            step (int): Target step.
+            engine (SimulationEngine, optional): Engine to show the replay in, e.g. the GUI's;
+                it must have the recorded world size. A new engine is created otherwise.
+
+        Returns:
+            SimulationEngine: The engine now showing ``step``.
+        """
+        if engine is not None and engine is not self.engine:
+            self.engine = engine
+            self.__position = -1
+        step = max(self.first_step, min(step, self.last_step))
+        target = bisect_right(self.__steps, step) - 1
+        keyframe = self.__keyframes[bisect_right(self.__keyframe_steps, step) - 1]
+        if self.engine is None or self.__position < keyframe or self.__position > target:
+            self.__restore(keyframe)
+        for position in range(self.__position + 1, target + 1):
+            frame = self.frames[position]
+            if frame.kind == DELTA:
+                self.__apply(frame)
+            self.__position = position
+        self.engine._reset_hero_schedule()
+        self.engine._notify()
+        return self.engine
+
+    def __payload(self, frame: Frame) -> memoryview:
+        return memoryview(self.__data)[frame.offset:frame.offset + frame.length]
+
+    def __restore(self, position: int) -> None:
+        payload = self.__payload(self.frames[position])
+        if self.engine is None:
+            self.engine = snapshot.load(payload)
+        else:
+            snapshot.restore(self.engine, snapshot.decode(payload))
+        self.__position = position
+
+    def __apply(self, frame: Frame) -> None:
+        engine = self.engine
+        mars = engine.mars
+        width = mars.get_width()
+        payload = self.__payload(frame)
+        flags, n_status, n_agents, n_bridges = DELTA_HEADER.unpack_from(payload)
+        offset = DELTA_HEADER.size
+        engine.step_count = frame.step
+        engine.mission_failed = bool(flags & snapshot.MISSION_FAILED)
+        engine.mission_completed = bool(flags & snapshot.MISSION_COMPLETED)
+        mars.mission_failed = bool(flags & snapshot.MARS_MISSION_FAILED)
+        if flags & STATUS_CHANGED:
+            engine.status_reason = bytes(payload[offset:offset + n_status]).decode("utf-8")
+        offset += n_status
+
+        agents = _agents(engine)
+        moves = []
+        for record in AGENT_DELTA.iter_unpack(payload[offset:offset + n_agents * AGENT_DELTA.size]):
+            rid = record[0]
+            fields = record[1:9]
+            agent = agents[rid]
+            if agent is None:
+                agent = snapshot.create_agent(engine, fields)
+                agents[rid] = agent
+                if isinstance(agent, SilverSurfer):
+                    engine.surfer = agent
+                elif isinstance(agent, GalactusProjection):
+                    engine.galactus = agent
+            else:
+                snapshot.update_agent(engine, agent, fields)
+            moves.append((agent, record[9]))
+        offset += n_agents * AGENT_DELTA.size
+
+        # Vacate first, then occupy, so agents swapping or following each other never clash.
+        for agent, cell in moves:
+            current = mars.get_agent_location(agent)
+            if current is not None and mars.get_agent(current) is agent:
+                if cell < 0 or current.get_y() * width + current.get_x() != cell:
+                    mars.set_agent(None, current)
+        for agent, cell in moves:
+            if cell >= 0:
+                y, x = divmod(cell, width)
+                mars.set_agent(agent, mars.location(x, y))
+
+        for index, health, bridge_flags in BRIDGE_DELTA.iter_unpack(
+                payload[offset:offset + n_bridges * BRIDGE_DELTA.size]):
+            bridge = engine.bridges[index]
+            bridge.health = health
+            bridge.damaged = bool(bridge_flags & 1)
+            on_mars = bridge.world is mars
+            if on_mars and not bridge_flags & 2:
+                mars.remove_bridge(bridge.location)
+            elif bridge_flags & 2 and not on_mars:
+                mars.add_bridge(bridge)
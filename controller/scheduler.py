@@ -0,0 +1,84 @@
+"""
+Wake-time scheduling for agents that are often idle.
+
+An agent that has nothing to do declares the next step on which it could act (or None,
+for "only when something happens"), and is left out of the steps in between. Sleeping is
+only ever an optimisation: an agent is put to sleep solely when its act would have been
+a no-op until then, so waking one early is always safe and never changes a run.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class AgentScheduler:
+    """
+    Tracks which of ``count`` agents, identified by roster index, are due on each step.
+
+    Awake agents are due every step; sleeping ones are kept in a priority queue of wake
+    steps, so a step costs O(awake + woken) rather than O(count).
+    """
+
+    def __init__(self, count: int) -> None:
+        self.count = count
+        self.__awake = set(range(count))
+        # index -> wake step, None for agents that wait for an event.
+        self.__wake_steps: Dict[int, Optional[int]] = {}
+        # (wake step, index); entries whose step no longer matches __wake_steps are stale.
+        self.__queue: List[Tuple[int, int]] = []
+
+    def copy(self) -> AgentScheduler:
+        """Returns an independent scheduler in the same state."""
+        twin = AgentScheduler(0)
+        twin.count = self.count
+        twin.__awake = set(self.__awake)
+        twin.__wake_steps = dict(self.__wake_steps)
+        twin.__queue = list(self.__queue)
+        return twin
+
+    @property
+    def sleeping(self) -> int:
+        """Number of agents currently asleep."""
+        return len(self.__wake_steps)
+
+    def next_wake(self) -> Optional[int]:
+        """Returns the earliest step a sleeping agent is due to wake on, or None if none is timed."""
+        queue = self.__queue
+        wake_steps = self.__wake_steps
+        while queue and wake_steps.get(queue[0][1], -1) != queue[0][0]:
+            heapq.heappop(queue)
+        return queue[0][0] if queue else None
+
+    def due(self, step: int) -> Sequence[int]:
+        """Wake the agents whose time has come and return every awake index, in roster order."""
+        queue = self.__queue
+        wake_steps = self.__wake_steps
+        while queue and queue[0][0] <= step:
+            wake, index = heapq.heappop(queue)
+            if index in wake_steps and wake_steps[index] == wake:
+                del wake_steps[index]
+                self.__awake.add(index)
+        if not wake_steps:
+            return range(self.count)
+        return sorted(self.__awake)
+
+    def sleep(self, index: int, until: Optional[int]) -> None:
+        """Leave agent ``index`` out until step ``until``, or until woken if None."""
+        self.__awake.discard(index)
+        self.__wake_steps[index] = until
+        if until is not None:
+            heapq.heappush(self.__queue, (until, index))
+
+    def wake(self, index: int) -> None:
+        """Make agent ``index`` due again from the next call to ``due``."""
+        if index in self.__wake_steps:
+            del self.__wake_steps[index]
+            self.__awake.add(index)
+
+    def wake_all(self) -> None:
+        """Wake every agent."""
+        if self.__wake_steps:
+            self.__awake = set(range(self.count))
+            self.__wake_steps.clear()
+            self.__queue.clear()
@@ -1,37 +1,58 @@
-import random
-from model.location import Location
-from model.mars import Mars
-from model.bridge import Bridge
+import time
+from typing import Optional
+
+from controller.config import Scenario
+from controller.engine import SimulationEngine
+from controller.pacing import FRAME_INTERVAL_MS, AdaptiveStepBatch, FixedTimestepClock, RateMeter
+from controller.profiling import TickProfiler
+from controller.recorder import Recorder, Replay
 from model.hero import ReedRichards, SueStorm, JohnnyStorm, BenGrimm
 from model.silver_surfer import SilverSurfer
 from model.galactus import GalactusProjection
+from model.rock import Rock
+from model.alien import Alien
 from view.gui import Gui
 
 
-class Simulator:
-    """Core simulation + scheduling."""
+# Share of a turbo frame left for stepping once the last render's cost is taken out.
+MIN_STEP_BUDGET_MS = 5.0
+# Stepping time per event-loop slice while running to the end, so the window stays responsive.
+RUN_TO_END_SLICE_MS = 50.0
 
-    def __init__(self) -> None:
-        self._after_id = None
 
-        self.step_count = 0
-        self.mars = Mars()
+class Simulator(SimulationEngine):
+    """
+    Tk front-end: schedules engine steps on the GUI event loop and renders them.
 
-        self.mission_failed = False
-        self.mission_completed = False
-        self.status_reason: str = ""
+    Three pacing modes are supported:
+      * normal: steps on fixed wall-clock deadlines at ``simulation_speed`` steps/s,
+        catching up on missed deadlines and rendering once per tick;
+      * turbo: an adaptive batch of steps per frame, rendered at a fixed FRAME_RATE;
+      * run to end: steps in time slices with rendering suspended until the mission ends.
 
-        self.heroes: list = []
-        self.surfer: SilverSurfer | None = None
-        self.galactus: GalactusProjection | None = None
+    Live steps can be recorded to a file, and a recording can be replayed in the same
+    window: replay advances through recorded steps at the normal-mode rate, or jumps to
+    any step, without simulating anything.
+    """
 
-        self.bridges: list[Bridge] = []
+    def __init__(self, seed: Optional[int] = None, scenario: Optional[Scenario] = None) -> None:
+        self._after_id = None
 
-        self._generate_initial_world()
+        super().__init__(seed=seed, scenario=scenario)
 
         self.is_running = False
         self.paused = False
         self.simulation_speed = 5.0
+        self.turbo = False
+        self.running_to_end = False
+        self.turbo_batch = AdaptiveStepBatch()
+        self.step_clock = FixedTimestepClock(self.simulation_speed)
+        self.rate_meter = RateMeter()
+        self._render_suspended = False
+        self._last_render_ms = 0.0
+        self.recorder: Optional[Recorder] = None
+        self.replay: Optional[Replay] = None
+        self.profiler = TickProfiler(enabled=False)
 
         self.agent_colours = {
             ReedRichards:       "#60a5fa",
@@ -40,137 +61,180 @@ class Simulator:
             BenGrimm:           "#e11d48",
             SilverSurfer:       "#d1d5db",
             GalactusProjection: "#a78bfa",
+            Rock:               "#57534e",
+            Alien:              "#4ade80",
             None:               "#0b1220",
         }
 
         # GUI
         self.gui = Gui(self.mars, self.agent_colours, simulator=self)
+        self.add_observer(self._on_engine_changed)
         self.gui.render()
 
-    def _generate_initial_world(self) -> None:
-        width  = self.mars.get_width()
-        height = self.mars.get_height()
-
-        centre_x = width // 2
-        centre_y = height // 2
-
-        hero_offsets = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        hero_classes = [ReedRichards, SueStorm, JohnnyStorm, BenGrimm]
-        for (dx, dy), cls in zip(hero_offsets, hero_classes):
-            hx = (centre_x + dx) % width
-            hy = (centre_y + dy) % height
-            loc = Location(hx, hy)
-            hero = cls(loc)
-            self.heroes.append(hero)
-            self.mars.set_agent(hero, loc)
-
-        self.bridges.clear()
-        forbidden = {(centre_x, centre_y)} | { (h.get_location().get_x(), h.get_location().get_y()) for h in self.heroes }
-        target_sites = 7
-        while len(self.bridges) < target_sites:
-            x = random.randint(0, width - 1)
-            y = random.randint(0, height - 1)
-            if (x, y) in forbidden:
-                continue
-            loc = Location(x, y)
-            if self.mars.get_agent(loc) is None:
-                br = Bridge(loc)
-                self.bridges.append(br)
-                self.mars.add_bridge(br)
-
-        self.franklin_location = Location(0, 0)
-        self.surfer_spawn_step = 12
-        self.galactus_spawn_step = 24
+    def _on_engine_changed(self, _engine: SimulationEngine) -> None:
+        if not self._render_suspended:
+            self._render()
+
+    def _render(self) -> None:
+        if self.gui.is_closed():
+            return
+        started = time.perf_counter()
+        self.gui.render()
+        self._last_render_ms = (time.perf_counter() - started) * 1000.0
 
     def run(self) -> None:
         #Start the simulation
         self.is_running = True
         self.paused = False
+        self.step_clock.restart()
         self.schedule_next_step()
 
-    def schedule_next_step(self) -> None:
-
-        delay_ms = max(1, int(1000 / max(0.1, self.simulation_speed)))
+    def set_speed(self, steps_per_second: float) -> None:
+        """Change the target rate of normal mode without losing the current deadline phase."""
+        self.simulation_speed = steps_per_second
+        self.step_clock.set_rate(steps_per_second)
+
+    def set_turbo(self, enabled: bool) -> None:
+        """Switch between one rendered step per tick and batched steps at a fixed frame rate."""
+        self.turbo = enabled
+        self.turbo_batch = AdaptiveStepBatch()
+        self.step_clock.restart()
+
+    def run_to_end(self) -> None:
+        """Simulate to completion with rendering suspended, then render the final state once."""
+        if self.replay is not None:
+            self.seek_replay(self.replay.last_step)
+            return
+        if self.is_done():
+            return
+        self.running_to_end = True
+        self.paused = False
+        if not self.is_running:
+            self.run()
+
+    def start_recording(self, path: str, keyframe_interval: int = 100) -> None:
+        """Append every following live step to a recording file."""
+        self.stop_recording()
+        self.recorder = Recorder(self, path, keyframe_interval)
+
+    def stop_recording(self) -> None:
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def start_replay(self, path: str) -> None:
+        """
+        Show a recording instead of the live simulation, starting at its first step.
+
+        Recording stops, since replayed steps are not new. The live run is abandoned;
+        ``reset`` starts a fresh one.
+
+        Raises:
+            SnapshotError: If the file is not a recording or its world size differs.
+        """
+        replay = Replay(path)
+        self.stop_recording()
+        replay.seek(replay.first_step, engine=self)
+        self.running_to_end = False
+        self.replay = replay
+        self.rate_meter.reset()
+        if self.is_running:
+            self.step_clock.restart()
+        else:
+            self.run()
+
+    def seek_replay(self, step: int) -> None:
+        """Jump the replay to a recorded step."""
+        if self.replay is not None:
+            self.replay.seek(step, engine=self)
+            if not self.is_running:
+                self.run()
+
+    def schedule_next_step(self, delay_ms: Optional[float] = None) -> None:
+        if delay_ms is None:
+            delay_ms = self.step_clock.delay_ms()
         if not self.gui.is_closed() and self.is_running:
-            self._after_id = self.gui.after(delay_ms, self._tick)
+            self._after_id = self.gui.after(max(1, int(delay_ms)), self._tick)
 
     def _tick(self) -> None:
         if self.gui.is_closed() or not self.is_running:
             return
 
         if self.paused:
+            self.step_clock.restart()
             self.schedule_next_step()
             return
 
-        self.step_count += 1
-        self._update()
-        self.gui.render()
+        if self.replay is not None:
+            self._replay_tick()
+            return
+        if self.running_to_end:
+            self._run_slice()
+            return
+        if self.turbo:
+            self._turbo_frame()
+            return
 
-        if self.mission_failed or self.mission_completed:
+        due = self.step_clock.due()
+        if due == 1:
+            # A single on-time step renders through the observer like any other change.
+            self.rate_meter.record(self.run_steps(1))
+        elif due > 1:
+            self.rate_meter.record(self._run_batch(due))
+            self._render()
+        if self.is_done():
             self.is_running = False
             return
         self.schedule_next_step()
 
+    def _replay_tick(self) -> None:
+        replay = self.replay
+        due = self.step_clock.due()
+        if due:
+            before = replay.step
+            replay.seek(before + due)
+            self.rate_meter.record(replay.step - before)
+        if replay.step >= replay.last_step:
+            self.is_running = False
+            return
+        self.schedule_next_step()
 
-    def _update(self) -> None:
-        # Spawn Silver Surfer
-        if self.surfer is None and self.step_count >= self.surfer_spawn_step:
-            while True:
-                x = random.randint(0, self.mars.get_width() - 1)
-                y = random.randint(0, self.mars.get_height() - 1)
-                loc = Location(x, y)
-                if self.mars.get_agent(loc) is None:
-                    self.surfer = SilverSurfer(loc)
-                    self.mars.set_agent(self.surfer, loc)
-                    break
-
-        # Spawn Galactus
-        if self.galactus is None and self.step_count >= self.galactus_spawn_step:
-            loc = Location(self.mars.get_width() - 1, self.mars.get_height() - 1)
-            self.galactus = GalactusProjection(loc, self.franklin_location)
-            self.mars.set_agent(self.galactus, loc)
-
-        # Heroes action
-        for hero in list(self.heroes):
-            hero.act(self.mars)
-
-        # Energy sharing
-        width  = self.mars.get_width()
-        height = self.mars.get_height()
-        for a in self.heroes:
-            for b in self.heroes:
-                if a is b:
-                    continue
-                dx = abs(a.get_location().get_x() - b.get_location().get_x())
-                dy = abs(a.get_location().get_y() - b.get_location().get_y())
-                dx = min(dx, width - dx)
-                dy = min(dy, height - dy)
-                if dx + dy == 1 and a.energy - b.energy >= 20 and a.energy > 20 and b.energy < b.max_energy:
-                    give = min(10, a.energy - b.energy)
-                    a.energy -= give
-                    b.energy = min(b.max_energy, b.energy + give)
-
-        if self.surfer:
-            self.surfer.act(self.mars)
-        if self.galactus:
-            self.galactus.act(self.mars)
-
-        if not self.mission_failed:
-            if self.bridges and all((not br.damaged) and br.is_complete() for br in self.bridges):
-                self.mission_completed = True
-                self.status_reason = "All bridges complete and undamaged"
-
-        if not self.mission_completed and hasattr(self.mars, "mission_failed") and self.mars.mission_failed:
-            # Try to infer the cause for a friendly message
-            if self.galactus and self._is_at(self.galactus.get_location(), self.franklin_location):
-                self.status_reason = "Galactus reached Franklin"
-            else:
-                self.status_reason = "Environment signaled mission failure"
-            self.mission_failed = True
-
-    @staticmethod
-    def _is_at(a: Location, b: Location) -> bool:
-        return a.get_x() == b.get_x() and a.get_y() == b.get_y()
+    def _run_batch(self, steps: int) -> int:
+        """Run up to ``steps`` steps without rendering any of them."""
+        self._render_suspended = True
+        try:
+            return self.run_steps(steps)
+        finally:
+            self._render_suspended = False
+
+    def _turbo_frame(self) -> None:
+        frame_started = time.perf_counter()
+        budget_ms = max(MIN_STEP_BUDGET_MS, FRAME_INTERVAL_MS - self._last_render_ms)
+        executed = self._run_batch(self.turbo_batch.steps)
+        self.rate_meter.record(executed)
+        self.turbo_batch.record(executed, time.perf_counter() - frame_started, budget_ms)
+        self._render()
+        if self.is_done():
+            self.is_running = False
+            return
+        spent_ms = (time.perf_counter() - frame_started) * 1000.0
+        self.schedule_next_step(FRAME_INTERVAL_MS - spent_ms)
+
+    def _run_slice(self) -> None:
+        deadline = time.perf_counter() + RUN_TO_END_SLICE_MS / 1000.0
+        batch = AdaptiveStepBatch(initial=16)
+        while not self.is_done() and time.perf_counter() < deadline:
+            started = time.perf_counter()
+            executed = self._run_batch(batch.steps)
+            self.rate_meter.record(executed)
+            batch.record(executed, time.perf_counter() - started, RUN_TO_END_SLICE_MS / 4)
+        if self.is_done():
+            self.running_to_end = False
+            self.is_running = False
+            self._render()
+            return
+        self.gui.update_run_to_end_progress()
+        self.schedule_next_step(1)
 
     def reset(self) -> None:
         if getattr(self, "_after_id", None):
@@ -180,26 +244,14 @@ class Simulator:
                 pass
             self._after_id = None
 
-        self.mars.clear()
-        if hasattr(self.mars, "mission_failed"):
-            self.mars.mission_failed = False
-
-        self.step_count = 0
-        self.mission_failed = False
-        self.mission_completed = False
-        self.status_reason = ""
-
-        self.heroes.clear()
-        self.bridges.clear()
-        self.surfer = None
-        self.galactus = None
-
-        random.seed()
-
-        self._generate_initial_world()
+        self.running_to_end = False
+        self.replay = None
+        self.turbo_batch = AdaptiveStepBatch()
+        self.rate_meter.reset()
+        super().reset()
         self.is_running = True
         self.paused = False
-        self.gui.render()
+        self.step_clock.restart()
         self.schedule_next_step()
 
 
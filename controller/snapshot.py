@@ -0,0 +1,416 @@
+"""
+Compact binary snapshots of a running simulation.
+
+A snapshot is a fixed little-endian header followed by packed sections:
+
+    header            magic, format version, world size, counters, flags, section sizes
+    roster            uint8 role code per hero in the scenario roster
+    agents            AGENT_RECORD per agent (heroes in roster order, then Surfer, Galactus)
+    occupancy         int32 cell index and int32 agent index per occupied grid cell
+    bridges           BRIDGE_RECORD per bridge, in the engine's order
+    bridge order      int32 bridge index per bridge registered on Mars, in Mars's order
+    rng               uint32 Mersenne Twister state words
+    text              status reason and seed, UTF-8
+    free cells        int32 cell index per agent-free cell, in Mars's sampling order
+    obstacles         uint8 obstacle kind per cell, or empty for an open world
+
+Every section starts on an 8-byte boundary, so readers can cast the packed arrays
+straight out of a memory-mapped file without copying them.
+
+The free-cell order decides where random spawns land, so it is saved while a spawn is
+still to come (the Surfer has not arrived); afterwards nothing draws from it and the
+section is left empty.
+
+    snapshot.save(engine, "mid_game.snap")
+    engine = snapshot.load("mid_game.snap")              # exact continuation
+    engine = snapshot.load("mid_game.snap", reseed=7)    # same state, new random future
+"""
+from __future__ import annotations
+
+import mmap
+import struct
+import sys
+from array import array
+from typing import List, NamedTuple, Optional, Union
+
+from controller.config import Scenario
+from controller.engine import SimulationEngine
+from model.bridge import Bridge
+from model.galactus import GalactusProjection
+from model.hero import Hero, ReedRichards, SueStorm, JohnnyStorm, BenGrimm
+from model.hero_population import HeroPopulation
+from model.obstacles import ObstacleMap
+from model.silver_surfer import SilverSurfer
+
+MAGIC = b"MARSSNAP"
+VERSION = 1
+
+# Type code -> agent class. Codes are part of the file format: only ever append.
+AGENT_TYPES = (Hero, ReedRichards, SueStorm, JohnnyStorm, BenGrimm, SilverSurfer, GalactusProjection)
+TYPE_CODES = {cls: code for code, cls in enumerate(AGENT_TYPES)}
+STORAGE_CODES = ("objects", "arrays")
+
+HEADER = struct.Struct("<8sHBB" "II" "Q" "III" "ii" "IIIII" "IBxxxd" "II" "Ixxxx" "ddIxxxx")
+# type, flags, x, y, energy, then three type-specific ints:
+#   hero:     flags bit 0 = recharging
+#   surfer:   flags bit 0 = retreating; a, b = last target cell (-1 if none); c = cooldown
+#   galactus: a = step counter
+AGENT_RECORD = struct.Struct("<BBxxiiiiii")
+# x, y, health, max_health, flags (bit 0 damaged)
+BRIDGE_RECORD = struct.Struct("<iiiiBxxx")
+
+MISSION_FAILED = 1
+MISSION_COMPLETED = 2
+MARS_MISSION_FAILED = 4
+ARRAY_BACKED = 8
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+class SnapshotError(ValueError):
+    """Raised for data that is not a snapshot or uses an unsupported format version."""
+
+
+class Snapshot(NamedTuple):
+    """A decoded snapshot. Array sections are zero-copy views when read from a mapped file."""
+
+    version: int
+    scenario: Scenario
+    array_backed: bool
+    step_count: int
+    seed: int
+    mission_failed: bool
+    mission_completed: bool
+    mars_mission_failed: bool
+    status_reason: str
+    franklin: tuple
+    agents: memoryview
+    occupied_cells: memoryview
+    occupied_agents: memoryview
+    bridges: memoryview
+    bridge_order: memoryview
+    rng_state: tuple
+    free_cells: Optional[memoryview] = None
+    obstacles: Optional[bytes] = None
+
+
+def _pad(length: int) -> int:
+    return -length % 8
+
+
+def _ints(chunk: memoryview, code: str) -> Union[memoryview, array]:
+    # Sections are little-endian; only big-endian hosts pay for a converted copy.
+    if sys.byteorder == "little":
+        return chunk.cast(code)
+    values = array(code, bytes(chunk))
+    values.byteswap()
+    return values
+
+
+def agent_fields(agent) -> tuple:
+    """Returns an agent's AGENT_RECORD fields: type, flags, x, y, energy and three extras."""
+    location = agent.get_location()
+    if isinstance(agent, SilverSurfer):
+        target = agent.last_target_xy or (-1, -1)
+        return (TYPE_CODES[SilverSurfer], int(agent.retreating), location.get_x(), location.get_y(),
+                agent.energy, target[0], target[1], agent.target_cooldown)
+    if isinstance(agent, GalactusProjection):
+        return (TYPE_CODES[GalactusProjection], 0, location.get_x(), location.get_y(), 0,
+                agent._step_counter, 0, 0)
+    return (TYPE_CODES[getattr(agent, "role", type(agent))], int(agent.is_recharging),
+            location.get_x(), location.get_y(), agent.energy, 0, 0, 0)
+
+
+def create_agent(engine: SimulationEngine, fields: tuple):
+    """Builds a Hero, Surfer or Galactus object from AGENT_RECORD fields."""
+    cls = AGENT_TYPES[fields[0]]
+    location = engine.mars.location(fields[2], fields[3])
+    if cls is SilverSurfer:
+        agent = SilverSurfer(location, rng=engine.rng)
+    elif cls is GalactusProjection:
+        agent = GalactusProjection(location, engine.franklin_location)
+    else:
+        agent = cls(location)
+    update_agent(engine, agent, fields)
+    return agent
+
+
+def update_agent(engine: SimulationEngine, agent, fields: tuple) -> None:
+    """Overwrites an agent's location and state (but not its grid cell) from AGENT_RECORD fields."""
+    _code, flags, x, y, energy, a, b, c = fields
+    agent.set_location(engine.mars.location(x, y))
+    if isinstance(agent, SilverSurfer):
+        agent.energy = energy
+        agent.retreating = bool(flags & 1)
+        agent.last_target_xy = (a, b) if a >= 0 else None
+        agent.target_cooldown = c
+    elif isinstance(agent, GalactusProjection):
+        agent._step_counter = a
+    else:
+        agent.energy = energy
+        if hasattr(agent, "population"):
+            agent.population.recharging[agent.index] = flags & 1
+        else:
+            agent.is_recharging = bool(flags & 1)
+
+
+def encode(engine: SimulationEngine) -> bytes:
+    """
+    Pack an engine's complete state into snapshot bytes.
+
+    Args:
+        engine (SimulationEngine): The engine to capture; it is not modified.
+    """
+    mars = engine.mars
+    width = mars.get_width()
+    height = mars.get_height()
+    scenario = engine.scenario
+    roster = bytes(TYPE_CODES[cls] for cls in (scenario.heroes or ()))
+
+    agents: List = list(engine.heroes)
+    if engine.surfer is not None:
+        agents.append(engine.surfer)
+    if engine.galactus is not None:
+        agents.append(engine.galactus)
+    agent_index = {id(agent): i for i, agent in enumerate(agents)}
+
+    packed_agents = bytearray()
+    for agent in agents:
+        packed_agents += AGENT_RECORD.pack(*agent_fields(agent))
+
+    cells = []
+    occupants = []
+    for agent in agents:
+        location = mars.get_agent_location(agent)
+        if location is not None and mars.get_agent(location) is agent:
+            cells.append(location.get_y() * width + location.get_x())
+            occupants.append(agent_index[id(agent)])
+
+    bridge_index = {id(bridge): i for i, bridge in enumerate(engine.bridges)}
+    packed_bridges = bytearray()
+    for bridge in engine.bridges:
+        packed_bridges += BRIDGE_RECORD.pack(bridge.location.get_x(), bridge.location.get_y(),
+                                             bridge.health, bridge.max_health, int(bridge.damaged))
+    order = [bridge_index[id(bridge)] for bridge in mars.get_all_bridges()]
+
+    free = mars.free_cell_order() if engine.surfer is None else array('i')
+    if sys.byteorder != "little":
+        free.byteswap()
+    obstacles = mars.obstacles.kinds if mars.obstacles.count else b""
+
+    rng_version, words, gauss = engine.rng.getstate()
+    status = engine.status_reason.encode("utf-8")
+    seed = str(engine.seed).encode("ascii")
+
+    flags = ((MISSION_FAILED if engine.mission_failed else 0)
+             | (MISSION_COMPLETED if engine.mission_completed else 0)
+             | (MARS_MISSION_FAILED if getattr(mars, "mission_failed", False) else 0)
+             | (ARRAY_BACKED if mars.arrays is not None else 0))
+    franklin = engine.franklin_location
+    header = HEADER.pack(
+        MAGIC, VERSION, STORAGE_CODES.index(scenario.hero_storage), flags,
+        width, height, engine.step_count,
+        scenario.bridge_count, engine.surfer_spawn_step, engine.galactus_spawn_step,
+        franklin.get_x(), franklin.get_y(),
+        len(roster), len(agents), len(cells), len(engine.bridges), len(order),
+        len(words), gauss is not None, gauss or 0.0,
+        len(status), len(seed), len(free),
+        scenario.rock_probability, scenario.alien_probability, len(obstacles),
+    )
+    if rng_version != 3:
+        raise SnapshotError(f"Unsupported random state version {rng_version}")
+
+    out = bytearray(header)
+    for section in (roster, packed_agents, struct.pack(f"<{len(cells)}i", *cells),
+                    struct.pack(f"<{len(occupants)}i", *occupants), packed_bridges,
+                    struct.pack(f"<{len(order)}i", *order), struct.pack(f"<{len(words)}I", *words),
+                    status + seed, free.tobytes(), obstacles):
+        out += b"\0" * _pad(len(out))
+        out += section
+    return bytes(out)
+
+
+def decode(data: Buffer) -> Snapshot:
+    """
+    Parse snapshot bytes; array sections are returned as views into ``data``.
+
+    Raises:
+        SnapshotError: If the data is not a snapshot or has an unknown version.
+    """
+    view = memoryview(data)
+    if len(view) < HEADER.size or bytes(view[:8]) != MAGIC:
+        raise SnapshotError("Not a Mars snapshot")
+    fields = HEADER.unpack_from(view)
+    if fields[1] != VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {fields[1]}")
+    offset = HEADER.size
+    (_magic, version, storage, flags, width, height, step_count,
+     bridge_count, surfer_spawn, galactus_spawn, franklin_x, franklin_y,
+     n_roster, n_agents, n_cells, n_bridges, n_order,
+     n_words, has_gauss, gauss, n_status, n_seed, n_free,
+     rock_probability, alien_probability, n_obstacles) = fields
+
+    def section(length: int) -> memoryview:
+        nonlocal offset
+        offset += _pad(offset)
+        chunk = view[offset:offset + length]
+        offset += length
+        return chunk
+
+    roster = bytes(section(n_roster))
+    agents = section(n_agents * AGENT_RECORD.size)
+    cells = _ints(section(4 * n_cells), "i")
+    occupants = _ints(section(4 * n_cells), "i")
+    bridges = section(n_bridges * BRIDGE_RECORD.size)
+    order = _ints(section(4 * n_order), "i")
+    words = tuple(_ints(section(4 * n_words), "I"))
+    text = bytes(section(n_status + n_seed))
+    free = _ints(section(4 * n_free), "i") if n_free else None
+    obstacles = bytes(section(n_obstacles)) if n_obstacles else None
+
+    scenario = Scenario(width=width, height=height, bridge_count=bridge_count,
+                        surfer_spawn_step=surfer_spawn, galactus_spawn_step=galactus_spawn,
+                        heroes=tuple(AGENT_TYPES[code] for code in roster) or None,
+                        hero_storage=STORAGE_CODES[storage],
+                        rock_probability=rock_probability, alien_probability=alien_probability)
+    return Snapshot(
+        version=version,
+        scenario=scenario,
+        array_backed=bool(flags & ARRAY_BACKED),
+        step_count=step_count,
+        seed=int(text[n_status:].decode("ascii")),
+        mission_failed=bool(flags & MISSION_FAILED),
+        mission_completed=bool(flags & MISSION_COMPLETED),
+        mars_mission_failed=bool(flags & MARS_MISSION_FAILED),
+        status_reason=text[:n_status].decode("utf-8"),
+        franklin=(franklin_x, franklin_y),
+        agents=agents,
+        occupied_cells=cells,
+        occupied_agents=occupants,
+        bridges=bridges,
+        bridge_order=order,
+        rng_state=(3, words, gauss if has_gauss else None),
+        free_cells=free,
+        obstacles=obstacles,
+    )
+
+
+def restore(engine: SimulationEngine, snapshot: Snapshot) -> None:
+    """
+    Replace an engine's state with a snapshot's, in place, then notify its observers.
+
+    The engine keeps its Mars instance (views such as the GUI hold on to it), so the
+    snapshot must have the same world size.
+
+    Raises:
+        SnapshotError: If the world sizes differ.
+    """
+    mars = engine.mars
+    scenario = snapshot.scenario
+    if (mars.get_width(), mars.get_height()) != (scenario.width, scenario.height):
+        raise SnapshotError(f"Snapshot world is {scenario.width}x{scenario.height}, "
+                            f"engine world is {mars.get_width()}x{mars.get_height()}")
+    if mars.get_all_bridges() or mars.count_by_type() or mars.obstacles.count:
+        mars.clear()
+    if snapshot.obstacles is not None:
+        try:
+            mars.set_obstacles(ObstacleMap(scenario.width, scenario.height, snapshot.obstacles))
+        except ValueError as error:
+            raise SnapshotError(f"Corrupt obstacle section: {error}") from None
+    mars.mission_failed = snapshot.mars_mission_failed
+
+    engine.scenario = scenario
+    engine.seed = snapshot.seed
+    engine.rng.setstate(snapshot.rng_state)
+    engine.step_count = snapshot.step_count
+    engine.mission_failed = snapshot.mission_failed
+    engine.mission_completed = snapshot.mission_completed
+    engine.status_reason = snapshot.status_reason
+    engine.franklin_location = mars.location(*snapshot.franklin)
+    engine.surfer_spawn_step = scenario.surfer_spawn_step
+    engine.galactus_spawn_step = scenario.galactus_spawn_step
+    engine.heroes.clear()
+    engine.hero_population = None
+    engine.surfer = None
+    engine.galactus = None
+
+    records = list(AGENT_RECORD.iter_unpack(snapshot.agents))
+    hero_records = [record for record in records if issubclass(AGENT_TYPES[record[0]], Hero)]
+    agents: List = []
+    if scenario.hero_storage == "arrays":
+        population = HeroPopulation(mars, [AGENT_TYPES[r[0]] for r in hero_records],
+                                    [(r[2], r[3]) for r in hero_records], place=False)
+        for i, record in enumerate(hero_records):
+            population.energy[i] = record[4]
+            population.recharging[i] = record[1] & 1
+        engine.hero_population = population
+        agents.extend(population.handles)
+    for record in records[len(agents):]:
+        agent = create_agent(engine, record)
+        if isinstance(agent, SilverSurfer):
+            engine.surfer = agent
+        elif isinstance(agent, GalactusProjection):
+            engine.galactus = agent
+        agents.append(agent)
+    engine.heroes.extend(agents[:len(hero_records)])
+
+    for cell, index in zip(snapshot.occupied_cells, snapshot.occupied_agents):
+        y, x = divmod(cell, scenario.width)
+        mars.set_agent(agents[index], mars.location(x, y))
+
+    bridges = []
+    for x, y, health, max_health, flags in BRIDGE_RECORD.iter_unpack(snapshot.bridges):
+        bridge = Bridge(mars.location(x, y), max_health)
+        bridge.health = health
+        bridge.damaged = bool(flags & 1)
+        bridges.append(bridge)
+    engine.bridges = bridges
+    for index in snapshot.bridge_order:
+        mars.add_bridge(bridges[index])
+    if snapshot.free_cells is not None:
+        try:
+            mars.set_free_cell_order(snapshot.free_cells)
+        except ValueError as error:
+            raise SnapshotError(f"Corrupt free-cell section: {error}") from None
+
+    engine._reset_hero_schedule()
+    engine._notify()
+
+
+def load(source: Union[str, Buffer], reseed: Optional[int] = None) -> SimulationEngine:
+    """
+    Build a new engine from a snapshot file path or snapshot bytes.
+
+    Args:
+        source (str | bytes): Path of a snapshot file (memory-mapped while loading), or data.
+        reseed (int, optional): Reseed the restored RNG, so runs started from the same
+            snapshot take different random futures; the restored seed is kept otherwise.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _load(decode(mapped), reseed)
+    return _load(decode(source), reseed)
+
+
+def _load(snapshot: Snapshot, reseed: Optional[int]) -> SimulationEngine:
+    engine = SimulationEngine.__new__(SimulationEngine)
+    engine._setup(snapshot.seed, snapshot.array_backed, snapshot.scenario)
+    restore(engine, snapshot)
+    snapshot = None  # drop the views before a mapped file is closed
+    if reseed is not None:
+        engine.seed = reseed
+        engine.rng.seed(reseed)
+    return engine
+
+
+def save(engine: SimulationEngine, path: str) -> int:
+    """
+    Write an engine's snapshot to ``path``.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    data = encode(engine)
+    with open(path, "wb") as handle:
+        handle.write(data)
+    return len(data)
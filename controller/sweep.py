@@ -0,0 +1,374 @@
+"""
+Parameter sweeps: success rates over a grid or random sample of model parameters.
+
+A parameter is either a Scenario field (``surfer_spawn_step``, ``galactus_spawn_step``,
+...) or a tunable class attribute written ``Class.attribute`` (``Hero.repair_rate``,
+``Hero.recharge_amount``, ``Hero.retreat_energy``, ``SilverSurfer.moves_per_step``,
+``SilverSurfer.retarget_cooldown``, ...). Each point runs seeds in a process pool until
+the 95% confidence interval of its success rate is narrow enough, and every finished run
+is cached on disk under the point, the seed and a hash of the model source, so running a
+sweep again (or a larger one) only simulates what is new.
+
+    points = grid({"Hero.repair_rate": [5, 10, 15], "surfer_spawn_step": [6, 12]})
+    for point in sweep(points, cache_dir=".sweep_cache"):
+        print(point.params, point.success_rate, point.low, point.high)
+
+    python -m controller.sweep --param Hero.repair_rate=5,10,15 --param surfer_spawn_step=6:18 --samples 12
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from controller.batch import RunResult, summarise
+from controller.config import Scenario
+from controller.engine import SimulationEngine
+from model.galactus import GalactusProjection
+from model.hero import Hero, ReedRichards, SueStorm, JohnnyStorm, BenGrimm
+from model.silver_surfer import SilverSurfer
+
+# Classes whose numeric class attributes may be swept.
+TUNABLE_CLASSES = {cls.__name__: cls for cls in (Hero, ReedRichards, SueStorm, JohnnyStorm, BenGrimm,
+                                                  SilverSurfer, GalactusProjection)}
+# Sources that decide a run's outcome; a change to any of them invalidates the cache.
+# Besides every model module, that is the controller modules run_point's engine and
+# summarise import, followed transitively (see controller_sources).
+CODE_DIRS = ("model",)
+CODE_ROOTS = ("controller.engine", "controller.batch")
+
+Params = Dict[str, Union[int, float]]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MISSING = object()
+
+
+class PointResult(NamedTuple):
+    """Outcome counts of one parameter point with a Wilson 95% interval on its success rate."""
+
+    params: Params
+    runs: int
+    completed: int
+    success_rate: float
+    low: float
+    high: float
+
+
+def controller_sources(roots: Sequence[str] = CODE_ROOTS) -> List[str]:
+    """
+    Returns the paths, relative to the project root, of the ``roots`` controller modules
+    and every controller module they import, directly or not.
+
+    Imports are read from the source rather than from sys.modules, so the answer does not
+    depend on what the calling program happened to import first.
+    """
+    seen = set()
+    pending = list(roots)
+    while pending:
+        module = pending.pop()
+        if module in seen:
+            continue
+        seen.add(module)
+        with open(os.path.join(ROOT, *module.split(".")) + ".py", "rb") as handle:
+            tree = ast.parse(handle.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module == "controller":
+                names = ["controller." + alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                names = [node.module]
+            else:
+                continue
+            pending.extend(name for name in names if name.startswith("controller."))
+    return sorted(os.path.join(*module.split(".")) + ".py" for module in seen)
+
+
+def code_version() -> str:
+    """Short hash of the model source, so cached runs never outlive the code that made them."""
+    digest = hashlib.sha256()
+    paths = [os.path.join(folder, name) for folder in CODE_DIRS
+             for name in sorted(os.listdir(os.path.join(ROOT, folder))) if name.endswith(".py")]
+    for path in sorted(paths) + controller_sources():
+        digest.update(path.encode())
+        with open(os.path.join(ROOT, path), "rb") as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()[:16]
+
+
+def validate(params: Params) -> None:
+    """
+    Raises:
+        ValueError: If a name is neither a Scenario field nor a tunable class attribute.
+    """
+    for name in params:
+        if "." not in name:
+            if name not in Scenario._fields or name in ("heroes", "hero_storage"):
+                raise ValueError(f"{name} is not a numeric Scenario field")
+            continue
+        owner, attribute = name.split(".", 1)
+        cls = TUNABLE_CLASSES.get(owner)
+        if cls is None or not isinstance(getattr(cls, attribute, None), (int, float)) \
+                or isinstance(getattr(cls, attribute), bool):
+            raise ValueError(f"{name} is not a tunable class attribute")
+
+
+@contextmanager
+def overridden(params: Params) -> Iterator[Dict[str, Union[int, float]]]:
+    """
+    Apply the class-attribute parameters for the duration of a run.
+
+    Runs within one process are sequential, so the classes are patched and restored
+    around each run rather than threaded through every agent.
+
+    Yields:
+        dict: The Scenario-field parameters, to pass to Scenario._replace.
+    """
+    saved = []
+    scenario_fields = {}
+    try:
+        for name, value in params.items():
+            if "." not in name:
+                scenario_fields[name] = value
+                continue
+            owner, attribute = name.split(".", 1)
+            cls = TUNABLE_CLASSES[owner]
+            saved.append((cls, attribute, cls.__dict__.get(attribute, _MISSING)))
+            setattr(cls, attribute, value)
+        yield scenario_fields
+    finally:
+        for cls, attribute, value in reversed(saved):
+            if value is _MISSING:
+                delattr(cls, attribute)
+            else:
+                setattr(cls, attribute, value)
+
+
+def run_point(params: Params, seeds: Sequence[int], max_steps: int = 5000,
+              scenario: Optional[Scenario] = None) -> List[RunResult]:
+    """Run one simulation per seed with ``params`` applied and summarise each."""
+    results = []
+    with overridden(params) as scenario_fields:
+        world = (scenario or Scenario())._replace(**scenario_fields)
+        for seed in seeds:
+            engine = SimulationEngine(seed=seed, scenario=world)
+            engine.run_until_done(max_steps)
+            results.append(summarise(engine, seed))
+    return results
+
+
+class ResultCache:
+    """
+    Finished runs on disk: one append-only JSON-lines file per parameter point.
+
+    Files live under ``directory/<code version>/``, named by a hash of the point, the step
+    budget and the base scenario, and hold one line per seed.
+    """
+
+    def __init__(self, directory: str, version: Optional[str] = None) -> None:
+        self.directory = os.path.join(directory, version or code_version())
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __path(self, params: Params, max_steps: int, scenario: Scenario) -> str:
+        key = json.dumps({"params": params, "max_steps": max_steps,
+                          "scenario": [repr(value) for value in scenario]}, sort_keys=True)
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest()[:24] + ".jsonl")
+
+    def load(self, params: Params, max_steps: int, scenario: Scenario) -> Dict[int, RunResult]:
+        """Returns the cached runs of a point by seed (empty if none)."""
+        results: Dict[int, RunResult] = {}
+        try:
+            with open(self.__path(params, max_steps, scenario), encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        result = RunResult(*json.loads(line))
+                    except (ValueError, TypeError):
+                        continue  # a line cut short by an interrupted run
+                    results[result.seed] = result
+        except FileNotFoundError:
+            pass
+        return results
+
+    def store(self, params: Params, max_steps: int, scenario: Scenario, results: Sequence[RunResult]) -> None:
+        with open(self.__path(params, max_steps, scenario), "a", encoding="utf-8") as handle:
+            for result in results:
+                handle.write(json.dumps(list(result)) + "\n")
+
+
+def wilson_interval(successes: int, runs: int, z: float = 1.96) -> tuple:
+    """Returns the (low, high) Wilson score interval of a success rate; (0, 1) with no runs."""
+    if runs == 0:
+        return 0.0, 1.0
+    p = successes / runs
+    denominator = 1 + z * z / runs
+    centre = (p + z * z / (2 * runs)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / runs + z * z / (4 * runs * runs)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def grid(values: Dict[str, Sequence]) -> List[Params]:
+    """Every combination of the given values, in order."""
+    names = list(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*(values[n] for n in names))]
+
+
+def sample(spaces: Dict[str, Union[Sequence, tuple]], count: int, seed: int = 0) -> List[Params]:
+    """
+    ``count`` random points. A value list is sampled uniformly; a ``(low, high)`` tuple of
+    ints gives an inclusive integer range and of floats a continuous one.
+    """
+    rng = random.Random(seed)
+    points = []
+    for _ in range(count):
+        point = {}
+        for name, space in spaces.items():
+            if isinstance(space, tuple) and len(space) == 2:
+                low, high = space
+                if isinstance(low, int) and isinstance(high, int):
+                    point[name] = rng.randint(low, high)
+                else:
+                    point[name] = rng.uniform(low, high)
+            else:
+                point[name] = rng.choice(list(space))
+        points.append(point)
+    return points
+
+
+def sweep(points: Sequence[Params], cache_dir: Optional[str] = None, workers: Optional[int] = None,
+          max_steps: int = 5000, scenario: Optional[Scenario] = None, base_seed: int = 0,
+          min_seeds: int = 32, max_seeds: int = 512, batch_seeds: int = 32,
+          half_width: float = 0.05) -> List[PointResult]:
+    """
+    Estimate the success rate at every point, stopping each once its interval is narrow.
+
+    Every point uses the same seeds ``base_seed, base_seed + 1, ...``, so differences
+    between points are not drowned by seed-to-seed variation. Seeds are added in rounds
+    of ``batch_seeds`` per unfinished point until the Wilson interval is at most
+    ``2 * half_width`` wide or ``max_seeds`` have run; cached runs count towards this.
+
+    Args:
+        points (Sequence[dict]): Parameter points, e.g. from ``grid`` or ``sample``.
+        cache_dir (str, optional): Directory for cached runs; nothing is cached when None.
+        workers (int, optional): Worker processes; defaults to os.cpu_count(). 1 runs inline.
+        max_steps (int): Step budget per run.
+        scenario (Scenario, optional): Base world that the points modify.
+        base_seed (int): First seed.
+        min_seeds (int): Runs every point gets before stopping is considered.
+        max_seeds (int): Upper bound on runs per point.
+        batch_seeds (int): Seeds per point per round, and per worker task.
+        half_width (float): Target half-width of the 95% interval.
+
+    Returns:
+        List[PointResult]: One result per point, in the order given.
+
+    Raises:
+        ValueError: If a parameter name is not sweepable.
+    """
+    scenario = scenario or Scenario()
+    for params in points:
+        validate(params)
+    cache = ResultCache(cache_dir) if cache_dir else None
+    runs: List[Dict[int, RunResult]] = [cache.load(p, max_steps, scenario) if cache else {} for p in points]
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while True:
+            wanted = []
+            for index, params in enumerate(points):
+                done = [runs[index][s] for s in range(base_seed, base_seed + max_seeds) if s in runs[index]]
+                if len(done) >= max_seeds:
+                    continue
+                if len(done) >= min_seeds:
+                    low, high = wilson_interval(sum(r.outcome == "completed" for r in done), len(done))
+                    if high - low <= 2 * half_width:
+                        continue
+                missing = [s for s in range(base_seed, base_seed + max_seeds) if s not in runs[index]]
+                wanted.append((index, missing[:batch_seeds]))
+            if not wanted:
+                break
+            if pool is None:
+                batches = [run_point(points[i], seeds, max_steps, scenario) for i, seeds in wanted]
+            else:
+                futures = [pool.submit(run_point, points[i], seeds, max_steps, scenario) for i, seeds in wanted]
+                batches = [future.result() for future in futures]
+            for (index, _), results in zip(wanted, batches):
+                if cache:
+                    cache.store(points[index], max_steps, scenario, results)
+                for result in results:
+                    runs[index][result.seed] = result
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    summary = []
+    for params, by_seed in zip(points, runs):
+        done = [by_seed[s] for s in range(base_seed, base_seed + max_seeds) if s in by_seed]
+        completed = sum(r.outcome == "completed" for r in done)
+        low, high = wilson_interval(completed, len(done))
+        summary.append(PointResult(params, len(done), completed,
+                                   completed / len(done) if done else 0.0, low, high))
+    return summary
+
+
+def _parse_value(text: str) -> Union[int, float]:
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _parse_param(spec: str) -> tuple:
+    """``name=a,b,c`` lists values; ``name=low:high`` is a range."""
+    name, _, values = spec.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected name=values, got {spec!r}")
+    if ":" in values:
+        low, high = values.split(":", 1)
+        return name, (_parse_value(low), _parse_value(high))
+    return name, [_parse_value(v) for v in values.split(",")]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sweep model parameters and report success rates.")
+    parser.add_argument("--param", type=_parse_param, action="append", required=True,
+                        help="name=a,b,c or name=low:high (float ranges need --samples); repeat for more")
+    parser.add_argument("--samples", type=int, default=None,
+                        help="random points instead of the full grid (ranges are sampled)")
+    parser.add_argument("--sample-seed", type=int, default=0, help="seed for choosing random points")
+    parser.add_argument("--cache", default=".sweep_cache", help="result cache directory ('' disables)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--max-steps", type=int, default=5000, help="step budget per run")
+    parser.add_argument("--min-seeds", type=int, default=32, help="runs per point before stopping early")
+    parser.add_argument("--max-seeds", type=int, default=512, help="most runs per point")
+    parser.add_argument("--half-width", type=float, default=0.05, help="target 95%% interval half-width")
+    args = parser.parse_args(argv)
+
+    spaces = dict(args.param)
+    for name, space in spaces.items():
+        if isinstance(space, tuple) and not args.samples and not all(isinstance(v, int) for v in space):
+            parser.error(f"--param {name}={space[0]}:{space[1]} is a continuous range; "
+                         f"add --samples, or list the values as {name}=a,b,c")
+    if args.samples:
+        points = sample(spaces, args.samples, args.sample_seed)
+    else:
+        points = grid({name: list(range(space[0], space[1] + 1)) if isinstance(space, tuple) else space
+                       for name, space in spaces.items()})
+    results = sweep(points, cache_dir=args.cache or None, workers=args.workers, max_steps=args.max_steps,
+                    min_seeds=args.min_seeds, max_seeds=args.max_seeds, half_width=args.half_width)
+    names = list(spaces)
+    print("\t".join(names + ["runs", "completed", "success_rate", "low", "high"]))
+    for point in results:
+        print("\t".join([str(point.params[n]) for n in names]
+                        + [str(point.runs), str(point.completed), f"{point.success_rate:.4f}",
+                           f"{point.low:.4f}", f"{point.high:.4f}"]))
+
+
+if __name__ == "__main__":
+    main()
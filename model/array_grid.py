@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from model.agent import Agent
+    from model.bridge import Bridge
+
+BRIDGE_PRESENT = 1
+BRIDGE_DAMAGED = 2
+BRIDGE_COMPLETE = 4
+
+# 256-entry translation tables turn a whole grid into a 0/1 mask in one C-level pass.
+_FREE_TABLE = bytes([1] + [0] * 255)
+_INCOMPLETE_TABLE = bytes(
+    1 if flags & BRIDGE_PRESENT and (flags & BRIDGE_DAMAGED or not flags & BRIDGE_COMPLETE) else 0
+    for flags in range(256)
+)
+_DAMAGED_TABLE = bytes(1 if flags & BRIDGE_DAMAGED else 0 for flags in range(256))
+
+
+class ArrayGrid:
+    """
+    Flat, typed-array mirror of a Mars grid, indexed by ``y * width + x``.
+
+    Attributes:
+        agent_ids (array): int32 agent id per cell, 0 for an empty cell.
+        type_codes (bytearray): uint8 agent class (or hero role) code per cell, 0 for an empty cell.
+        bridge_health (array): int32 bridge health per cell, 0 where there is no bridge.
+        bridge_flags (bytearray): uint8 BRIDGE_* bit flags per cell.
+
+    All four buffers support the buffer protocol, so tools such as NumPy can wrap them
+    without copying (``numpy.frombuffer(grid.type_codes, dtype=numpy.uint8)``).
+
+    An agent's id is released once it stands on no cell, and released ids are handed out
+    again last-out first, so an agent that moves (leaves one cell, then enters another)
+    gets its id back and the id table stays as large as the grid's population.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        size = width * height
+        self.agent_ids = array('i', [0]) * size
+        self.type_codes = bytearray(size)
+        self.bridge_health = array('i', [0]) * size
+        self.bridge_flags = bytearray(size)
+
+        self.__type_codes: Dict[type, int] = {}
+        self.__types: List[Optional[type]] = [None]
+        self.__agent_ids: Dict[int, int] = {}
+        self.__agents: Dict[int, Agent] = {}
+        # Cells each id occupies, and the ids free to hand out again.
+        self.__cell_counts: Dict[int, int] = {}
+        self.__free_ids: List[int] = []
+
+    def type_code(self, agent_type: type) -> int:
+        """
+        Returns the uint8 code for an agent class, assigning the next free code on first use.
+        """
+        code = self.__type_codes.get(agent_type)
+        if code is None:
+            code = len(self.__types)
+            if code > 255:
+                raise OverflowError("ArrayGrid supports at most 255 agent classes")
+            self.__type_codes[agent_type] = code
+            self.__types.append(agent_type)
+        return code
+
+    def type_for_code(self, code: int) -> Optional[type]:
+        """Returns the agent class for a code, or None for the empty code 0."""
+        return self.__types[code]
+
+    def agent_id(self, agent: Agent) -> int:
+        """Returns the positive id of an agent on the grid, or 0 if it stands on no cell."""
+        return self.__agent_ids.get(id(agent), 0)
+
+    def agent_for_id(self, agent_id: int) -> Optional[Agent]:
+        """Returns the agent with the given id, or None for 0 / unknown ids."""
+        return self.__agents.get(agent_id)
+
+    def place(self, x: int, y: int, agent: Optional[Agent]) -> None:
+        """Record the occupant of wrapped cell (x, y); None empties the cell."""
+        index = y * self.width + x
+        counts = self.__cell_counts
+        previous = self.agent_ids[index]
+        if previous:
+            if counts[previous] == 1:
+                del counts[previous]
+                del self.__agent_ids[id(self.__agents.pop(previous))]
+                self.__free_ids.append(previous)
+            else:
+                counts[previous] -= 1
+        if agent is None:
+            self.agent_ids[index] = 0
+            self.type_codes[index] = 0
+            return
+        key = id(agent)
+        agent_id = self.__agent_ids.get(key)
+        if agent_id is None:
+            agent_id = self.__free_ids.pop() if self.__free_ids else len(self.__agent_ids) + 1
+            self.__agent_ids[key] = agent_id
+            self.__agents[agent_id] = agent
+            counts[agent_id] = 1
+        else:
+            counts[agent_id] += 1
+        self.agent_ids[index] = agent_id
+        self.type_codes[index] = self.type_code(getattr(agent, "role", type(agent)))
+
+    def update_bridge(self, x: int, y: int, bridge: Bridge) -> None:
+        """Record the health and state flags of the bridge on wrapped cell (x, y)."""
+        index = y * self.width + x
+        flags = BRIDGE_PRESENT
+        if bridge.damaged:
+            flags |= BRIDGE_DAMAGED
+        if bridge.is_complete():
+            flags |= BRIDGE_COMPLETE
+        self.bridge_health[index] = bridge.health
+        self.bridge_flags[index] = flags
+
+    def remove_bridge(self, x: int, y: int) -> None:
+        """Forget the bridge on wrapped cell (x, y)."""
+        index = y * self.width + x
+        self.bridge_health[index] = 0
+        self.bridge_flags[index] = 0
+
+    def free_cell_mask(self) -> bytearray:
+        """Returns a per-cell mask with 1 where no agent stands."""
+        return self.type_codes.translate(_FREE_TABLE)
+
+    def incomplete_bridge_mask(self) -> bytearray:
+        """Returns a per-cell mask with 1 where a bridge needs work: not complete, or damaged."""
+        return self.bridge_flags.translate(_INCOMPLETE_TABLE)
+
+    def damaged_bridge_mask(self) -> bytearray:
+        """Returns a per-cell mask with 1 where a bridge is damaged."""
+        return self.bridge_flags.translate(_DAMAGED_TABLE)
+
+    def type_counts(self) -> Dict[type, int]:
+        """Returns the number of occupied cells per agent class, omitting absent classes."""
+        counts: Dict[type, int] = {}
+        for code in range(1, len(self.__types)):
+            count = self.type_codes.count(code)
+            if count:
+                counts[self.__types[code]] = count
+        return counts
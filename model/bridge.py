@@ -1,18 +1,52 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from model.location import Location
+    from model.mars import Mars
 
 
 class Bridge:
 
     def __init__(self, location: Location, max_health: int = 100) -> None:
+        # The world this bridge was added to; it is told about every state change.
+        self.world: Optional[Mars] = None
         self.location = location
         self.max_health = max_health
-        self.health = 0
-        self.damaged = False
+        self.__health = 0
+        self.__damaged = False
+
+    @property
+    def health(self) -> int:
+        return self.__health
+
+    @health.setter
+    def health(self, value: int) -> None:
+        if value != self.__health:
+            self.__health = value
+            self.__changed()
+
+    @property
+    def damaged(self) -> bool:
+        return self.__damaged
+
+    @damaged.setter
+    def damaged(self, value: bool) -> None:
+        if value != self.__damaged:
+            self.__damaged = value
+            self.__changed()
+
+    def __changed(self) -> None:
+        if self.world is not None:
+            self.world.bridge_changed(self)
+
+    def copy(self) -> Bridge:
+        """Returns a bridge with the same location and state that belongs to no world yet."""
+        twin = Bridge(self.location, self.max_health)
+        twin.__health = self.__health
+        twin.__damaged = self.__damaged
+        return twin
 
     def is_complete(self) -> bool:
         return self.health >= self.max_health
@@ -30,4 +64,4 @@ class Bridge:
 
     def __repr__(self) -> str:
         status = "complete" if self.is_complete() else "damaged" if self.damaged else "incomplete"
-        return f"Bridge(loc={self.location}, health={self.health}/{self.max_health}, {status})"
\ No newline at end of file
+        return f"Bridge(loc={self.location}, health={self.health}/{self.max_health}, {status})"
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from model.bridge import Bridge
+
+Cell = Tuple[int, int]
+
+
+class BridgeIndex:
+    """
+    Live work-queue view of the bridges on a toroidal grid.
+
+    Bridges are sorted into three sets as their state changes: ``incomplete`` (still needs
+    work: not complete, or damaged), ``damaged`` and ``complete``. Incomplete bridges are
+    also bucketed on a coarse grid so the nearest one can be found by searching outwards
+    ring by ring instead of sorting every bridge.
+
+    Ties on distance are broken by the order bridges were added, which is what sorting
+    the insertion-ordered bridge list used to do.
+    """
+
+    def __init__(self, width: int, height: int, bucket_size: int = 8) -> None:
+        self.width = width
+        self.height = height
+        self.bucket_size = bucket_size
+        self.__buckets_x = -(-width // bucket_size)
+        self.__buckets_y = -(-height // bucket_size)
+        # The last bucket on an axis may be narrower, which shortens distances across the wrap.
+        self.__slack = max(self.__buckets_x * bucket_size - width,
+                           self.__buckets_y * bucket_size - height)
+
+        self.incomplete: Dict[Cell, Bridge] = {}
+        # Bumped whenever a bridge joins or leaves ``incomplete``, so callers can tell
+        # cheaply whether the work queue changed since they last looked.
+        self.incomplete_version = 0
+        self.damaged: Dict[Cell, Bridge] = {}
+        self.complete: Dict[Cell, Bridge] = {}
+        self.__buckets: Dict[Cell, Dict[Cell, Bridge]] = {}
+        self.__order: Dict[Cell, int] = {}
+        self.__next_order = 0
+        self.__sum_x = 0
+        self.__sum_y = 0
+
+    def add(self, cell: Cell, bridge: Bridge) -> None:
+        """
+        Start tracking a bridge placed on wrapped cell ``cell``.
+
+        Replacing the bridge on an already tracked cell keeps that cell's original place in
+        the tie-break order, as re-assigning a dict key does.
+        """
+        order = self.__order.get(cell)
+        self.remove(cell)
+        if order is None:
+            order = self.__next_order
+            self.__next_order += 1
+        self.__order[cell] = order
+        self.update(cell, bridge)
+
+    def remove(self, cell: Cell) -> None:
+        """Stop tracking the bridge on ``cell``, if any."""
+        if cell not in self.__order:
+            return
+        del self.__order[cell]
+        self.__discard_incomplete(cell)
+        self.damaged.pop(cell, None)
+        self.complete.pop(cell, None)
+
+    def update(self, cell: Cell, bridge: Bridge) -> None:
+        """Re-file a tracked bridge after its health or damaged flag changed."""
+        if cell not in self.__order:
+            return
+        needs_work = bridge.damaged or not bridge.is_complete()
+        if needs_work:
+            self.complete.pop(cell, None)
+            if cell not in self.incomplete:
+                self.incomplete_version += 1
+                self.incomplete[cell] = bridge
+                self.__bucket_of(cell)[cell] = bridge
+                self.__sum_x += bridge.location.get_x()
+                self.__sum_y += bridge.location.get_y()
+        else:
+            self.__discard_incomplete(cell)
+            self.complete[cell] = bridge
+        if bridge.damaged:
+            self.damaged[cell] = bridge
+        else:
+            self.damaged.pop(cell, None)
+
+    def fork(self, bridges: Dict[Cell, Bridge]) -> BridgeIndex:
+        """
+        Returns a copy of this index that tracks other bridge objects, in O(bridges).
+
+        Args:
+            bridges (Dict[Cell, Bridge]): The bridge standing in for each tracked cell's
+                bridge, in the same state.
+        """
+        twin = BridgeIndex(self.width, self.height, self.bucket_size)
+        twin.incomplete = {cell: bridges[cell] for cell in self.incomplete}
+        twin.incomplete_version = self.incomplete_version
+        twin.damaged = {cell: bridges[cell] for cell in self.damaged}
+        twin.complete = {cell: bridges[cell] for cell in self.complete}
+        twin.__buckets = {key: {cell: bridges[cell] for cell in bucket}
+                          for key, bucket in self.__buckets.items()}
+        twin.__order = dict(self.__order)
+        twin.__next_order = self.__next_order
+        twin.__sum_x = self.__sum_x
+        twin.__sum_y = self.__sum_y
+        return twin
+
+    def clear(self) -> None:
+        """Forget every bridge."""
+        self.incomplete_version += 1
+        self.incomplete.clear()
+        self.damaged.clear()
+        self.complete.clear()
+        self.__buckets.clear()
+        self.__order.clear()
+        self.__sum_x = 0
+        self.__sum_y = 0
+
+    def incomplete_centroid(self) -> Optional[Tuple[int, int]]:
+        """
+        Returns the integer mean of the incomplete bridges' coordinates, or None if there are none.
+        """
+        count = len(self.incomplete)
+        if not count:
+            return None
+        return self.__sum_x // count, self.__sum_y // count
+
+    def nearest_incomplete(self, x: int, y: int,
+                           accept: Optional[Callable[[Bridge], bool]] = None) -> Optional[Bridge]:
+        """
+        Returns the incomplete bridge closest to wrapped cell (x, y) by toroidal Manhattan distance.
+
+        Args:
+            x (int): Query column.
+            y (int): Query row.
+            accept (Callable, optional): Extra filter; rejected bridges are skipped.
+
+        Returns:
+            Optional[Bridge]: The closest accepted bridge, or None.
+        """
+        if not self.incomplete:
+            return None
+        width = self.width
+        height = self.height
+        size = self.bucket_size
+        buckets_x = self.__buckets_x
+        buckets_y = self.__buckets_y
+        order = self.__order
+        bx0 = x // size
+        by0 = y // size
+        best: Optional[Bridge] = None
+        best_key: Optional[Tuple[int, int]] = None
+        seen = set()
+        max_ring = max(buckets_x, buckets_y) // 2 + 1
+        for ring in range(max_ring + 1):
+            if best_key is not None and ring > 0:
+                if (ring - 1) * size + 1 - self.__slack > best_key[0]:
+                    break
+            for bucket_key in self.__ring(bx0, by0, ring, buckets_x, buckets_y):
+                if bucket_key in seen:
+                    continue
+                seen.add(bucket_key)
+                bucket = self.__buckets.get(bucket_key)
+                if not bucket:
+                    continue
+                for cell, bridge in bucket.items():
+                    dx = abs(cell[0] - x)
+                    dy = abs(cell[1] - y)
+                    key = (min(dx, width - dx) + min(dy, height - dy), order[cell])
+                    if best_key is not None and key >= best_key:
+                        continue
+                    if accept is not None and not accept(bridge):
+                        continue
+                    best = bridge
+                    best_key = key
+        return best
+
+    @staticmethod
+    def __ring(bx0: int, by0: int, ring: int, buckets_x: int, buckets_y: int) -> List[Cell]:
+        if ring == 0:
+            return [(bx0, by0)]
+        keys = []
+        for i in range(-ring, ring + 1):
+            keys.append(((bx0 + i) % buckets_x, (by0 - ring) % buckets_y))
+            keys.append(((bx0 + i) % buckets_x, (by0 + ring) % buckets_y))
+        for j in range(-ring + 1, ring):
+            keys.append(((bx0 - ring) % buckets_x, (by0 + j) % buckets_y))
+            keys.append(((bx0 + ring) % buckets_x, (by0 + j) % buckets_y))
+        return keys
+
+    def __bucket_key(self, cell: Cell) -> Cell:
+        return cell[0] // self.bucket_size, cell[1] // self.bucket_size
+
+    def __bucket_of(self, cell: Cell) -> Dict[Cell, Bridge]:
+        return self.__buckets.setdefault(self.__bucket_key(cell), {})
+
+    def __discard_incomplete(self, cell: Cell) -> None:
+        bridge = self.incomplete.pop(cell, None)
+        if bridge is None:
+            return
+        self.incomplete_version += 1
+        key = self.__bucket_key(cell)
+        bucket = self.__buckets.get(key)
+        if bucket is not None:
+            bucket.pop(cell, None)
+            if not bucket:
+                del self.__buckets[key]
+        self.__sum_x -= bridge.location.get_x()
+        self.__sum_y -= bridge.location.get_y()
@@ -13,14 +13,20 @@ if TYPE_CHECKING:
 class Environment(ABC):
     """Abstract class representing an environment."""
 
-    def __init__(self) -> None:
+    def __init__(self, width: Optional[int] = None, height: Optional[int] = None) -> None:
         """
         Initialise the Environment object.
 
-        Initialises the height and width of the environment based on Config.world_size.
-        """
-        self.__height = Config.world_size
-        self.__width = Config.world_size
+        Args:
+            width (int, optional): Number of columns; defaults to Config.world_size.
+            height (int, optional): Number of rows; defaults to Config.world_size.
+        """
+        width = Config.world_size if width is None else width
+        height = Config.world_size if height is None else height
+        if width < 1 or height < 1:
+            raise ValueError(f"Environment dimensions must be positive, got {width}x{height}")
+        self.__height = height
+        self.__width = width
 
     def __repr__(self) -> str:
         """
@@ -21,16 +21,7 @@ class GalactusProjection(Agent):
         self._step_counter = (self._step_counter + 1) % 2
         if self._step_counter == 1:
             return
-        bridges = mars.get_all_bridges()
-        target_loc = self.franklin_location
-        if bridges:
-            incomplete = [b for b in bridges if not b.is_complete() or b.damaged]
-            if incomplete:
-                xs = [b.location.get_x() for b in incomplete]
-                ys = [b.location.get_y() for b in incomplete]
-                cx = sum(xs) // len(xs)
-                cy = sum(ys) // len(ys)
-                target_loc = Location(cx, cy)
+        target_loc = mars.incomplete_bridge_centroid() or self.franklin_location
         current = self.get_location()
         dx = (target_loc.get_x() - current.get_x())
         dy = (target_loc.get_y() - current.get_y())
@@ -46,7 +37,7 @@ class GalactusProjection(Agent):
             dy = 0 if dy == 0 else (1 if dy > 0 else -1)
         nx = (current.get_x() + dx) % width
         ny = (current.get_y() + dy) % height
-        next_loc = Location(nx, ny)
+        next_loc = mars.location(nx, ny)
         bridge = mars.get_bridge(next_loc)
         if bridge:
             mars.remove_bridge(next_loc)
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-import random
-from collections import deque
 from typing import List, Optional, TYPE_CHECKING
 
 from model.agent import Agent
 from model.location import Location
+from model.pathfinding import shared_pathfinder
+from model.silver_surfer import SilverSurfer
 
 if TYPE_CHECKING:
     from model.location import Location
@@ -18,6 +18,9 @@ class Hero(Agent):
     max_energy: int = 100
     repair_rate: int = 10
     attack_range: int = 1
+    # Energy gained per step at HQ, and the level at or below which a hero heads back.
+    recharge_amount: int = 20
+    retreat_energy: int = 10
     name: str = "Hero"
 
     def __init__(self, location: Location) -> None:
@@ -27,7 +30,7 @@ class Hero(Agent):
 
     def hq_location(self, mars: 'Mars') -> Location:
 
-        return Location(mars.get_width() // 2, mars.get_height() // 2)
+        return mars.location(mars.get_width() // 2, mars.get_height() // 2)
 
     def at_location(self, mars: 'Mars', a: Location, b: Location) -> bool:
 
@@ -51,53 +54,22 @@ class Hero(Agent):
 
     def find_nearest_bridge(self, mars: 'Mars') -> Optional['Bridge']:
 
-        bridges = mars.get_all_bridges()
-        if not bridges:
-            return None
-        candidate_bridges = [b for b in bridges if not b.is_complete() or b.damaged]
-        if not candidate_bridges:
-            return None
-        current_location = self.get_location()
-        candidate_bridges.sort(key=lambda b: self.distance(current_location, b.location, mars))
-        return candidate_bridges[0]
+        return mars.nearest_incomplete_bridge(self.get_location())
 
     def bfs_path(self, start: Location, goal: Location, mars: 'Mars') -> List[Location]:
 
-        width = mars.get_width()
-        height = mars.get_height()
-        start_coords = (start.get_x(), start.get_y())
-        goal_coords = (goal.get_x(), goal.get_y())
-        visited = set([start_coords])
-        queue: deque[tuple[tuple[int, int], List[tuple[int, int]]]] = deque()
-        queue.append((start_coords, []))
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        while queue:
-            (cx, cy), path = queue.popleft()
-            if (cx, cy) == goal_coords:
-                return [Location(coords[0], coords[1]) for coords in path]
-            for dx, dy in directions:
-                nx = (cx + dx) % width
-                ny = (cy + dy) % height
-                if (nx, ny) not in visited:
-
-                    occupant = mars.get_agent(Location(nx, ny))
-                    if occupant is None or (nx, ny) == goal_coords:
-                        visited.add((nx, ny))
-                        queue.append(((nx, ny), path + [(nx, ny)]))
-        return []
+        return shared_pathfinder.find_path(start, goal, mars)
 
     def move_towards(self, target: Location, mars: 'Mars') -> None:
 
-        path = self.bfs_path(self.get_location(), target, mars)
-        if not path:
+        next_location = mars.next_step_towards(self.get_location(), target)
+        if next_location is None:
             return
-        next_location = path[0]
         if self.energy > 0:
             self.energy = max(0, self.energy - 1)
         mars.set_agent(None, self.get_location())
-        new_loc = Location(next_location.get_x(), next_location.get_y())
-        mars.set_agent(self, new_loc)
-        self.set_location(new_loc)
+        mars.set_agent(self, next_location)
+        self.set_location(next_location)
 
     def act(self, mars: 'Mars') -> None:
 
@@ -105,7 +77,7 @@ class Hero(Agent):
 
         hq = self.hq_location(mars)
 
-        if self.energy <= 10 and not self.at_location(mars, self.get_location(), hq):
+        if self.energy <= self.retreat_energy and not self.at_location(mars, self.get_location(), hq):
             self.move_towards(hq, mars)
             return
 
@@ -126,13 +98,17 @@ class Hero(Agent):
         else:
             self.move_towards(bridge.location, mars)
 
+    def idle_until(self, mars: 'Mars', step: int) -> Optional[int]:
+        """Returns when this hero can next do something after an act that did nothing; see idle_until."""
+        return idle_until(type(self), self.get_location(), self.energy, mars, step)
+
     def check_recharge(self, mars: 'Mars') -> None:
 
         centre_x = mars.get_width() // 2
         centre_y = mars.get_height() // 2
         loc = self.get_location()
         if loc.get_x() % mars.get_width() == centre_x and loc.get_y() % mars.get_height() == centre_y:
-            self.energy = min(self.max_energy, self.energy + 20)
+            self.energy = min(self.max_energy, self.energy + self.recharge_amount)
 
 
 class ReedRichards(Hero):
@@ -143,7 +119,7 @@ class ReedRichards(Hero):
 
         self.check_recharge(mars)
         hq = self.hq_location(mars)
-        if self.energy <= 10 and not self.at_location(mars, self.get_location(), hq):
+        if self.energy <= self.retreat_energy and not self.at_location(mars, self.get_location(), hq):
             self.move_towards(hq, mars)
             return
         if self.energy <= 0:
@@ -151,25 +127,11 @@ class ReedRichards(Hero):
                 self.move_towards(hq, mars)
             return
 
-        surfer = None
-        for row in range(mars.get_height()):
-            for col in range(mars.get_width()):
-                agent = mars.get_agent(Location(col, row))
-                if agent and agent.__class__.__name__ == 'SilverSurfer':
-                    surfer = agent
-                    break
-            if surfer:
-                break
+        surfer = mars.find_agent(SilverSurfer)
 
+        target_bridge: Optional['Bridge']
         if surfer:
-            bridges = mars.get_all_bridges()
-            candidates = [b for b in bridges if not b.is_complete() or getattr(b, "damaged", False)]
-            target_bridge: Optional['Bridge']
-            if candidates:
-                candidates.sort(key=lambda b: self.distance(b.location, surfer.get_location(), mars))
-                target_bridge = candidates[0]
-            else:
-                target_bridge = None
+            target_bridge = mars.nearest_incomplete_bridge(surfer.get_location())
         else:
             target_bridge = self.find_nearest_bridge(mars)
 
@@ -192,7 +154,7 @@ class SueStorm(Hero):
         self.check_recharge(mars)
 
         hq = self.hq_location(mars)
-        if self.energy <= 10 and not self.at_location(mars, self.get_location(), hq):
+        if self.energy <= self.retreat_energy and not self.at_location(mars, self.get_location(), hq):
             self.move_towards(hq, mars)
             return
         if self.energy <= 0:
@@ -222,7 +184,7 @@ class JohnnyStorm(Hero):
         self.check_recharge(mars)
 
         hq = self.hq_location(mars)
-        if self.energy <= 10 and not self.at_location(mars, self.get_location(), hq):
+        if self.energy <= self.retreat_energy and not self.at_location(mars, self.get_location(), hq):
             self.move_towards(hq, mars)
             return
         if self.energy <= 0:
@@ -231,15 +193,9 @@ class JohnnyStorm(Hero):
             return
 
         target_surfer = None
-        for row in range(mars.get_height()):
-            for col in range(mars.get_width()):
-                agent = mars.get_agent(Location(col, row))
-                if agent and agent.__class__.__name__ == 'SilverSurfer':
-                    dist = self.distance(self.get_location(), agent.get_location(), mars)
-                    if dist <= self.attack_range:
-                        target_surfer = agent
-                        break
-            if target_surfer:
+        for agent in mars.find_agents(SilverSurfer):
+            if self.distance(self.get_location(), agent.get_location(), mars) <= self.attack_range:
+                target_surfer = agent
                 break
         if target_surfer:
             if self.energy > 0:
@@ -259,7 +215,7 @@ class BenGrimm(Hero):
         self.check_recharge(mars)
 
         hq = self.hq_location(mars)
-        if self.energy <= 10 and not self.at_location(mars, self.get_location(), hq):
+        if self.energy <= self.retreat_energy and not self.at_location(mars, self.get_location(), hq):
             self.move_towards(hq, mars)
             return
         if self.energy <= 0:
@@ -270,9 +226,74 @@ class BenGrimm(Hero):
         for dx, dy in [(-1,0),(1,0),(0,-1),(0,1)]:
             nx = (self.get_location().get_x() + dx) % mars.get_width()
             ny = (self.get_location().get_y() + dy) % mars.get_height()
-            agent = mars.get_agent(Location(nx, ny))
+            agent = mars.get_agent_at(nx, ny)
             if agent and agent.__class__.__name__ == 'SilverSurfer':
                 agent.energy = max(0, agent.energy - 20)
                 self.energy = max(0, self.energy - 5)
                 return
-        super().act(mars)
\ No newline at end of file
+        super().act(mars)
+
+
+def idle_until(role: type, location: Location, energy: int, mars: 'Mars', step: int) -> Optional[int]:
+    """
+    Returns the next step on which a hero whose act just did nothing may do something.
+
+    Only valid straight after an act that changed neither the hero's cell nor its energy.
+    The answer holds as long as no bridge starts or stops needing work, nobody else
+    changes the hero's energy and no Silver Surfer joins or leaves the grid; whoever
+    skips idle heroes must wake them on those events (see SimulationEngine).
+
+    Args:
+        role (type): The hero's class, whose rules it follows.
+        location (Location): The hero's cell.
+        energy (int): The hero's energy.
+        mars (Mars): The world.
+        step (int): The step the hero just acted on.
+
+    Returns:
+        Optional[int]: ``step + 1`` if the hero may act on the next step (it is only held
+        up by other agents, say), a later step if only an approaching Surfer can give it
+        something to do, or None if only one of the events above can.
+    """
+    width = mars.get_width()
+    height = mars.get_height()
+    x = location.get_x() % width
+    y = location.get_y() % height
+    hq = mars.location(width // 2, height // 2)
+    busy = step + 1
+    at_hq = x == hq.get_x() and y == hq.get_y()
+    if at_hq and energy < role.max_energy:
+        return busy
+    if energy <= role.retreat_energy:
+        # Heading home: it stays put only if obstacles wall HQ off.
+        return busy if at_hq or mars.reachable(location, hq) else None
+
+    wake = None
+    surfers = mars.find_agents(SilverSurfer)
+    if surfers:
+        reach = role.attack_range if issubclass(role, JohnnyStorm) else 1 if issubclass(role, BenGrimm) else None
+        if reach is not None:
+            nearest = width + height
+            for surfer in surfers:
+                dx = abs(x - surfer.get_location().get_x() % width)
+                dy = abs(y - surfer.get_location().get_y() % height)
+                nearest = min(nearest, min(dx, width - dx) + min(dy, height - dy))
+            gap = nearest - reach
+            if gap <= 0:
+                return busy
+            # The Surfer closes in by at most this many cells a step: two when wandering.
+            speed = max(2, max(surfer.moves_per_step for surfer in surfers))
+            wake = step + -(-gap // speed)
+        if issubclass(role, ReedRichards):
+            # Reed works on the bridge nearest the Surfer, which changes as it moves.
+            if any(mars.reachable(location, bridge.location) for bridge in mars.incomplete_bridges()):
+                return busy
+            return wake
+
+    bridge = mars.nearest_incomplete_bridge(location)
+    if bridge is None:
+        return wake
+    target = bridge.location
+    if (target.get_x() % width == x and target.get_y() % height == y) or mars.reachable(location, target):
+        return busy
+    return wake
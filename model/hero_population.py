@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+from array import array
+from typing import List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from model.hero import Hero, ReedRichards, SueStorm, JohnnyStorm, BenGrimm, idle_until
+from model.silver_surfer import SilverSurfer
+
+if TYPE_CHECKING:
+    from model.bridge import Bridge
+    from model.location import Location
+    from model.mars import Mars
+
+# Role code -> hero class. Per-role constants are read from these classes into tables.
+ROLES: Tuple[type, ...] = (Hero, ReedRichards, SueStorm, JohnnyStorm, BenGrimm)
+HERO, REED, SUE, JOHNNY, BEN = range(len(ROLES))
+
+BEN_REACH = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+class HeroHandle:
+    """
+    Lightweight stand-in for one hero of a HeroPopulation.
+
+    Handles are what Mars stores on the grid, so other agents, the renderer and the energy
+    sharing code see an occupant with the usual ``energy``/``name``/``get_location`` API,
+    while the state itself lives in the population's arrays.
+    """
+
+    __slots__ = ("population", "index")
+
+    def __init__(self, population: HeroPopulation, index: int) -> None:
+        self.population = population
+        self.index = index
+
+    @property
+    def role(self) -> type:
+        """The hero class whose behaviour this hero follows."""
+        return ROLES[self.population.roles[self.index]]
+
+    @property
+    def name(self) -> str:
+        return self.role.name
+
+    @property
+    def max_energy(self) -> int:
+        return self.population.max_energy[self.population.roles[self.index]]
+
+    @property
+    def repair_rate(self) -> int:
+        return self.population.repair_rate[self.population.roles[self.index]]
+
+    @property
+    def energy(self) -> int:
+        return self.population.energy[self.index]
+
+    @energy.setter
+    def energy(self, value: int) -> None:
+        self.population.energy[self.index] = value
+
+    @property
+    def is_recharging(self) -> bool:
+        return bool(self.population.recharging[self.index])
+
+    def get_location(self) -> Location:
+        return self.population.location_of(self.index)
+
+    def set_location(self, location: Location) -> None:
+        self.population.xs[self.index] = location.get_x()
+        self.population.ys[self.index] = location.get_y()
+
+    def act(self, mars: 'Mars') -> None:
+        self.population.act_one(self.index, mars)
+
+    def __repr__(self) -> str:
+        return f"{self.name}(energy={self.energy})"
+
+
+class HeroPopulation:
+    """
+    Struct-of-arrays storage for a large hero roster.
+
+    Positions, energy, role codes and recharge flags are kept in parallel typed arrays
+    indexed by roster position, and per-role constants (max energy, repair rate, attack
+    range) in small role-indexed tables. Each tick, the parts of Hero.act that only read
+    a hero's own state are evaluated for the whole population up front: HQ recharge
+    (check_recharge) and the low-energy retreat / exhausted-at-HQ decisions. Only the
+    remaining work (moving, repairing, attacking) runs hero by hero in roster order,
+    because it depends on what earlier heroes did to the grid and the bridges.
+
+    Behaviour matches running the equivalent Hero objects in the same order.
+    """
+
+    def __init__(self, mars: 'Mars', roster: Sequence[type], cells: Sequence[Tuple[int, int]],
+                 place: bool = True) -> None:
+        """
+        Create the population and place every hero on the grid.
+
+        Args:
+            mars (Mars): The world the heroes live in.
+            roster (Sequence[type]): Hero class per hero, in acting order.
+            cells (Sequence[tuple]): Starting (x, y) cell per hero.
+            place (bool): Put the handles on the grid; False leaves that to the caller.
+
+        Raises:
+            ValueError: If a class in the roster has no packed role.
+        """
+        codes = bytearray()
+        for cls in roster:
+            if cls not in ROLES:
+                raise ValueError(f"{cls.__name__} has no packed hero role")
+            codes.append(ROLES.index(cls))
+        self.mars = mars
+        self.roles = codes
+        self.max_energy = array('i', [cls.max_energy for cls in ROLES])
+        self.repair_rate = array('i', [cls.repair_rate for cls in ROLES])
+        self.attack_range = array('i', [cls.attack_range for cls in ROLES])
+        self.recharge_amount = array('i', [cls.recharge_amount for cls in ROLES])
+        self.retreat_energy = array('i', [cls.retreat_energy for cls in ROLES])
+        self.xs = array('i', [x for x, _ in cells])
+        self.ys = array('i', [y for _, y in cells])
+        self.energy = array('i', [self.max_energy[code] for code in codes])
+        self.recharging = bytearray(len(codes))
+        self.handles: List[HeroHandle] = [HeroHandle(self, i) for i in range(len(codes))]
+        if place:
+            for handle in self.handles:
+                mars.set_agent(handle, handle.get_location())
+
+    def __len__(self) -> int:
+        return len(self.handles)
+
+    def fork(self) -> HeroPopulation:
+        """
+        Returns a copy of the population with its own arrays and handles, in O(heroes).
+
+        The copy still refers to this population's world; point its ``mars`` at the world
+        its handles are placed on (see SimulationEngine.fork).
+        """
+        twin = HeroPopulation.__new__(HeroPopulation)
+        twin.mars = self.mars
+        twin.roles = bytearray(self.roles)
+        for name in ("max_energy", "repair_rate", "attack_range", "recharge_amount", "retreat_energy",
+                     "xs", "ys", "energy"):
+            setattr(twin, name, array('i', getattr(self, name)))
+        twin.recharging = bytearray(self.recharging)
+        twin.handles = [HeroHandle(twin, i) for i in range(len(self.handles))]
+        return twin
+
+    def location_of(self, index: int) -> Location:
+        return self.mars.location(self.xs[index], self.ys[index])
+
+    def act_all(self, mars: 'Mars', active: Optional[Sequence[int]] = None) -> None:
+        """
+        Run one tick of hero behaviour for the whole population, in roster order.
+
+        Args:
+            mars (Mars): The world.
+            active (Sequence[int], optional): Ascending roster indices of the heroes that
+                act this tick; the rest keep their state, recharge flag included. All act
+                when omitted.
+        """
+        width = mars.get_width()
+        height = mars.get_height()
+        hq_x = width // 2
+        hq_y = height // 2
+        xs = self.xs
+        ys = self.ys
+        energy = self.energy
+        roles = self.roles
+        max_energy = self.max_energy
+        recharge_amount = self.recharge_amount
+        retreat_energy = self.retreat_energy
+
+        if active is None:
+            indices = range(len(roles))
+            recharging = bytearray(len(roles))
+        else:
+            indices = active
+            recharging = self.recharging
+            for i in indices:
+                recharging[i] = 0
+
+        # Batched check_recharge: a hero's cell and energy only change during its own act.
+        at_hq = [i for i in indices if xs[i] == hq_x and ys[i] == hq_y]
+        for i in at_hq:
+            recharging[i] = 1
+            energy[i] = min(max_energy[roles[i]], energy[i] + recharge_amount[roles[i]])
+        self.recharging = recharging
+
+        # Batched low-energy decisions on the recharged energies.
+        low = [i for i in indices if energy[i] <= retreat_energy[roles[i]]]
+        retreat = set(i for i in low if not recharging[i])
+        idle = set(i for i in low if recharging[i] and energy[i] <= 0)
+
+        hq = mars.location(hq_x, hq_y)
+        for i in indices:
+            if i in retreat:
+                self.__move_towards(i, hq, mars)
+            elif i not in idle:
+                self.__work(i, mars)
+
+    def idle_until(self, index: int, mars: 'Mars', step: int) -> Optional[int]:
+        """Returns when hero ``index`` can next do something after an act that did nothing."""
+        return idle_until(ROLES[self.roles[index]], self.location_of(index), self.energy[index], mars, step)
+
+    def act_one(self, index: int, mars: 'Mars') -> None:
+        """Run one hero's act on its own, exactly as act_all would for that hero."""
+        width = mars.get_width()
+        height = mars.get_height()
+        hq = mars.location(width // 2, height // 2)
+        role = self.roles[index]
+        at_hq = self.xs[index] == hq.get_x() and self.ys[index] == hq.get_y()
+        self.recharging[index] = at_hq
+        if at_hq:
+            self.energy[index] = min(self.max_energy[role], self.energy[index] + self.recharge_amount[role])
+        if self.energy[index] <= self.retreat_energy[role]:
+            if not at_hq:
+                self.__move_towards(index, hq, mars)
+                return
+            if self.energy[index] <= 0:
+                return
+        self.__work(index, mars)
+
+    def __work(self, i: int, mars: 'Mars') -> None:
+        # The Surfer is looked up per hero: a hero stepping onto its cell displaces it.
+        role = self.roles[i]
+        location = self.location_of(i)
+        if role == JOHNNY:
+            width = mars.get_width()
+            height = mars.get_height()
+            reach = self.attack_range[role]
+            x = self.xs[i]
+            y = self.ys[i]
+            for surfer in mars.find_agents(SilverSurfer):
+                loc = surfer.get_location()
+                dx = abs(x - loc.get_x())
+                dy = abs(y - loc.get_y())
+                if min(dx, width - dx) + min(dy, height - dy) <= reach:
+                    if self.energy[i] > 0:
+                        surfer.energy = max(0, surfer.energy - 10)
+                        self.energy[i] = max(0, self.energy[i] - 5)
+                        return
+                    break
+        elif role == BEN:
+            width = mars.get_width()
+            height = mars.get_height()
+            for dx, dy in BEN_REACH:
+                agent = mars.get_agent_at((self.xs[i] + dx) % width, (self.ys[i] + dy) % height)
+                if isinstance(agent, SilverSurfer):
+                    agent.energy = max(0, agent.energy - 20)
+                    self.energy[i] = max(0, self.energy[i] - 5)
+                    return
+        if role == JOHNNY or role == BEN:
+            # Their act falls back to Hero.act, which runs check_recharge a second time.
+            if self.recharging[i]:
+                self.energy[i] = min(self.max_energy[role], self.energy[i] + self.recharge_amount[role])
+
+        bridge: Optional[Bridge]
+        if role == REED:
+            surfer = mars.find_agent(SilverSurfer)
+            anchor = surfer.get_location() if surfer else location
+            bridge = mars.nearest_incomplete_bridge(anchor)
+        else:
+            bridge = mars.nearest_incomplete_bridge(location)
+        if bridge is None:
+            return
+        target = bridge.location
+        if (target.get_x() % mars.get_width() == self.xs[i]
+                and target.get_y() % mars.get_height() == self.ys[i]):
+            if role == SUE:
+                bridge.damaged = False
+            elif self.energy[i] <= 0:
+                return
+            bridge.repair(self.repair_rate[role])
+            self.energy[i] = max(0, self.energy[i] - 2)
+        else:
+            self.__move_towards(i, target, mars)
+
+    def __move_towards(self, i: int, target: Location, mars: 'Mars') -> None:
+        location = self.location_of(i)
+        next_location = mars.next_step_towards(location, target)
+        if next_location is None:
+            return
+        if self.energy[i] > 0:
+            self.energy[i] = max(0, self.energy[i] - 1)
+        handle = self.handles[i]
+        mars.set_agent(None, location)
+        mars.set_agent(handle, next_location)
+        self.xs[i] = next_location.get_x()
+        self.ys[i] = next_location.get_y()
@@ -1,5 +1,12 @@
 class Location:
-    """Represents a location with integer x and y coordinates."""
+    """
+    Represents an immutable location with integer x and y coordinates.
+
+    Locations are hashable value objects, so they can be used directly as dict keys and
+    shared freely; Mars hands out one cached instance per grid cell (see Mars.location).
+    """
+
+    __slots__ = ("__x", "__y")
 
     def __init__(self, x: int, y: int) -> None:
         """
@@ -14,7 +21,15 @@ class Location:
 
     def __eq__(self, other):
         """Return true if two objects are equal."""
-        return self.__x == other.get_x() and self.__y == other.get_y()
+        if self is other:
+            return True
+        if not isinstance(other, Location):
+            return NotImplemented
+        return self.__x == other.__x and self.__y == other.__y
+
+    def __hash__(self) -> int:
+        """Return a hash consistent with equality on (x, y)."""
+        return hash((self.__x, self.__y))
 
     def __repr__(self) -> str:
         """Return a string representation of the location."""
@@ -28,24 +43,6 @@ class Location:
         """Get the x-coordinate of the location."""
         return self.__x
 
-    def set_x(self, x: int) -> None:
-        """
-        Set the x-coordinate of the location.
-
-        Parameters:
-            x (int): The new x-coordinate of the location.
-        """
-        self.__x = x
-
     def get_y(self) -> int:
         """Get the y-coordinate of the location."""
         return self.__y
-
-    def set_y(self, y: int) -> None:
-        """
-        Set the y-coordinate of the location.
-
-        Parameters:
-            y (int): The new y-coordinate of the location.
-        """
-        self.__y = y
@@ -1,37 +1,403 @@
 from __future__ import annotations
 
-from typing import List, Optional, TYPE_CHECKING
+import random
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, TYPE_CHECKING
 
-from controller.config import Config
+from model.array_grid import ArrayGrid
+from model.bridge_index import BridgeIndex
 from model.environment import Environment
 from model.location import Location
+from model.obstacles import ObstacleMap
+from model.pathfinding import DistanceField, shared_pathfinder
 
 if TYPE_CHECKING:
     from model.agent import Agent
     from model.bridge import Bridge
 
+# 0, 1, 2, ... shared by every Mars; slicing a copy out is a memcpy, building one is not.
+_IDENTITY = array('i')
+
+
+def _identity(length: int) -> array:
+    global _IDENTITY
+    if len(_IDENTITY) < length:
+        _IDENTITY = array('i', range(length))
+    return _IDENTITY[:length]
+
 
 class Mars(Environment):
     """Represents an environment modeled after Mars."""
 
-    def __init__(self):
+    # Above this many cells, routing uses per-mover A* instead of shared distance fields:
+    # a field floods an area that grows with the square of the distance to the goal and
+    # is thrown away after every move, while A* on open ground expands about a straight line.
+    DISTANCE_FIELD_MAX_CELLS = 64 * 64
+    # Free-cell changes a world sharing its free-cell arrays with a fork queues before it
+    # takes its own copy; this also bounds what the next fork inherits.
+    FREE_EDIT_LIMIT = 4096
+
+    def __init__(self, width: Optional[int] = None, height: Optional[int] = None,
+                 array_backed: bool = False):
         """
         Initialise the Mars environment.
 
-        Initialises a grid with dimensions based on the world size specified in the Config module.
+        Args:
+            width (int, optional): Number of columns; defaults to Config.world_size.
+            height (int, optional): Number of rows; defaults to Config.world_size.
+            array_backed (bool): Also keep a typed-array mirror of occupancy and bridge state
+                (see ArrayGrid) that powers the vectorised queries.
         """
-        super().__init__()
+        super().__init__(width, height)
+        self.__width = self.get_width()
+        self.__height = self.get_height()
         self.__grid: List[List[Optional[Agent]]] = [
-            [None for _ in range(self.get_width())] for _ in range(self.get_height())
+            [None] * self.__width for _ in range(self.__height)
         ]
+        # After a fork, rows are shared with the other world until written; this holds the
+        # rows copied since, or None while every row is this world's own.
+        self.__owned_rows: Optional[set[int]] = None
+        # In a fork, id() of an original agent -> this world's counterpart, and back. The
+        # grid holds originals, also in rows the fork writes, so a fork of a fork needs
+        # just one alias per agent however deep it is. The originals are the agents of the
+        # first world in the chain that had them; __originals keeps them alive, so their
+        # ids cannot be reused.
+        self.__aliases: Optional[Dict[int, Agent]] = None
+        self.__originals: Dict[int, Agent] = {}
+        self.__use_distance_fields = self.__width * self.__height <= self.DISTANCE_FIELD_MAX_CELLS
+        self.__reset_free_cells()
+        self.__obstacles = ObstacleMap(self.__width, self.__height)
+        # The obstacle kinds while there are any, else None so hot paths skip the lookup.
+        self.__blocked: Optional[bytes] = None
 
         self.__bridges: dict[tuple[int, int], "Bridge"] = {}
+        self.__bridge_index = BridgeIndex(self.get_width(), self.get_height())
         self.mission_failed: bool = False
 
+        # Agent registry, keyed by id() because agents compare equal by location.
+        self.__agents_by_type: Dict[type, Dict[int, Agent]] = {}
+        self.__agent_cells: Dict[int, tuple[int, int]] = {}
+
+        # Shared distance fields keyed by goal cell, dropped whenever occupancy changes.
+        self.__distance_fields: Dict[tuple[int, int], DistanceField] = {}
+
+        # Flyweight Locations for canonical cells, created on first use.
+        self.__locations: Dict[int, Location] = {}
+
+        # Cells whose agent or bridge changed since the last consume_changes(), when tracking.
+        self.__changes: Optional[set[tuple[int, int]]] = None
+        self.__changes_everything = True
+
+        self.__arrays: Optional[ArrayGrid] = (
+            ArrayGrid(self.get_width(), self.get_height()) if array_backed else None
+        )
+
     def clear(self) -> None:
         """Clears all agents and bridges from the grid."""
-        self.__grid = [[None for _ in range(Config.world_size)] for _ in range(Config.world_size)]
+        self.__grid = [[None] * self.__width for _ in range(self.__height)]
+        self.__owned_rows = None
+        self.__aliases = None
+        self.__originals = {}
+        self.__reset_free_cells()
+        self.__obstacles = ObstacleMap(self.__width, self.__height)
+        self.__blocked = None
+        self.__distance_fields.clear()
         self.__bridges.clear()
+        self.__bridge_index.clear()
+        self.__agents_by_type.clear()
+        self.__agent_cells.clear()
+        self.__distance_fields.clear()
+        if self.__arrays is not None:
+            self.__arrays = ArrayGrid(self.get_width(), self.get_height())
+        if self.__changes is not None:
+            self.__changes.clear()
+            self.__changes_everything = True
+
+    def __reset_free_cells(self) -> None:
+        # Agent-free cells (as y * width + x) in no particular order, and each cell's index
+        # in that array or -1, so a cell is added or swap-removed in constant time.
+        cells = self.__width * self.__height
+        self.__free = _identity(cells)
+        self.__free_index = _identity(cells)
+        # While the two arrays are shared with a fork, changes are queued here instead: a
+        # cell freed, or ~cell for a cell taken. See __settle_free_cells.
+        self.__free_edits: Optional[array] = None
+
+    def __settle_free_cells(self) -> None:
+        # Copy the shared arrays and replay the queued edits, exactly as set_agent would
+        # have applied them; a taken cell was in the free set iff it holds no obstacle.
+        edits = self.__free_edits
+        if edits is None:
+            return
+        free = array('i', self.__free)
+        index = array('i', self.__free_index)
+        for cell in edits:
+            if cell >= 0:
+                index[cell] = len(free)
+                free.append(cell)
+            else:
+                cell = ~cell
+                position = index[cell]
+                last = free.pop()
+                if last != cell:
+                    free[position] = last
+                    index[last] = position
+                index[cell] = -1
+        self.__free = free
+        self.__free_index = index
+        self.__free_edits = None
+
+    def fork(self, agents: Dict[int, Agent]) -> Mars:
+        """
+        Returns a copy-on-write copy of this world, for exploring futures without copying it.
+
+        The fork starts out sharing every grid row, the free-cell arrays and the obstacle
+        layer with this world; either side copies a row the first time it writes to it, and
+        queues free-cell changes until it has enough of them to be worth copying the arrays
+        for. A fork therefore costs O(height) pointers plus O(agents + bridges), and the
+        price of the cells it changes afterwards. Bridges are mutable records that agents
+        change in place, so each fork gets its own copies. An array-backed world builds the
+        fork its own typed-array mirror, which costs O(cells).
+
+        Args:
+            agents (Dict[int, Agent]): Maps id() of every agent on this grid to the agent
+                standing in for it in the fork.
+
+        Returns:
+            Mars: The fork. Neither world sees the other's later changes.
+
+        Raises:
+            ValueError: If an agent on the grid has no counterpart in ``agents``.
+        """
+        child = Mars.__new__(Mars)
+        Environment.__init__(child, self.__width, self.__height)
+        child.__width = self.__width
+        child.__height = self.__height
+        child.__grid = list(self.__grid)
+        self.__owned_rows = set()
+        child.__owned_rows = set()
+
+        try:
+            child.__agents_by_type = {cls: {id(agents[key]): agents[key] for key in registered}
+                                      for cls, registered in self.__agents_by_type.items()}
+            child.__agent_cells = {id(agents[key]): cell for key, cell in self.__agent_cells.items()}
+        except KeyError:
+            raise ValueError("Every agent on the grid needs a counterpart in the fork") from None
+        child.__aliases = {}
+        child.__originals = {}
+        for registered in self.__agents_by_type.values():
+            for key, agent in registered.items():
+                original = self.__originals.get(key, agent)
+                child.__aliases[id(original)] = agents[key]
+                child.__originals[id(agents[key])] = original
+
+        child.__use_distance_fields = self.__use_distance_fields
+        child.__free = self.__free
+        child.__free_index = self.__free_index
+        if self.__free_edits is None:
+            self.__free_edits = array('i')
+        child.__free_edits = array('i', self.__free_edits)
+        child.__obstacles = self.__obstacles
+        child.__blocked = self.__blocked
+
+        child.__bridges = {}
+        for cell, bridge in self.__bridges.items():
+            twin = bridge.copy()
+            twin.world = child
+            child.__bridges[cell] = twin
+        child.__bridge_index = self.__bridge_index.fork(child.__bridges)
+        child.mission_failed = self.mission_failed
+        child.__distance_fields = {}
+        child.__locations = self.__locations
+        child.__changes = None
+        child.__changes_everything = True
+        child.__arrays = None
+        if self.__arrays is not None:
+            child.__arrays = ArrayGrid(self.__width, self.__height)
+            for key, (x, y) in child.__agent_cells.items():
+                child.__arrays.place(x, y, child.get_agent_at(x, y))
+            for (x, y), bridge in child.__bridges.items():
+                child.__arrays.update_bridge(x, y, bridge)
+        return child
+
+    @property
+    def obstacles(self) -> ObstacleMap:
+        """The static obstacle layer; an empty map unless set_obstacles was called."""
+        return self.__obstacles
+
+    def set_obstacles(self, obstacles: ObstacleMap) -> None:
+        """
+        Replace the static obstacle layer.
+
+        Obstacle cells are taken out of the free cells, so spawns never land on them, and
+        movers and routing treat them as permanently occupied.
+
+        Args:
+            obstacles (ObstacleMap): The new layer, of this world's size.
+
+        Raises:
+            ValueError: If the size differs or an obstacle would cover an agent.
+        """
+        if (obstacles.width, obstacles.height) != (self.__width, self.__height):
+            raise ValueError(f"Obstacle map is {obstacles.width}x{obstacles.height}, "
+                             f"world is {self.__width}x{self.__height}")
+        width = self.__width
+        grid = self.__grid
+        for cell in obstacles.cells():
+            if grid[cell // width][cell % width] is not None:
+                raise ValueError(f"Obstacle cell ({cell % width}, {cell // width}) holds an agent")
+        self.__settle_free_cells()
+        free = self.__free
+        index = self.__free_index
+        for cell in self.__obstacles.cells():
+            if grid[cell // width][cell % width] is None:
+                index[cell] = len(free)
+                free.append(cell)
+        for cell in obstacles.cells():
+            position = index[cell]
+            last = free.pop()
+            if last != cell:
+                free[position] = last
+                index[last] = position
+            index[cell] = -1
+        self.__obstacles = obstacles
+        self.__blocked = obstacles.kinds if obstacles.count else None
+        self.__distance_fields.clear()
+        if self.__changes is not None:
+            self.__changes_everything = True
+
+    def is_free_at(self, x: int, y: int) -> bool:
+        """
+        Returns True if already-wrapped cell (x, y) holds neither an agent nor an obstacle.
+
+        Args:
+            x (int): Column in the range [0, width).
+            y (int): Row in the range [0, height).
+        """
+        if self.__grid[y][x] is not None:
+            return False
+        blocked = self.__blocked
+        return blocked is None or not blocked[y * self.__width + x]
+
+    def reachable(self, start: Location, goal: Location) -> bool:
+        """
+        Returns False if obstacles wall the goal off from the start, in constant time.
+
+        Agents are not considered, so True only means a route may open up.
+        """
+        width = self.__width
+        height = self.__height
+        return self.__obstacles.connected(start.get_x() % width, start.get_y() % height,
+                                          goal.get_x() % width, goal.get_y() % height)
+
+    def free_cell_count(self) -> int:
+        """Returns the number of cells without an agent or obstacle."""
+        self.__settle_free_cells()
+        return len(self.__free)
+
+    def free_cell_order(self) -> array:
+        """Returns a copy of the free-cell array (cell indices y * width + x) in sampling order."""
+        self.__settle_free_cells()
+        return array('i', self.__free)
+
+    def set_free_cell_order(self, cells) -> None:
+        """
+        Put the free cells back in a previously saved sampling order, so that random draws
+        continue exactly as they would have (see controller.snapshot).
+
+        Args:
+            cells (Sequence[int]): The current free cells, as returned by free_cell_order.
+
+        Raises:
+            ValueError: If ``cells`` is not an ordering of exactly the current free cells.
+        """
+        self.__settle_free_cells()
+        order = array('i', cells)
+        index = array('i', [-1]) * (self.__width * self.__height)
+        try:
+            # Distinct, currently free and as many as are free: exactly the free cells.
+            if order and (min(order) < 0 or min(map(self.__free_index.__getitem__, order)) < 0):
+                raise IndexError
+            for position, cell in enumerate(order):
+                index[cell] = position
+        except IndexError:
+            raise ValueError("Not an ordering of the current free cells") from None
+        if len(order) != len(self.__free) or len(index) - index.count(-1) != len(order):
+            raise ValueError("Not an ordering of the current free cells")
+        self.__free = order
+        self.__free_index = index
+
+    def random_free_cell(self, rng: random.Random) -> Optional[Location]:
+        """
+        Returns a uniformly chosen cell without an agent in constant time, or None if the
+        grid is full.
+
+        Args:
+            rng (random.Random): Source of randomness, e.g. the simulation's own.
+        """
+        self.__settle_free_cells()
+        free = self.__free
+        if not free:
+            return None
+        y, x = divmod(free[rng.randrange(len(free))], self.__width)
+        return self.location(x, y)
+
+    def sample_free_cells(self, k: int, rng: random.Random,
+                          exclude: Iterable[tuple[int, int]] = ()) -> List[Location]:
+        """
+        Returns up to ``k`` distinct cells without an agent, chosen uniformly at random.
+
+        Costs O(k + len(exclude)) however full the grid is. Fewer than ``k`` cells are
+        returned only if fewer are free.
+
+        Args:
+            k (int): Number of cells wanted.
+            rng (random.Random): Source of randomness.
+            exclude (Iterable[tuple]): Wrapped (x, y) cells that must not be chosen even if free.
+        """
+        self.__settle_free_cells()
+        width = self.__width
+        free = self.__free
+        index = self.__free_index
+        excluded = {y * width + x for x, y in exclude}
+        excluded = {cell for cell in excluded if index[cell] >= 0}
+        picks = rng.sample(range(len(free)), min(len(free), k + len(excluded)))
+        cells = []
+        for pick in picks:
+            cell = free[pick]
+            if cell in excluded:
+                continue
+            cells.append(self.location(cell % width, cell // width))
+            if len(cells) == k:
+                break
+        return cells
+
+    def track_changes(self) -> None:
+        """
+        Start recording which cells change, for consumers such as an incremental renderer.
+
+        Until this is called no change set is kept, so headless runs pay nothing for it.
+        """
+        if self.__changes is None:
+            self.__changes = set()
+            self.__changes_everything = True
+
+    def consume_changes(self) -> Optional[set[tuple[int, int]]]:
+        """
+        Returns the wrapped cells whose agent or bridge changed since the previous call.
+
+        Returns:
+            Optional[set]: The changed (x, y) cells, or None if everything must be treated as
+            changed (tracking was just enabled, or the grid was cleared).
+        """
+        if self.__changes is None or self.__changes_everything:
+            self.__changes_everything = False
+            if self.__changes is not None:
+                self.__changes.clear()
+            return None
+        changes = self.__changes
+        self.__changes = set()
+        return changes
 
     def get_agent(self, location: Location) -> Optional[Agent, None]:
         """
@@ -44,12 +410,56 @@ class Mars(Environment):
             Optional[Agent, None]: The agent at the specified location, or None if the location is outside the grid.
         """
         if location:
-            wrapped_x = location.get_x() % Config.world_size
-            wrapped_y = location.get_y() % Config.world_size
-            return self.__grid[wrapped_y][wrapped_x]
+            x = location.get_x()
+            y = location.get_y()
+            if not 0 <= x < self.__width:
+                x %= self.__width
+            if not 0 <= y < self.__height:
+                y %= self.__height
+            agent = self.__grid[y][x]
+            if agent is not None and self.__aliases:
+                return self.__aliases.get(id(agent), agent)
+            return agent
 
         return None
 
+    def location(self, x: int, y: int) -> Location:
+        """
+        Returns the shared Location for a cell, wrapping the coordinates onto the grid.
+
+        Every call for the same cell returns the same instance, so hot loops can hand out
+        positions without allocating.
+
+        Args:
+            x (int): The x-coordinate, wrapped if outside [0, width).
+            y (int): The y-coordinate, wrapped if outside [0, height).
+        """
+        width = self.__width
+        height = self.__height
+        if not 0 <= x < width:
+            x %= width
+        if not 0 <= y < height:
+            y %= height
+        index = y * width + x
+        location = self.__locations.get(index)
+        if location is None:
+            location = Location(x, y)
+            self.__locations[index] = location
+        return location
+
+    def get_agent_at(self, x: int, y: int) -> Optional[Agent]:
+        """
+        Returns the agent at already-wrapped grid coordinates without allocating a Location.
+
+        Args:
+            x (int): Column in the range [0, width).
+            y (int): Row in the range [0, height).
+        """
+        agent = self.__grid[y][x]
+        if agent is not None and self.__aliases:
+            return self.__aliases.get(id(agent), agent)
+        return agent
+
     def get_adjacent_locations(self, location: Location) -> List[Location]:
         """
         Returns a list of adjacent positions on the grid, wrapping around the edges if necessary.
@@ -64,8 +474,7 @@ class Mars(Environment):
                       (-1, 0), (1, 0),
                       (-1, 1), (0, 1), (1, 1)]
         x, y = location.get_x(), location.get_y()
-        return [Location((x + dx) % self.get_width(), (y + dy) % self.get_height()) for dx, dy in
-                directions]
+        return [self.location(x + dx, y + dy) for dx, dy in directions]
 
     def get_free_adjacent_locations(self, location: Location) -> List[Location]:
         """
@@ -80,7 +489,7 @@ class Mars(Environment):
         adjacent_locations = self.get_adjacent_locations(location)
         free_locations = []
         for adjacent_location in adjacent_locations:
-            if self.get_agent(adjacent_location) is None:
+            if self.is_free_at(adjacent_location.get_x(), adjacent_location.get_y()):
                 free_locations.append(adjacent_location)
         return free_locations
 
@@ -93,30 +502,287 @@ class Mars(Environment):
             location (Location): The location where the agent should be placed.
         """
         if location:
-            wrapped_x = location.get_x() % Config.world_size
-            wrapped_y = location.get_y() % Config.world_size
-            self.__grid[wrapped_y][wrapped_x] = agent
+            wrapped_x = location.get_x()
+            wrapped_y = location.get_y()
+            if not 0 <= wrapped_x < self.__width:
+                wrapped_x %= self.__width
+            if not 0 <= wrapped_y < self.__height:
+                wrapped_y %= self.__height
+            row = self.__grid[wrapped_y]
+            occupant = row[wrapped_x]
+            if occupant is not None and self.__aliases:
+                occupant = self.__aliases.get(id(occupant), occupant)
+            if occupant is not agent:
+                if self.__distance_fields:
+                    self.__distance_fields.clear()
+                if self.__changes is not None:
+                    self.__changes.add((wrapped_x, wrapped_y))
+                cell = wrapped_y * self.__width + wrapped_x
+                edits = self.__free_edits
+                # Obstacle cells are never free, even when something walks over them.
+                if occupant is not None:
+                    self.__unregister(occupant, (wrapped_x, wrapped_y))
+                    if agent is None and (self.__blocked is None or not self.__blocked[cell]):
+                        if edits is not None:
+                            edits.append(cell)
+                        else:
+                            self.__free_index[cell] = len(self.__free)
+                            self.__free.append(cell)
+                elif edits is not None:
+                    if self.__blocked is None or not self.__blocked[cell]:
+                        edits.append(~cell)
+                else:
+                    free = self.__free
+                    index = self.__free_index
+                    position = index[cell]
+                    if position >= 0:
+                        last = free.pop()
+                        if last != cell:
+                            free[position] = last
+                            index[last] = position
+                        index[cell] = -1
+                if edits is not None and len(edits) >= self.FREE_EDIT_LIMIT:
+                    self.__settle_free_cells()
+            owned = self.__owned_rows
+            if owned is not None and wrapped_y not in owned:
+                row = row[:]
+                self.__grid[wrapped_y] = row
+                owned.add(wrapped_y)
+            row[wrapped_x] = self.__originals.get(id(agent), agent) if self.__originals else agent
+            if agent is not None:
+                self.__register(agent, (wrapped_x, wrapped_y))
+            if self.__arrays is not None:
+                self.__arrays.place(wrapped_x, wrapped_y, agent)
+
+    def __register(self, agent: Agent, cell: tuple[int, int]) -> None:
+        key = id(agent)
+        self.__agents_by_type.setdefault(getattr(agent, "role", type(agent)), {})[key] = agent
+        self.__agent_cells[key] = cell
+
+    def __unregister(self, agent: Agent, cell: tuple[int, int]) -> None:
+        # Only forget the agent if this cell is where it was last placed.
+        key = id(agent)
+        if self.__agent_cells.get(key) != cell:
+            return
+        del self.__agent_cells[key]
+        role = getattr(agent, "role", type(agent))
+        agents = self.__agents_by_type.get(role)
+        if agents is not None:
+            agents.pop(key, None)
+            if not agents:
+                del self.__agents_by_type[role]
+
+    def find_agents(self, agent_type: type) -> List[Agent]:
+        """
+        Returns every agent on the grid that is an instance of the given type.
+
+        Args:
+            agent_type (type): The agent class to look for; subclasses match too, as do hero
+                handles whose role matches.
+
+        Returns:
+            List[Agent]: Matching agents in placement order.
+        """
+        found: List[Agent] = []
+        for cls, agents in self.__agents_by_type.items():
+            if issubclass(cls, agent_type):
+                found.extend(agents.values())
+        return found
+
+    def find_agent(self, agent_type: type) -> Optional[Agent]:
+        """
+        Returns the first agent of the given type on the grid, or None.
+
+        Args:
+            agent_type (type): The agent class to look for; subclasses match too.
+        """
+        for cls, agents in self.__agents_by_type.items():
+            if issubclass(cls, agent_type) and agents:
+                return next(iter(agents.values()))
+        return None
+
+    def count_by_type(self) -> Dict[type, int]:
+        """
+        Returns the number of agents on the grid per concrete class; a hero handle counts
+        as its role.
+
+        Returns:
+            Dict[type, int]: Agent class mapped to its count.
+        """
+        return {cls: len(agents) for cls, agents in self.__agents_by_type.items()}
+
+    def get_agent_location(self, agent: Agent) -> Optional[Location]:
+        """
+        Returns the cell an agent was last placed on, or None if it is not on the grid.
+
+        Args:
+            agent (Agent): The agent to look up.
+        """
+        cell = self.__agent_cells.get(id(agent))
+        if cell is None:
+            return None
+        return self.location(cell[0], cell[1])
+
+
+    def distance_field(self, goal: Location) -> DistanceField:
+        """
+        Returns the shared distance field towards a goal cell for the current occupancy.
+
+        Fields are cached per goal cell and discarded the moment any cell changes occupant,
+        so every agent heading to the same bridge (or HQ) between moves reuses one flood.
+
+        Args:
+            goal (Location): The cell the field measures distances to.
+        """
+        cell = (goal.get_x() % self.get_width(), goal.get_y() % self.get_height())
+        field = self.__distance_fields.get(cell)
+        if field is None:
+            field = DistanceField(cell[0], cell[1], self)
+            self.__distance_fields[cell] = field
+        return field
+
+    def next_step_towards(self, start: Location, goal: Location) -> Optional[Location]:
+        """
+        Returns the free neighbouring cell that is one move closer to the goal.
+
+        Small worlds share a distance field per goal; large ones search with A* per mover
+        (see DISTANCE_FIELD_MAX_CELLS). Both take the same step: on routes of equal length,
+        the one whose first move comes first in pathfinding.DIRECTIONS.
+
+        Args:
+            start (Location): The cell the mover currently occupies.
+            goal (Location): The destination; it may itself be occupied.
 
+        Returns:
+            Optional[Location]: The next cell, or None if already there or no route exists.
+        """
+        if self.__blocked is not None and not self.reachable(start, goal):
+            return None
+        if not self.__use_distance_fields:
+            return shared_pathfinder.next_step(start, goal, self)
+        step = self.distance_field(goal).next_step(start.get_x() % self.get_width(),
+                                                   start.get_y() % self.get_height())
+        if step is None:
+            return None
+        return self.location(step[0], step[1])
 
     def add_bridge(self, bridge: "Bridge") -> None:
 
         location = bridge.location
-        wrapped_x = location.get_x() % Config.world_size
-        wrapped_y = location.get_y() % Config.world_size
+        wrapped_x = location.get_x() % self.__width
+        wrapped_y = location.get_y() % self.__height
+        previous = self.__bridges.get((wrapped_x, wrapped_y))
+        if previous is not None and previous is not bridge and previous.world is self:
+            previous.world = None
         self.__bridges[(wrapped_x, wrapped_y)] = bridge
+        bridge.world = self
+        self.__bridge_index.add((wrapped_x, wrapped_y), bridge)
+        if self.__changes is not None:
+            self.__changes.add((wrapped_x, wrapped_y))
+        if self.__arrays is not None:
+            self.__arrays.update_bridge(wrapped_x, wrapped_y, bridge)
 
     def get_bridge(self, location: Location) -> Optional["Bridge"]:
         if location:
-            wrapped_x = location.get_x() % Config.world_size
-            wrapped_y = location.get_y() % Config.world_size
+            wrapped_x = location.get_x() % self.__width
+            wrapped_y = location.get_y() % self.__height
             return self.__bridges.get((wrapped_x, wrapped_y))
         return None
 
     def remove_bridge(self, location: Location) -> None:
         if location:
-            wrapped_x = location.get_x() % Config.world_size
-            wrapped_y = location.get_y() % Config.world_size
-            self.__bridges.pop((wrapped_x, wrapped_y), None)
+            wrapped_x = location.get_x() % self.__width
+            wrapped_y = location.get_y() % self.__height
+            bridge = self.__bridges.pop((wrapped_x, wrapped_y), None)
+            if bridge is not None and bridge.world is self:
+                bridge.world = None
+            self.__bridge_index.remove((wrapped_x, wrapped_y))
+            if self.__changes is not None:
+                self.__changes.add((wrapped_x, wrapped_y))
+            if self.__arrays is not None:
+                self.__arrays.remove_bridge(wrapped_x, wrapped_y)
 
     def get_all_bridges(self) -> list["Bridge"]:
         return list(self.__bridges.values())
+
+    def bridge_changed(self, bridge: "Bridge") -> None:
+        """
+        Called by a Bridge on this world whenever its health or damaged flag changes.
+
+        Args:
+            bridge (Bridge): The bridge that changed.
+        """
+        location = bridge.location
+        cell = (location.get_x() % self.get_width(), location.get_y() % self.get_height())
+        self.__bridge_index.update(cell, bridge)
+        if self.__changes is not None:
+            self.__changes.add(cell)
+        if self.__arrays is not None:
+            self.__arrays.update_bridge(cell[0], cell[1], bridge)
+
+    def incomplete_bridges(self) -> list["Bridge"]:
+        """Returns the bridges that still need work (not complete, or damaged), in insertion order."""
+        return list(self.__bridge_index.incomplete.values())
+
+    def damaged_bridges(self) -> list["Bridge"]:
+        """Returns the bridges currently flagged as damaged."""
+        return list(self.__bridge_index.damaged.values())
+
+    def complete_bridges(self) -> list["Bridge"]:
+        """Returns the bridges that are complete and undamaged."""
+        return list(self.__bridge_index.complete.values())
+
+    def nearest_incomplete_bridge(self, location: Location,
+                                  accept: Optional[Callable[["Bridge"], bool]] = None) -> Optional["Bridge"]:
+        """
+        Returns the bridge needing work that is closest to a location (toroidal Manhattan).
+
+        Args:
+            location (Location): Where to measure from.
+            accept (Callable, optional): Extra filter applied to candidates.
+
+        Returns:
+            Optional[Bridge]: The closest accepted bridge, ties going to the earliest added.
+        """
+        return self.__bridge_index.nearest_incomplete(location.get_x() % self.get_width(),
+                                                      location.get_y() % self.get_height(), accept)
+
+    def bridge_work_version(self) -> int:
+        """Returns a counter that changes whenever a bridge starts or stops needing work."""
+        return self.__bridge_index.incomplete_version
+
+    def incomplete_bridge_centroid(self) -> Optional[Location]:
+        """Returns the mean position of the bridges needing work, or None if there are none."""
+        centroid = self.__bridge_index.incomplete_centroid()
+        if centroid is None:
+            return None
+        return self.location(centroid[0], centroid[1])
+
+    @property
+    def arrays(self) -> Optional[ArrayGrid]:
+        """The typed-array mirror of the grid, or None unless created with array_backed=True."""
+        return self.__arrays
+
+    def __require_arrays(self) -> ArrayGrid:
+        if self.__arrays is None:
+            raise RuntimeError("Vectorised queries need Mars(array_backed=True)")
+        return self.__arrays
+
+    def free_cell_mask(self) -> bytearray:
+        """
+        Returns a row-major mask (index ``y * width + x``) with 1 for every cell without an agent.
+        """
+        return self.__require_arrays().free_cell_mask()
+
+    def incomplete_bridge_mask(self) -> bytearray:
+        """
+        Returns a row-major mask with 1 for every cell holding a bridge that needs work:
+        not complete, or damaged, as in BridgeIndex.
+        """
+        return self.__require_arrays().incomplete_bridge_mask()
+
+    def type_counts(self) -> Dict[type, int]:
+        """
+        Returns the number of occupied cells per agent class, counted from the type-code grid.
+        """
+        return self.__require_arrays().type_counts()
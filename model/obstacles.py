@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from model.alien import Alien
+from model.rock import Rock
+
+# Kind code -> class stored in an ObstacleMap; 0 is open ground. Codes are saved in snapshots.
+OPEN = 0
+ROCK = 1
+ALIEN = 2
+OBSTACLE_TYPES = (None, Rock, Alien)
+
+# Maps every kind code to 1 and open ground to 0, in one C-level pass.
+_BLOCKED_TABLE = bytes([0] + [1] * 255)
+
+
+class ObstacleMap:
+    """
+    Immutable layer of static obstacles (rocks, aliens) on a toroidal grid.
+
+    Obstacles are kept apart from the agent grid: they never move, so they are stored as
+    one kind byte per cell (index ``y * width + x``) and the connected regions of open
+    ground are labelled once, when the map is built. Whether a goal can be reached at all
+    is then a label comparison instead of a flood that comes back empty.
+
+    Attributes:
+        width (int): Number of grid columns.
+        height (int): Number of grid rows.
+        kinds (bytes): Kind code per cell, OPEN for open ground.
+        count (int): Number of obstacle cells.
+        component_count (int): Number of 4-connected regions of open ground.
+    """
+
+    def __init__(self, width: int, height: int, kinds: Optional[bytes] = None) -> None:
+        """
+        Args:
+            width (int): Number of grid columns.
+            height (int): Number of grid rows.
+            kinds (bytes, optional): Kind code per cell; an empty map when omitted.
+
+        Raises:
+            ValueError: If ``kinds`` has the wrong length or holds an unknown kind code.
+        """
+        size = width * height
+        self.width = width
+        self.height = height
+        self.kinds = bytes(kinds) if kinds is not None else bytes(size)
+        if len(self.kinds) != size:
+            raise ValueError(f"Expected {size} obstacle cells, got {len(self.kinds)}")
+        if self.kinds and max(self.kinds) >= len(OBSTACLE_TYPES):
+            raise ValueError(f"Unknown obstacle kind {max(self.kinds)}")
+        self.count = size - self.kinds.count(OPEN)
+        # Without obstacles all open ground is one region and no labels are needed.
+        self.__labels: Optional[array] = None
+        self.component_count = 1 if size else 0
+        if self.count:
+            self.__labels, self.component_count = self.__label_components()
+
+    def kind_at(self, x: int, y: int) -> int:
+        """Returns the kind code at wrapped cell (x, y), OPEN if there is no obstacle."""
+        return self.kinds[y * self.width + x]
+
+    def is_blocked(self, x: int, y: int) -> bool:
+        """Returns True if wrapped cell (x, y) holds an obstacle."""
+        return self.kinds[y * self.width + x] != OPEN
+
+    def component(self, x: int, y: int) -> int:
+        """Returns the label of the open region holding wrapped cell (x, y), or -1 for an obstacle."""
+        if self.__labels is None:
+            return 0
+        return self.__labels[y * self.width + x]
+
+    def connected(self, ax: int, ay: int, bx: int, by: int) -> bool:
+        """
+        Returns True if some route over open ground joins two wrapped cells, in O(1).
+
+        Agents are ignored: they move, so a connected pair may still be blocked for now,
+        but a pair that is not connected can never be reached.
+        """
+        labels = self.__labels
+        if labels is None:
+            return True
+        width = self.width
+        label = labels[ay * width + ax]
+        return label >= 0 and label == labels[by * width + bx]
+
+    def cells(self) -> Iterator[int]:
+        """Yields the index of every obstacle cell, in row order."""
+        blocked = self.kinds.translate(_BLOCKED_TABLE)
+        cell = blocked.find(1)
+        while cell >= 0:
+            yield cell
+            cell = blocked.find(1, cell + 1)
+
+    def type_counts(self) -> Dict[type, int]:
+        """Returns the number of obstacle cells per obstacle class."""
+        return {cls: self.kinds.count(kind) for kind, cls in enumerate(OBSTACLE_TYPES)
+                if cls is not None and kind in self.kinds}
+
+    def __label_components(self) -> tuple:
+        # Union-find over runs of open cells within each row: a run joins the runs it
+        # overlaps in the row above, and the first and last run of a row join across the
+        # wrap, as do the last and first rows. The work is per run, not per cell.
+        width = self.width
+        height = self.height
+        blocked = self.kinds.translate(_BLOCKED_TABLE)
+        starts: List[int] = []
+        ends: List[int] = []
+        rows: List[range] = []
+        parent: List[int] = []
+
+        def find(run: int) -> int:
+            while parent[run] != run:
+                parent[run] = parent[parent[run]]
+                run = parent[run]
+            return run
+
+        def union(a: int, b: int) -> None:
+            a = find(a)
+            b = find(b)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+        def join_rows(above: range, below: range) -> None:
+            i = above.start
+            j = below.start
+            while i < above.stop and j < below.stop:
+                if starts[i] < ends[j] and starts[j] < ends[i]:
+                    union(i, j)
+                if ends[i] < ends[j]:
+                    i += 1
+                else:
+                    j += 1
+
+        for y in range(height):
+            row = blocked[y * width:(y + 1) * width]
+            first = len(starts)
+            x = row.find(0)
+            while x >= 0:
+                end = row.find(1, x)
+                if end < 0:
+                    end = width
+                parent.append(len(starts))
+                starts.append(x)
+                ends.append(end)
+                x = row.find(0, end) if end < width else -1
+            rows.append(range(first, len(starts)))
+            if len(rows[y]) > 1 and starts[first] == 0 and ends[-1] == width:
+                union(first, len(starts) - 1)
+            if y:
+                join_rows(rows[y - 1], rows[y])
+        if height > 1:
+            join_rows(rows[-1], rows[0])
+
+        labels = array('i', [-1]) * (width * height)
+        numbers: Dict[int, int] = {}
+        for y, runs in enumerate(rows):
+            base = y * width
+            for run in runs:
+                root = find(run)
+                label = numbers.setdefault(root, len(numbers))
+                labels[base + starts[run]:base + ends[run]] = array('i', [label]) * (ends[run] - starts[run])
+        return labels, len(numbers)
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import heapq
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from model.location import Location
+    from model.mars import Mars
+
+Cell = Tuple[int, int]
+
+DIRECTIONS: Tuple[Cell, ...] = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+class Pathfinder:
+    """
+    A* search over the toroidal Mars grid using 4-neighbour moves.
+
+    Occupied cells and obstacles are impassable except for the goal itself, matching the
+    rules the agents have always used; a goal that obstacles wall off is rejected from the
+    precomputed region labels without searching. Parent pointers are kept per cell
+    instead of copying the partial path into every frontier entry.
+
+    Among equally short paths the search prefers the one whose first move comes earliest
+    in DIRECTIONS, so next_step agrees with a breadth-first search and with DistanceField.
+
+    Attributes:
+        nodes_expanded (int): Running count of cells popped from the open set, for benchmarks.
+    """
+
+    def __init__(self) -> None:
+        self.nodes_expanded = 0
+
+    def reset_stats(self) -> None:
+        """Reset the node-expansion counter."""
+        self.nodes_expanded = 0
+
+    def find_path(self, start: Location, goal: Location, mars: 'Mars') -> List[Location]:
+        """
+        Return the shortest path from start to goal, excluding start and including goal.
+
+        Args:
+            start (Location): Where the search begins.
+            goal (Location): The target cell; it may be occupied.
+            mars (Mars): The grid to search.
+
+        Returns:
+            List[Location]: The steps to take, or an empty list if the goal is unreachable
+            or already reached.
+        """
+        result = self._search(start, goal, mars)
+        if result is None:
+            return []
+        parents, start_cell, cell = result
+        path: List[Location] = []
+        while cell != start_cell:
+            path.append(mars.location(cell[0], cell[1]))
+            cell = parents[cell]
+        path.reverse()
+        return path
+
+    def next_step(self, start: Location, goal: Location, mars: 'Mars') -> Optional[Location]:
+        """
+        Return only the first step of the shortest path from start to goal.
+
+        The parent chain is walked back from the goal without materialising the path.
+
+        Returns:
+            Optional[Location]: The next cell to move to, or None if there is no move.
+        """
+        result = self._search(start, goal, mars)
+        if result is None:
+            return None
+        parents, start_cell, cell = result
+        parent = parents[cell]
+        while parent != start_cell:
+            cell = parent
+            parent = parents[cell]
+        return mars.location(cell[0], cell[1])
+
+    def _search(self, start: Location, goal: Location,
+                mars: 'Mars') -> Optional[Tuple[Dict[Cell, Cell], Cell, Cell]]:
+        width = mars.get_width()
+        height = mars.get_height()
+        start_cell = (start.get_x() % width, start.get_y() % height)
+        goal_cell = (goal.get_x() % width, goal.get_y() % height)
+        if start_cell == goal_cell:
+            return None
+        obstacles = mars.obstacles
+        if not obstacles.connected(start_cell[0], start_cell[1], goal_cell[0], goal_cell[1]):
+            return None
+        blocked = obstacles.kinds if obstacles.count else None
+        gx, gy = goal_cell
+        get_agent_at = mars.get_agent_at
+
+        def heuristic(x: int, y: int) -> int:
+            dx = abs(x - gx)
+            dy = abs(y - gy)
+            return min(dx, width - dx) + min(dy, height - dy)
+
+        # Each cell's best (moves, DIRECTIONS index of the first move) in one int,
+        # moves * 4 + first, so comparing labels orders by length, then by first move;
+        # the start is expanded here, as the only cell whose moves set ``first``.
+        parents: Dict[Cell, Cell] = {}
+        labels: Dict[Cell, int] = {}
+        closed = {start_cell}
+        open_heap = []
+        counter = 0
+        sx, sy = start_cell
+        for first, (dx, dy) in enumerate(DIRECTIONS):
+            neighbour = nx, ny = (sx + dx) % width, (sy + dy) % height
+            if neighbour in labels:
+                continue
+            if neighbour != goal_cell and (get_agent_at(nx, ny) is not None or
+                                           blocked is not None and blocked[ny * width + nx]):
+                continue
+            labels[neighbour] = label = 4 + first
+            parents[neighbour] = start_cell
+            h = heuristic(nx, ny)
+            counter += 1
+            open_heap.append((label + h * 4, h, counter, neighbour))
+        heapq.heapify(open_heap)
+        # Ties on f are broken by first move, then towards the goal (lower h), then FIFO.
+        expanded = 1
+        try:
+            while open_heap:
+                _f, _h, _c, cell = heapq.heappop(open_heap)
+                if cell in closed:
+                    continue
+                if cell == goal_cell:
+                    return parents, start_cell, cell
+                closed.add(cell)
+                expanded += 1
+                cx, cy = cell
+                label = labels[cell] + 4
+                for dx, dy in DIRECTIONS:
+                    nx = (cx + dx) % width
+                    ny = (cy + dy) % height
+                    neighbour = (nx, ny)
+                    if neighbour in closed:
+                        continue
+                    if neighbour != goal_cell and (get_agent_at(nx, ny) is not None or
+                                                   blocked is not None and blocked[ny * width + nx]):
+                        continue
+                    if label < labels.get(neighbour, label + 1):
+                        labels[neighbour] = label
+                        parents[neighbour] = cell
+                        h = heuristic(nx, ny)
+                        counter += 1
+                        heapq.heappush(open_heap, (label + h * 4, h, counter, neighbour))
+            return None
+        finally:
+            self.nodes_expanded += expanded
+
+
+class DistanceField:
+    """
+    Reverse-BFS distances from every cell to one goal cell, flooded lazily.
+
+    Occupied cells receive a distance but are never expanded, so an agent standing on
+    an occupied cell can still read its own distance; obstacle cells get none. The flood
+    only runs as far as the queries made so far require and resumes from its frontier on
+    the next query.
+    A field is only valid for the occupancy it was built against; Mars discards it as
+    soon as any cell changes.
+    """
+
+    def __init__(self, goal_x: int, goal_y: int, mars: 'Mars') -> None:
+        self.width = mars.get_width()
+        self.height = mars.get_height()
+        self.goal = (goal_x, goal_y)
+        self.cells_expanded = 0
+        self._mars = mars
+        obstacles = mars.obstacles
+        self._blocked = obstacles.kinds if obstacles.count else None
+        self._distances = array('i', [-1]) * (self.width * self.height)
+        goal_index = goal_y * self.width + goal_x
+        self._distances[goal_index] = 0
+        self._frontier: deque[int] = deque([goal_index])
+
+    def distance(self, x: int, y: int) -> int:
+        """
+        Return the number of moves from wrapped cell (x, y) to the goal, or -1 if unreachable.
+        """
+        index = y * self.width + x
+        distances = self._distances
+        if distances[index] < 0 and self._frontier:
+            self._flood_until(index)
+        return distances[index]
+
+    def next_step(self, x: int, y: int) -> Optional[Cell]:
+        """
+        Return the neighbouring cell one move closer to the goal, or None if there is none.
+
+        Only free cells and the goal itself are eligible, as in Pathfinder.
+        """
+        if (x, y) == self.goal:
+            return None
+        d = self.distance(x, y)
+        if d <= 0:
+            return None
+        width = self.width
+        height = self.height
+        distances = self._distances
+        get_agent_at = self._mars.get_agent_at
+        for dx, dy in DIRECTIONS:
+            nx = (x + dx) % width
+            ny = (y + dy) % height
+            if distances[ny * width + nx] != d - 1:
+                continue
+            if (nx, ny) == self.goal or get_agent_at(nx, ny) is None:
+                return nx, ny
+        return None
+
+    def _flood_until(self, target: int) -> None:
+        width = self.width
+        height = self.height
+        distances = self._distances
+        frontier = self._frontier
+        get_agent_at = self._mars.get_agent_at
+        blocked = self._blocked
+        expanded = 0
+        while frontier and distances[target] < 0:
+            index = frontier.popleft()
+            expanded += 1
+            cy, cx = divmod(index, width)
+            d = distances[index] + 1
+            for dx, dy in DIRECTIONS:
+                nx = (cx + dx) % width
+                ny = (cy + dy) % height
+                n = ny * width + nx
+                if distances[n] >= 0 or blocked is not None and blocked[n]:
+                    continue
+                distances[n] = d
+                if get_agent_at(nx, ny) is None:
+                    frontier.append(n)
+        self.cells_expanded += expanded
+
+
+shared_pathfinder = Pathfinder()
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 import random
-from collections import deque
 from typing import List, Optional, TYPE_CHECKING
 
 from model.agent import Agent
 from model.location import Location
+from model.pathfinding import shared_pathfinder
 
 if TYPE_CHECKING:
     from model.mars import Mars
@@ -15,9 +15,14 @@ if TYPE_CHECKING:
 class SilverSurfer(Agent):
 
     max_energy: int = 100
+    # Cells moved towards the target bridge per step, and steps before it may pick that bridge again.
+    moves_per_step: int = 2
+    retarget_cooldown: int = 6
 
-    def __init__(self, location: Location) -> None:
+    def __init__(self, location: Location, rng: Optional[random.Random] = None) -> None:
         super().__init__(location)
+        # Owned by the simulation so runs are reproducible and independent of each other.
+        self.rng = rng if rng is not None else random.Random()
         self.energy = self.max_energy
         self.retreating = False
         self.last_target_xy: tuple[int, int] | None = None
@@ -40,60 +45,37 @@ class SilverSurfer(Agent):
         return dx + dy
 
     def bfs_path(self, start: Location, goal: Location, mars: 'Mars') -> List[Location]:
-        width = mars.get_width()
-        height = mars.get_height()
-        start_coords = (start.get_x(), start.get_y())
-        goal_coords = (goal.get_x(), goal.get_y())
-        visited = set([start_coords])
-        queue: deque[tuple[tuple[int, int], List[tuple[int, int]]]] = deque()
-        queue.append((start_coords, []))
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        while queue:
-            (cx, cy), path = queue.popleft()
-            if (cx, cy) == goal_coords:
-                return [Location(coords[0], coords[1]) for coords in path]
-            for dx, dy in directions:
-                nx = (cx + dx) % width
-                ny = (cy + dy) % height
-                if (nx, ny) not in visited:
-                    occupant = mars.get_agent(Location(nx, ny))
-                    if occupant is None or (nx, ny) == goal_coords:
-                        visited.add((nx, ny))
-                        queue.append(((nx, ny), path + [(nx, ny)]))
-        return []
+
+        return shared_pathfinder.find_path(start, goal, mars)
 
     def find_target_bridge(self, mars: 'Mars') -> Optional['Bridge']:
 
-        bridges = mars.get_all_bridges()
-        if not bridges:
-            return None
-        candidates: list['Bridge'] = []
-        for b in bridges:
+        width = mars.get_width()
+        height = mars.get_height()
 
-            if b.is_complete() or getattr(b, "damaged", False):
-                continue
+        def accept(b: 'Bridge') -> bool:
+            if getattr(b, "damaged", False):
+                return False
             occupant = mars.get_agent(b.location)
             if occupant is not None and not isinstance(occupant, SilverSurfer):
-                continue
+                return False
             if self.target_cooldown > 0 and self.last_target_xy is not None:
-                if (b.location.get_x() % mars.get_width(), b.location.get_y() % mars.get_height()) == self.last_target_xy:
-                    continue
-            candidates.append(b)
-        if not candidates:
-            return None
-        candidates.sort(key=lambda b: self.distance(self.get_location(), b.location, mars))
-        return candidates[0]
+                if (b.location.get_x() % width, b.location.get_y() % height) == self.last_target_xy:
+                    return False
+            return True
+
+        return mars.nearest_incomplete_bridge(self.get_location(), accept)
 
     def act(self, mars: 'Mars') -> None:
         if self.energy < 20:
             self.retreating = True
             self.energy = min(self.max_energy, self.energy + 5)
-            dir = random.choice([(-1,0),(1,0),(0,-1),(0,1)])
+            dir = self.rng.choice([(-1,0),(1,0),(0,-1),(0,1)])
             nx = (self.get_location().get_x() + dir[0]) % mars.get_width()
             ny = (self.get_location().get_y() + dir[1]) % mars.get_height()
-            if mars.get_agent(Location(nx, ny)) is None:
+            if mars.is_free_at(nx, ny):
                 mars.set_agent(None, self.get_location())
-                new_loc = Location(nx, ny)
+                new_loc = mars.location(nx, ny)
                 mars.set_agent(self, new_loc)
                 self.set_location(new_loc)
             if self.energy >= 40:
@@ -106,14 +88,13 @@ class SilverSurfer(Agent):
         if target_bridge is None:
             directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
             for _ in range(2):
-                random.shuffle(directions)
+                self.rng.shuffle(directions)
                 moved = False
                 for dx, dy in directions:
                     nx = (self.get_location().get_x() + dx) % mars.get_width()
                     ny = (self.get_location().get_y() + dy) % mars.get_height()
-                    new_loc = Location(nx, ny)
-                    occupant = mars.get_agent(new_loc)
-                    if occupant is None:
+                    new_loc = mars.location(nx, ny)
+                    if mars.is_free_at(nx, ny):
                         mars.set_agent(None, self.get_location())
                         mars.set_agent(self, new_loc)
                         self.set_location(new_loc)
@@ -123,18 +104,15 @@ class SilverSurfer(Agent):
                 if not moved:
                     break
             return
-        steps = 2
-        for _ in range(steps):
+        for _ in range(self.moves_per_step):
             if self.distance(self.get_location(), target_bridge.location, mars) == 0:
                 break
-            path = self.bfs_path(self.get_location(), target_bridge.location, mars)
-            if not path:
+            next_loc = mars.next_step_towards(self.get_location(), target_bridge.location)
+            if next_loc is None:
                 break
-            next_loc = path[0]
             mars.set_agent(None, self.get_location())
-            new_loc = Location(next_loc.get_x(), next_loc.get_y())
-            mars.set_agent(self, new_loc)
-            self.set_location(new_loc)
+            mars.set_agent(self, next_loc)
+            self.set_location(next_loc)
             self.energy = max(0, self.energy - 1)
         if self.at_same_cell(mars, target_bridge.location):
             if self.energy > 0:
@@ -144,4 +122,4 @@ class SilverSurfer(Agent):
                     target_bridge.location.get_x() % mars.get_width(),
                     target_bridge.location.get_y() % mars.get_height(),
                 )
-                self.target_cooldown = 6
\ No newline at end of file
+                self.target_cooldown = self.retarget_cooldown
\ No newline at end of file
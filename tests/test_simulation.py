@@ -1,10 +1,13 @@
 import unittest
 from model.location import Location
 from model.bridge import Bridge
-from model.hero import ReedRichards, SueStorm, JohnnyStorm, BenGrimm
+from model.bridge_index import BridgeIndex
+from model.hero import Hero, ReedRichards, SueStorm, JohnnyStorm, BenGrimm
 from model.silver_surfer import SilverSurfer
 from model.galactus import GalactusProjection
 from model.mars import Mars
+from model.pathfinding import Pathfinder
+from controller.engine import SimulationEngine
 
 class BaseSimTest(unittest.TestCase):
 
@@ -112,5 +115,1124 @@ class TestEnvironment(BaseSimTest):
                          "Location should wrap around grid size")
 
 
+# Location value type
+class TestLocation(BaseSimTest):
+    def test_locations_are_hashable_values(self):
+        self.assertEqual(Location(2, 3), Location(2, 3))
+        self.assertEqual(len({Location(2, 3), Location(2, 3), Location(3, 2)}), 2)
+        self.assertNotEqual(Location(2, 3), (2, 3))
+        with self.assertRaises(AttributeError):
+            Location(1, 1).extra = 5
+
+    def test_mars_hands_out_one_wrapped_instance_per_cell(self):
+        w, h = self.mars.get_width(), self.mars.get_height()
+        loc = self.mars.location(w + 1, -1)
+
+        self.assertEqual(loc, Location(1, h - 1))
+        self.assertIs(loc, self.mars.location(1, h - 1))
+
+        sue = SueStorm(loc)
+        self.mars.set_agent(sue, Location(1 - w, 2 * h - 1))
+        self.assertIs(self.mars.get_agent(loc), sue)
+
+
+# Agent registry
+class TestMarsRegistry(BaseSimTest):
+    def test_find_agents_tracks_moves_and_removals(self):
+        surfer = SilverSurfer(Location(2, 2))
+        self.mars.set_agent(surfer, surfer.get_location())
+        self.assertEqual(self.mars.find_agents(SilverSurfer), [surfer])
+
+        self.mars.set_agent(None, Location(2, 2))
+        self.mars.set_agent(surfer, Location(3, 2))
+        self.assertIs(self.mars.find_agent(SilverSurfer), surfer)
+        self.assertEqual(self.mars.get_agent_location(surfer), Location(3, 2))
+
+        self.mars.set_agent(None, Location(3, 2))
+        self.assertEqual(self.mars.find_agents(SilverSurfer), [])
+        self.assertIsNone(self.mars.get_agent_location(surfer))
+
+    def test_count_by_type_and_overwrite(self):
+        reed = ReedRichards(Location(1, 1))
+        sue = SueStorm(Location(1, 2))
+        self.mars.set_agent(reed, reed.get_location())
+        self.mars.set_agent(sue, sue.get_location())
+        self.assertEqual(self.mars.count_by_type(), {ReedRichards: 1, SueStorm: 1})
+
+        # Galactus-style overwrite removes the previous occupant from the index
+        gal = GalactusProjection(Location(1, 1), Location(0, 0))
+        self.mars.set_agent(gal, Location(1, 1))
+        self.assertEqual(self.mars.count_by_type(), {SueStorm: 1, GalactusProjection: 1})
+        self.assertEqual(self.mars.find_agents(Hero), [sue])
+
+
+# Pathfinding
+class TestPathfinder(BaseSimTest):
+    def test_path_wraps_around_the_edge(self):
+        finder = Pathfinder()
+        w = self.mars.get_width()
+        path = finder.find_path(Location(0, 0), Location(w - 2, 0), self.mars)
+
+        self.assertEqual(path, [Location(w - 1, 0), Location(w - 2, 0)])
+        self.assertGreater(finder.nodes_expanded, 0)
+
+    def test_routes_around_obstacles_and_matches_next_step(self):
+        finder = Pathfinder()
+        wall = [Location(2, y) for y in range(0, 5)]
+        for loc in wall:
+            self.mars.set_agent(ReedRichards(loc), loc)
+        start, goal = Location(1, 2), Location(3, 2)
+
+        path = finder.find_path(start, goal, self.mars)
+
+        self.assertEqual(len(path), 8)
+        self.assertEqual(path[-1], goal)
+        self.assertTrue(all(self.mars.get_agent(p) is None for p in path))
+        self.assertEqual(finder.next_step(start, goal, self.mars), path[0])
+
+    def test_equal_routes_start_with_the_first_direction(self):
+        # As a breadth-first search would: left, right, up, then down.
+        finder = Pathfinder()
+        start = Location(5, 5)
+        self.assertEqual(finder.next_step(start, Location(7, 7), self.mars), Location(6, 5))
+        self.assertEqual(finder.next_step(start, Location(3, 3), self.mars), Location(4, 5))
+        self.assertEqual(finder.next_step(start, Location(5, 3), self.mars), Location(5, 4))
+        # Around a blocker, stepping left is as short as stepping down towards it.
+        self.mars.set_agent(SueStorm(Location(7, 7)), Location(7, 7))
+        self.assertEqual(finder.next_step(Location(7, 5), Location(7, 8), self.mars), Location(6, 5))
+
+    def test_unreachable_goal_returns_empty(self):
+        start = Location(5, 5)
+        for loc in [Location(4, 5), Location(6, 5), Location(5, 4), Location(5, 6)]:
+            self.mars.set_agent(ReedRichards(loc), loc)
+
+        self.assertEqual(Pathfinder().find_path(start, Location(9, 9), self.mars), [])
+        self.assertIsNone(Pathfinder().next_step(start, Location(9, 9), self.mars))
+
+
+# Shared distance fields
+class TestDistanceField(BaseSimTest):
+    def test_field_is_shared_until_occupancy_changes(self):
+        goal = Location(3, 3)
+        field = self.mars.distance_field(goal)
+        self.assertIs(self.mars.distance_field(Location(3 + self.mars.get_width(), 3)), field)
+        self.assertEqual(field.distance(0, 0), 6)
+
+        self.mars.set_agent(SueStorm(Location(1, 1)), Location(1, 1))
+        self.assertIsNot(self.mars.distance_field(goal), field)
+
+    def test_next_step_moves_closer_and_avoids_agents(self):
+        goal = Location(5, 2)
+        blocker = Location(3, 2)
+        self.mars.set_agent(BenGrimm(blocker), blocker)
+        start = Location(2, 2)
+        self.mars.set_agent(SueStorm(start), start)
+
+        step = self.mars.next_step_towards(start, goal)
+
+        self.assertIsNotNone(step)
+        self.assertNotEqual(step, blocker)
+        field = self.mars.distance_field(goal)
+        self.assertEqual(field.distance(step.get_x(), step.get_y()),
+                         field.distance(start.get_x(), start.get_y()) - 1)
+        self.assertIsNone(self.mars.next_step_towards(goal, goal))
+
+
+    def test_fields_and_a_star_take_the_same_first_step(self):
+        from controller.config import Scenario
+        engine = SimulationEngine(seed=4, scenario=Scenario(width=24, height=24, rock_probability=0.2,
+                                                            heroes=(ReedRichards, SueStorm) * 8))
+        engine.run_steps(10)
+        mars = engine.mars
+        open_cells = [mars.location(x, y) for y in range(24) for x in range(24)
+                      if not mars.obstacles.kinds[y * 24 + x]]
+        pairs = [(start, goal) for start in open_cells[::7] for goal in open_cells[::11]]
+        with_fields = [mars.next_step_towards(start, goal) for start, goal in pairs]
+        mars._Mars__use_distance_fields = False
+        with_a_star = [mars.next_step_towards(start, goal) for start, goal in pairs]
+
+        self.assertGreater(sum(step is not None for step in with_fields), 1000)
+        self.assertEqual(with_fields, with_a_star)
+
+# Array-backed storage
+class TestArrayBackedMars(unittest.TestCase):
+    def setUp(self):
+        self.mars = Mars(array_backed=True)
+        self.width = self.mars.get_width()
+
+    def test_agent_arrays_follow_set_agent(self):
+        reed = ReedRichards(Location(2, 3))
+        self.mars.set_agent(reed, reed.get_location())
+        index = 3 * self.width + 2
+
+        self.assertEqual(self.mars.free_cell_mask()[index], 0)
+        self.assertEqual(sum(self.mars.free_cell_mask()), self.width * self.mars.get_height() - 1)
+        self.assertIs(self.mars.arrays.agent_for_id(self.mars.arrays.agent_ids[index]), reed)
+        self.assertEqual(self.mars.type_counts(), {ReedRichards: 1})
+
+        self.mars.set_agent(None, Location(2, 3))
+        self.assertEqual(self.mars.type_counts(), {})
+
+    def test_hero_handles_are_coded_by_role(self):
+        from model.hero_population import HeroPopulation
+        population = HeroPopulation(self.mars, (ReedRichards, SueStorm), ((2, 3), (5, 5)))
+
+        self.assertEqual(self.mars.type_counts(), {ReedRichards: 1, SueStorm: 1})
+        self.assertEqual(self.mars.count_by_type(), {ReedRichards: 1, SueStorm: 1})
+        self.assertEqual(self.mars.find_agents(SueStorm), [population.handles[1]])
+
+    def test_agent_ids_are_released_when_agents_leave(self):
+        arrays = self.mars.arrays
+        reed, sue = ReedRichards(Location(2, 3)), SueStorm(Location(5, 5))
+        self.mars.set_agent(reed, reed.get_location())
+        self.mars.set_agent(sue, sue.get_location())
+        reed_id = arrays.agent_id(reed)
+
+        self.mars.set_agent(None, Location(2, 3))
+        self.mars.set_agent(reed, Location(2, 4))
+        self.assertEqual(arrays.agent_id(reed), reed_id)
+
+        self.mars.set_agent(None, Location(2, 4))
+        self.assertEqual(arrays.agent_id(reed), 0)
+        self.assertIsNone(arrays.agent_for_id(reed_id))
+        ben = BenGrimm(Location(0, 0))
+        self.mars.set_agent(ben, ben.get_location())
+        self.assertEqual(arrays.agent_id(ben), reed_id)
+        self.assertNotEqual(arrays.agent_id(sue), reed_id)
+
+    def test_bridge_arrays_follow_repair_damage_and_removal(self):
+        bridge = Bridge(Location(4, 1), max_health=20)
+        self.mars.add_bridge(bridge)
+        index = 1 * self.width + 4
+        self.assertEqual(self.mars.incomplete_bridge_mask()[index], 1)
+
+        bridge.repair(20)
+        self.assertEqual(self.mars.arrays.bridge_health[index], 20)
+        self.assertEqual(self.mars.incomplete_bridge_mask()[index], 0)
+
+        bridge.damage(5)
+        self.assertEqual(self.mars.incomplete_bridge_mask()[index], 1)
+        self.assertEqual(self.mars.arrays.damaged_bridge_mask()[index], 1)
+
+        bridge.repair(20)
+        bridge.damage(0)
+        self.assertTrue(bridge.is_complete())
+        self.assertEqual(self.mars.incomplete_bridge_mask()[index], 1)
+
+        self.mars.remove_bridge(Location(4, 1))
+        self.assertEqual(sum(self.mars.incomplete_bridge_mask()), 0)
+
+    def test_queries_require_array_mode(self):
+        with self.assertRaises(RuntimeError):
+            Mars().free_cell_mask()
+
+
+class TestFreeCells(unittest.TestCase):
+    def free(self, mars):
+        return {(x, y) for y in range(mars.get_height()) for x in range(mars.get_width())
+                if mars.get_agent_at(x, y) is None}
+
+    def test_free_set_follows_moves(self):
+        import random
+        mars = Mars(width=6, height=5)
+        rng = random.Random(4)
+        heroes = []
+        for location in mars.sample_free_cells(12, rng):
+            heroes.append(ReedRichards(location))
+            mars.set_agent(heroes[-1], location)
+        for _ in range(200):
+            hero = rng.choice(heroes)
+            target = mars.random_free_cell(rng)
+            mars.set_agent(None, hero.get_location())
+            mars.set_agent(hero, target)
+            hero.set_location(target)
+        order = mars.free_cell_order()
+        self.assertEqual({(cell % 6, cell // 6) for cell in order}, self.free(mars))
+        self.assertEqual(len(order), mars.free_cell_count())
+
+    def test_sampling_is_distinct_and_respects_exclusions(self):
+        import random
+        mars = Mars(width=4, height=4)
+        rng = random.Random(1)
+        cells = mars.sample_free_cells(10, rng, exclude=[(0, 0), (1, 0)])
+        coords = {(c.get_x(), c.get_y()) for c in cells}
+        self.assertEqual(len(coords), 10)
+        self.assertFalse(coords & {(0, 0), (1, 0)})
+        self.assertEqual(len(mars.sample_free_cells(99, rng, exclude=[(0, 0)])), 15)
+
+    def test_full_grid_has_no_free_cell(self):
+        import random
+        mars = Mars(width=2, height=2)
+        for x, y in ((0, 0), (1, 0), (0, 1), (1, 1)):
+            mars.set_agent(ReedRichards(mars.location(x, y)), mars.location(x, y))
+        self.assertIsNone(mars.random_free_cell(random.Random(0)))
+        self.assertEqual(mars.sample_free_cells(3, random.Random(0)), [])
+
+    def test_restoring_an_order_checks_it(self):
+        mars = Mars(width=3, height=3)
+        mars.set_agent(ReedRichards(mars.location(1, 1)), mars.location(1, 1))
+        order = mars.free_cell_order()
+        mars.set_free_cell_order(reversed(order))
+        self.assertEqual(list(mars.free_cell_order()), list(reversed(order)))
+        for bad in ([0, 1, 2], list(order) + [4], [0] * len(order), [4] + list(order)[1:]):
+            with self.assertRaises(ValueError):
+                mars.set_free_cell_order(bad)
+
+
+class TestObstacles(unittest.TestCase):
+    def flood_labels(self, obstacles):
+        # Reference labelling: one BFS per region, cell by cell.
+        width, height = obstacles.width, obstacles.height
+        labels = {}
+        for start in range(width * height):
+            if obstacles.kinds[start] or start in labels:
+                continue
+            labels[start] = start
+            queue = [start]
+            while queue:
+                y, x = divmod(queue.pop(), width)
+                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                    n = (y + dy) % height * width + (x + dx) % width
+                    if not obstacles.kinds[n] and n not in labels:
+                        labels[n] = start
+                        queue.append(n)
+        return labels
+
+    def test_component_labels_match_a_flood_fill(self):
+        import random
+        from model.obstacles import ObstacleMap
+        rng = random.Random(5)
+        for width, height, share in ((7, 5, 0.45), (1, 6, 0.3), (9, 1, 0.3), (16, 16, 0.4), (12, 9, 0.6)):
+            kinds = bytes(1 if rng.random() < share else 0 for _ in range(width * height))
+            obstacles = ObstacleMap(width, height, kinds)
+            reference = self.flood_labels(obstacles)
+            cells = [(c % width, c // width) for c in range(width * height)]
+            for a in cells:
+                for b in cells:
+                    expected = (a[1] * width + a[0]) in reference and \
+                        reference.get(a[1] * width + a[0]) == reference.get(b[1] * width + b[0])
+                    self.assertEqual(obstacles.connected(*a, *b), expected)
+            self.assertEqual(obstacles.component_count, len(set(reference.values())))
+
+    def test_walled_off_goal_is_rejected_without_searching(self):
+        from model.obstacles import ROCK, ObstacleMap
+        mars = Mars(width=8, height=8)
+        kinds = bytearray(64)
+        for x, y in ((4, 3), (3, 4), (5, 4), (4, 5)):
+            kinds[y * 8 + x] = ROCK
+        mars.set_obstacles(ObstacleMap(8, 8, bytes(kinds)))
+        pathfinder = Pathfinder()
+        self.assertEqual(pathfinder.find_path(mars.location(0, 0), mars.location(4, 4), mars), [])
+        self.assertEqual(pathfinder.nodes_expanded, 0)
+        self.assertFalse(mars.reachable(mars.location(0, 0), mars.location(4, 4)))
+        self.assertIsNone(mars.next_step_towards(mars.location(0, 0), mars.location(4, 4)))
+
+        # Four moves on open ground; going round the ring of rocks takes eight.
+        path = pathfinder.find_path(mars.location(3, 3), mars.location(5, 5), mars)
+        self.assertEqual(len(path), 8)
+        self.assertFalse(any(mars.obstacles.is_blocked(c.get_x(), c.get_y()) for c in path))
+        self.assertEqual(mars.free_cell_count(), 60)
+        self.assertFalse(mars.is_free_at(4, 3))
+
+    def test_generated_rock_field(self):
+        from controller import snapshot
+        from controller.config import Scenario
+        scenario = Scenario(width=30, height=30, bridge_count=20, rock_probability=0.3, alien_probability=0.02)
+        engine = SimulationEngine(seed=3, scenario=scenario)
+        obstacles = engine.mars.obstacles
+        self.assertEqual(obstacles.count, 270 + 18)
+        hq = engine.mars.location(15, 15)
+        for bridge in engine.bridges:
+            self.assertTrue(engine.mars.reachable(hq, bridge.location))
+        engine.run_steps(30)
+        for agent in engine.heroes + [engine.surfer]:
+            location = agent.get_location()
+            self.assertFalse(obstacles.is_blocked(location.get_x(), location.get_y()))
+
+        restored = snapshot.load(snapshot.encode(engine))
+        self.assertEqual(restored.mars.obstacles.kinds, obstacles.kinds)
+        self.assertEqual(restored.scenario, scenario)
+        engine.run_steps(200)
+        restored.run_steps(200)
+        self.assertEqual(TestSnapshot.state(None, restored), TestSnapshot.state(None, engine))
+
+
+# Bridge work-queue index
+class TestBridgeIndex(BaseSimTest):
+    def test_sets_follow_repair_damage_and_removal(self):
+        bridge = Bridge(Location(2, 2), max_health=20)
+        self.mars.add_bridge(bridge)
+        self.assertEqual(self.mars.incomplete_bridges(), [bridge])
+
+        bridge.repair(20)
+        self.assertEqual(self.mars.incomplete_bridges(), [])
+        self.assertEqual(self.mars.complete_bridges(), [bridge])
+
+        bridge.damage(5)
+        self.assertEqual(self.mars.damaged_bridges(), [bridge])
+        self.assertEqual(self.mars.incomplete_bridges(), [bridge])
+
+        self.mars.remove_bridge(Location(2, 2))
+        self.assertEqual(self.mars.incomplete_bridges() + self.mars.damaged_bridges(), [])
+        self.assertIsNone(self.mars.incomplete_bridge_centroid())
+
+    def test_nearest_matches_brute_force_on_uneven_buckets(self):
+        import random
+        rng = random.Random(7)
+        width, height = 37, 23
+        index = BridgeIndex(width, height, bucket_size=5)
+        bridges = []
+        for _ in range(40):
+            cell = (rng.randrange(width), rng.randrange(height))
+            bridge = Bridge(Location(*cell))
+            index.add(cell, bridge)
+            bridges.append((cell, bridge))
+        live = {cell: bridge for cell, bridge in bridges}
+
+        def distance(cell, x, y):
+            dx, dy = abs(cell[0] - x), abs(cell[1] - y)
+            return min(dx, width - dx) + min(dy, height - dy)
+
+        for _ in range(200):
+            x, y = rng.randrange(width), rng.randrange(height)
+            expected = min(live.items(), key=lambda item: distance(item[0], x, y))[1]
+            self.assertIs(index.nearest_incomplete(x, y), expected)
+
+
+# Headless engine
+class TestSimulationEngine(unittest.TestCase):
+    def test_engine_does_not_import_tkinter(self):
+        import subprocess, sys
+        code = "import sys, controller.engine; sys.exit('tkinter' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code])
+        self.assertEqual(result.returncode, 0, "Engine must stay importable without tkinter")
+
+    def test_run_steps_advances_and_notifies(self):
+        engine = SimulationEngine()
+        seen = []
+        engine.add_observer(lambda e: seen.append(e.step_count))
+
+        executed = engine.run_steps(5)
+
+        self.assertEqual(executed, 5)
+        self.assertEqual(engine.step_count, 5)
+        self.assertEqual(seen, [1, 2, 3, 4, 5])
+
+    def test_run_until_done_stops_when_mission_ends(self):
+        engine = SimulationEngine()
+        done = engine.run_until_done(max_steps=5000)
+
+        self.assertTrue(done)
+        self.assertTrue(engine.mission_failed or engine.mission_completed)
+        self.assertFalse(engine.step(), "A finished engine must not advance")
+
+    def test_reset_regenerates_world(self):
+        engine = SimulationEngine()
+        engine.run_steps(30)
+        engine.reset()
+
+        self.assertEqual(engine.step_count, 0)
+        self.assertEqual(len(engine.heroes), 4)
+        self.assertEqual(len(engine.bridges), 7)
+        self.assertIsNone(engine.surfer)
+
+
+# Energy sharing
+class TestEnergySharing(unittest.TestCase):
+    @staticmethod
+    def _pairwise(heroes, width, height):
+        for a in heroes:
+            for b in heroes:
+                if a is b:
+                    continue
+                dx = abs(a.get_location().get_x() - b.get_location().get_x())
+                dy = abs(a.get_location().get_y() - b.get_location().get_y())
+                dx, dy = min(dx, width - dx), min(dy, height - dy)
+                if dx + dy == 1 and a.energy - b.energy >= 20 and a.energy > 20 and b.energy < b.max_energy:
+                    give = min(10, a.energy - b.energy)
+                    a.energy -= give
+                    b.energy = min(b.max_energy, b.energy + give)
+
+    def test_matches_all_pairs_transfer_order(self):
+        import random
+        rng = random.Random(11)
+        engine = SimulationEngine()
+        w, h = engine.mars.get_width(), engine.mars.get_height()
+        for _ in range(25):
+            # Clustered heroes so most of them have several neighbours
+            engine.heroes = [cls(Location(rng.randrange(5), rng.randrange(5)))
+                             for cls in [ReedRichards, SueStorm, JohnnyStorm, BenGrimm] * 4]
+            for hero in engine.heroes:
+                hero.energy = rng.randint(0, 100)
+            expected = [hero.energy for hero in engine.heroes]
+            twins = [type(hero)(hero.get_location()) for hero in engine.heroes]
+            for twin, energy in zip(twins, expected):
+                twin.energy = energy
+            self._pairwise(twins, w, h)
+
+            engine._share_energy()
+
+            self.assertEqual([hero.energy for hero in engine.heroes], [t.energy for t in twins])
+
+
+# Seeded RNG
+class TestSeededEngine(unittest.TestCase):
+    @staticmethod
+    def _trace(engine, steps):
+        trace = []
+        for _ in range(steps):
+            engine.step()
+            trace.append(tuple((h.get_location(), h.energy) for h in engine.heroes)
+                         + ((engine.surfer.get_location(),) if engine.surfer else ()))
+        return trace
+
+    def test_same_seed_replays_exactly_even_when_interleaved(self):
+        a, b, c = SimulationEngine(seed=42), SimulationEngine(seed=42), SimulationEngine(seed=7)
+        trace_a, trace_b = [], []
+        for _ in range(40):
+            trace_a += self._trace(a, 1)
+            self._trace(c, 1)  # an unrelated world stepping in between must not interfere
+            trace_b += self._trace(b, 1)
+
+        self.assertEqual(trace_a, trace_b)
+        self.assertEqual([br.location for br in a.bridges], [br.location for br in b.bridges])
+
+    def test_reset_with_seed_replays_and_unseeded_records_seed(self):
+        engine = SimulationEngine()
+        self.assertIsInstance(engine.seed, int)
+        seed = engine.seed
+        first = self._trace(engine, 30)
+
+        engine.reset(seed=seed)
+        self.assertEqual(self._trace(engine, 30), first)
+
+
+# Incremental renderer
+class TestWorldRenderer(unittest.TestCase):
+    def test_incremental_frames_match_a_full_redraw(self):
+        from view.headless_canvas import HeadlessCanvas
+        from view.renderer import WorldRenderer
+        engine = SimulationEngine(seed=5)
+        canvas = HeadlessCanvas()
+        renderer = WorldRenderer(canvas, engine.mars, {})
+        renderer.render()
+        cells = engine.mars.get_width() * engine.mars.get_height()
+
+        for _ in range(30):
+            engine.step()
+            before = dict(canvas.calls)
+            renderer.render()
+            created = sum(canvas.calls.get(k, 0) - before.get(k, 0)
+                          for k in canvas.calls if k.startswith("create_"))
+            self.assertLess(created, cells, "Steady-state frames must not recreate the grid")
+
+            fresh = HeadlessCanvas()
+            WorldRenderer(fresh, engine.mars, {}).render()
+            self.assertEqual(canvas.snapshot(), fresh.snapshot())
+
+    def test_reset_triggers_full_refresh(self):
+        from view.headless_canvas import HeadlessCanvas
+        from view.renderer import WorldRenderer
+        engine = SimulationEngine(seed=5)
+        canvas = HeadlessCanvas()
+        renderer = WorldRenderer(canvas, engine.mars, {})
+        renderer.render()
+        engine.run_steps(20)
+        engine.reset(seed=6)
+        renderer.render()
+
+        fresh = HeadlessCanvas()
+        WorldRenderer(fresh, engine.mars, {}).render()
+        self.assertEqual(canvas.snapshot(), fresh.snapshot())
+
+    def test_array_storage_draws_and_counts_heroes_by_role(self):
+        from controller.config import Scenario
+        from view.headless_canvas import HeadlessCanvas
+        from view.renderer import WorldRenderer
+        colours = {ReedRichards: "#60a5fa", SueStorm: "#f472b6", JohnnyStorm: "#fb923c", BenGrimm: "#facc15"}
+        frames = []
+        for storage in ("objects", "arrays"):
+            engine = SimulationEngine(seed=8, scenario=Scenario(hero_storage=storage))
+            canvas = HeadlessCanvas()
+            renderer = WorldRenderer(canvas, engine.mars, colours)
+            renderer.render()
+            engine.run_steps(10)
+            renderer.render()
+            # The legend is built from count_by_type.
+            frames.append((canvas.snapshot(), engine.mars.count_by_type(),
+                           len(engine.mars.find_agents(ReedRichards))))
+        objects, arrays = frames
+        self.assertEqual(arrays[0], objects[0])
+        self.assertEqual(arrays[1], objects[1])
+        self.assertEqual(arrays[2], 1)
+        self.assertTrue(any(kind == "polygon" for kind, _coords, _fill in arrays[0]))
+
+
+# Per-instance world size
+class TestScenario(unittest.TestCase):
+    def test_worlds_of_different_sizes_coexist(self):
+        small = Mars(5, 3)
+        wide = Mars(40, 7)
+        self.assertEqual((small.get_width(), small.get_height()), (5, 3))
+        hero = ReedRichards(Location(0, 0))
+        small.set_agent(hero, Location(6, -1))
+        self.assertIs(small.get_agent(Location(1, 2)), hero)
+        wide.set_agent(hero, Location(41, 8))
+        self.assertIs(wide.get_agent(Location(1, 1)), hero)
+        bridge = Bridge(Location(-1, 0))
+        wide.add_bridge(bridge)
+        self.assertIs(wide.get_bridge(Location(39, 7)), bridge)
+        self.assertIsNone(small.get_bridge(Location(39, 7)))
+
+    def test_engine_uses_scenario(self):
+        from controller.config import Scenario
+        scenario = Scenario(width=30, height=12, bridge_count=15, surfer_spawn_step=3,
+                            galactus_spawn_step=5, heroes=(BenGrimm,) * 6)
+        engine = SimulationEngine(seed=2, scenario=scenario)
+        self.assertEqual((engine.mars.get_width(), engine.mars.get_height()), (30, 12))
+        self.assertEqual(len(engine.bridges), 15)
+        self.assertEqual(len(engine.heroes), 6)
+        cells = {(h.get_location().get_x(), h.get_location().get_y()) for h in engine.heroes}
+        self.assertEqual(len(cells), 6)
+        engine.run_steps(5)
+        self.assertIsNotNone(engine.surfer)
+        self.assertIsNotNone(engine.galactus)
+        self.assertEqual(engine.galactus.get_location(), Location(29, 11))
+
+    def test_overfull_scenario_is_rejected(self):
+        from controller.config import Scenario
+        with self.assertRaises(ValueError):
+            SimulationEngine(seed=0, scenario=Scenario(width=3, height=3, bridge_count=5))
+
+    def test_large_world_steps(self):
+        from controller.config import Scenario
+        engine = SimulationEngine(seed=1, scenario=Scenario(width=1000, height=1000, bridge_count=50))
+        self.assertEqual(engine.run_steps(30), 30)
+        for hero in engine.heroes:
+            self.assertIs(engine.mars.get_agent(hero.get_location()), hero)
+
+
+# Struct-of-arrays heroes
+class TestHeroPopulation(unittest.TestCase):
+    def snapshot(self, engine):
+        return (engine.step_count, engine.status_reason,
+                [(h.energy, h.get_location().get_x(), h.get_location().get_y()) for h in engine.heroes])
+
+    def test_arrays_match_objects(self):
+        from controller.config import Scenario
+        rosters = [None, (ReedRichards, SueStorm, JohnnyStorm, BenGrimm) * 5]
+        for roster in rosters:
+            for seed in range(4):
+                runs = []
+                for storage in ("objects", "arrays"):
+                    engine = SimulationEngine(seed=seed, scenario=Scenario(
+                        width=30, height=30, heroes=roster, hero_storage=storage))
+                    engine.run_until_done(150)
+                    runs.append(self.snapshot(engine))
+                self.assertEqual(runs[0], runs[1], f"seed {seed}")
+
+    def test_handles_expose_hero_api(self):
+        from controller.config import Scenario
+        engine = SimulationEngine(seed=3, scenario=Scenario(hero_storage="arrays"))
+        handle = engine.heroes[3]
+        self.assertEqual((handle.name, handle.repair_rate, handle.max_energy), ("Ben", 20, 100))
+        self.assertIs(engine.mars.get_agent(handle.get_location()), handle)
+        handle.energy = 42
+        self.assertEqual(engine.hero_population.energy[3], 42)
+        self.assertEqual(repr(handle), "Ben(energy=42)")
+
+    def test_unknown_role_is_rejected(self):
+        from controller.config import Scenario
+        with self.assertRaises(ValueError):
+            SimulationEngine(seed=0, scenario=Scenario(heroes=(SilverSurfer,), hero_storage="arrays"))
+
+
+# Wake-time hero scheduling
+class TestHeroScheduler(unittest.TestCase):
+    def test_due_skips_sleepers_until_their_step(self):
+        from controller.scheduler import AgentScheduler
+        scheduler = AgentScheduler(4)
+        self.assertEqual(list(scheduler.due(0)), [0, 1, 2, 3])
+        scheduler.sleep(1, 3)
+        scheduler.sleep(2, None)
+        self.assertEqual(list(scheduler.due(1)), [0, 3])
+        self.assertEqual(list(scheduler.due(3)), [0, 1, 3])
+        scheduler.sleep(1, 9)
+        scheduler.wake(1)
+        self.assertEqual(list(scheduler.due(4)), [0, 1, 3])
+        scheduler.wake_all()
+        self.assertEqual((list(scheduler.due(5)), scheduler.sleeping), ([0, 1, 2, 3], 0))
+
+    def test_sleeping_heroes_change_nothing(self):
+        from controller.config import Scenario
+        for storage in ("objects", "arrays"):
+            for seed in range(3):
+                runs = []
+                for scheduled in (True, False):
+                    engine = SimulationEngine(seed=seed, scenario=Scenario(
+                        width=20, height=20, bridge_count=0, surfer_spawn_step=5,
+                        galactus_spawn_step=60, hero_storage=storage))
+                    if not scheduled:
+                        engine.hero_scheduler.sleep = lambda index, until: None
+                    slept = 0
+                    while engine.step_count < 300 and not engine.mission_failed:
+                        engine.step()
+                        slept += engine.hero_scheduler.sleeping
+                    runs.append((engine.step_count, engine.status_reason,
+                                 [(h.energy, h.get_location().get_x(), h.get_location().get_y())
+                                  for h in engine.heroes]))
+                    if scheduled:
+                        self.assertGreater(slept, 0)
+                self.assertEqual(runs[0], runs[1], f"{storage} seed {seed}")
+
+    def test_fast_forward_matches_single_stepping(self):
+        from controller import snapshot
+        from controller.config import Scenario
+        scenarios = (Scenario(), Scenario(rock_probability=0.15),
+                     # No bridges: heroes sleep from the start, so run_steps jumps to the Surfer.
+                     Scenario(width=20, height=20, bridge_count=0, surfer_spawn_step=80, galactus_spawn_step=150))
+        for storage in ("objects", "arrays"):
+            quiet = 0
+            for scenario in scenarios:
+                scenario = scenario._replace(hero_storage=storage)
+                for seed in range(4):
+                    fast = SimulationEngine(seed=seed, scenario=scenario)
+                    stepped = SimulationEngine(seed=seed, scenario=scenario)
+                    stepped.fast_forward = False
+                    fast.run_until_done(1000)
+                    stepped.run_until_done(1000)
+                    self.assertEqual(snapshot.encode(fast), snapshot.encode(stepped), f"{storage} seed {seed}")
+                    self.assertEqual(stepped.quiet_steps, 0)
+                    quiet += fast.quiet_steps
+            self.assertGreater(quiet, 100)
+
+
+# Copy-on-write forks
+class TestFork(unittest.TestCase):
+    def state(self, engine):
+        mars = engine.mars
+        return (engine.step_count, engine.status_reason,
+                [(h.energy, h.get_location().get_x(), h.get_location().get_y()) for h in engine.heroes],
+                [(b.health, b.damaged, b.world is mars) for b in engine.bridges],
+                list(mars.free_cell_order()),
+                [(x, y, type(mars.get_agent_at(x, y)).__name__) for y in range(mars.get_height())
+                 for x in range(mars.get_width()) if mars.get_agent_at(x, y) is not None])
+
+    def test_forks_continue_as_the_parent_would(self):
+        from controller.config import Scenario
+        for storage in ("objects", "arrays"):
+            for seed, at in ((1, 0), (2, 8), (3, 20)):
+                scenario = Scenario(hero_storage=storage, rock_probability=0.2, galactus_spawn_step=40)
+                reference = SimulationEngine(seed=seed, scenario=scenario)
+                reference.run_until_done(at)
+                reference.run_until_done(400)
+                parent = SimulationEngine(seed=seed, scenario=scenario)
+                parent.run_until_done(at)
+                first = parent.fork()
+                grandchild = first.fork()
+                first.run_steps(3)
+                late = first.fork()
+                for engine in (grandchild, late, first, parent):
+                    engine.run_until_done(400)
+                    self.assertEqual(self.state(engine), self.state(reference), f"{storage} seed {seed}")
+
+    def test_writes_on_either_side_stay_there(self):
+        engine = SimulationEngine(seed=4)
+        engine.run_steps(14)
+        before = self.state(engine)
+        fork = engine.fork()
+        mars = fork.mars
+        hero = fork.heroes[0]
+        target = mars.get_free_adjacent_locations(hero.get_location())[0]
+        mars.set_agent(None, hero.get_location())
+        mars.set_agent(hero, target)
+        hero.set_location(target)
+        hero.energy = 1
+        fork.bridges[0].damage(30)
+        self.assertIs(mars.get_agent(target), hero)
+        self.assertEqual(self.state(engine), before)
+
+        forked = self.state(fork)
+        engine.run_steps(5)
+        self.assertEqual(self.state(fork), forked)
+
+    def test_fork_chains_alias_straight_to_the_originals(self):
+        engine = SimulationEngine(seed=5)
+        engine.run_steps(14)
+        for _ in range(6):
+            engine.run_steps(2)
+            engine = engine.fork()
+            mars = engine.mars
+            self.assertEqual(len(mars._Mars__aliases), sum(mars.count_by_type().values()))
+            for hero in engine.heroes:
+                if mars.get_agent_location(hero) is not None:
+                    self.assertIs(mars.get_agent(hero.get_location()), hero)
+
+    def test_queued_free_cell_changes_settle_in_order(self):
+        import random
+        limit = Mars.FREE_EDIT_LIMIT
+        Mars.FREE_EDIT_LIMIT = 8
+        try:
+            plain = Mars(width=9, height=7)
+            forked = Mars(width=9, height=7)
+            heroes = {}
+            for world in (plain, forked):
+                rng = random.Random(3)
+                heroes[id(world)] = []
+                for location in world.sample_free_cells(10, rng):
+                    heroes[id(world)].append(ReedRichards(location))
+                    world.set_agent(heroes[id(world)][-1], location)
+            child = forked.fork({id(h): ReedRichards(h.get_location()) for h in heroes[id(forked)]})
+            for world in (plain, forked):
+                rng = random.Random(5)
+                for _ in range(30):
+                    hero = rng.choice(heroes[id(world)])
+                    target = rng.choice(world.get_free_adjacent_locations(hero.get_location()))
+                    world.set_agent(None, hero.get_location())
+                    world.set_agent(hero, target)
+                    hero.set_location(target)
+            self.assertEqual(list(forked.free_cell_order()), list(plain.free_cell_order()))
+            self.assertEqual(child.free_cell_count(), 63 - 10)
+        finally:
+            Mars.FREE_EDIT_LIMIT = limit
+
+
+# Binary snapshots
+class TestSnapshot(unittest.TestCase):
+    def state(self, engine):
+        return (engine.step_count, engine.status_reason, engine.mission_failed, engine.mission_completed,
+                [(h.energy, h.get_location().get_x(), h.get_location().get_y()) for h in engine.heroes],
+                [(b.health, b.damaged) for b in engine.bridges])
+
+    def test_restored_run_continues_identically(self):
+        from controller import snapshot
+        from controller.config import Scenario
+        for storage in ("objects", "arrays"):
+            for seed, steps in ((1, 5), (2, 14), (3, 30)):
+                original = SimulationEngine(seed=seed, scenario=Scenario(hero_storage=storage))
+                original.run_steps(steps)
+                restored = snapshot.load(snapshot.encode(original))
+                self.assertEqual(self.state(restored), self.state(original))
+                original.run_until_done(2000)
+                restored.run_until_done(2000)
+                self.assertEqual(self.state(restored), self.state(original))
+
+    def test_restore_before_the_surfer_spawns_keeps_free_cell_order(self):
+        from controller import snapshot
+        original = SimulationEngine(seed=9)
+        original.run_steps(3)
+        self.assertIsNone(original.surfer)
+        restored = snapshot.load(snapshot.encode(original))
+        self.assertEqual(list(restored.mars.free_cell_order()), list(original.mars.free_cell_order()))
+        original.run_until_done(2000)
+        restored.run_until_done(2000)
+        self.assertEqual(self.state(restored), self.state(original))
+
+    def test_file_round_trip_and_in_place_restore(self):
+        import os
+        import tempfile
+        from controller import snapshot
+        engine = SimulationEngine(seed=6)
+        engine.run_steps(25)
+        expected = self.state(engine)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "mid.snap")
+            self.assertGreater(snapshot.save(engine, path), 0)
+            loaded = snapshot.load(path)
+            self.assertEqual(self.state(loaded), expected)
+
+            other = SimulationEngine(seed=99)
+            notified = []
+            other.add_observer(notified.append)
+            snapshot.restore(other, snapshot.decode(snapshot.encode(engine)))
+            self.assertEqual(self.state(other), expected)
+            self.assertEqual(notified, [other])
+            self.assertEqual(other.mars.count_by_type(), engine.mars.count_by_type())
+
+    def test_rejects_foreign_data(self):
+        from controller import snapshot
+        from controller.config import Scenario
+        data = bytearray(snapshot.encode(SimulationEngine(seed=0)))
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.decode(b"not a snapshot at all" * 8)
+        data[8] = 99
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.decode(bytes(data))
+        small = SimulationEngine(seed=0, scenario=Scenario(width=10, height=10))
+        with self.assertRaises(snapshot.SnapshotError):
+            snapshot.restore(small, snapshot.decode(snapshot.encode(SimulationEngine(seed=0))))
+
+
+class TestRecorder(unittest.TestCase):
+    def state(self, engine):
+        mars = engine.mars
+        return (engine.step_count, engine.status_reason, engine.mission_failed, engine.mission_completed,
+                [(h.energy, h.get_location().get_x(), h.get_location().get_y()) for h in engine.heroes],
+                [(b.health, b.damaged) for b in engine.bridges],
+                sorted((cls.__name__, n) for cls, n in mars.count_by_type().items()))
+
+    def test_seek_matches_live_run_in_any_order(self):
+        import os
+        import random
+        import tempfile
+        from controller.config import Scenario
+        from controller.recorder import Recorder, Replay
+        with tempfile.TemporaryDirectory() as folder:
+            for storage in ("objects", "arrays"):
+                path = os.path.join(folder, f"{storage}.rec")
+                engine = SimulationEngine(seed=4, scenario=Scenario(hero_storage=storage))
+                recorder = Recorder(engine, path, keyframe_interval=10)
+                states = [self.state(engine)]
+                while not engine.is_done():
+                    engine.step()
+                    states.append(self.state(engine))
+                recorder.close()
+
+                replay = Replay(path)
+                self.assertEqual((replay.first_step, replay.last_step), (0, len(states) - 1))
+                steps = list(range(len(states)))
+                random.Random(0).shuffle(steps)
+                for step in steps + list(range(len(states))):
+                    self.assertEqual(self.state(replay.seek(step)), states[step])
+
+    def test_reset_starts_a_new_run_and_truncated_tail_is_ignored(self):
+        import os
+        import tempfile
+        from controller.recorder import Recorder, Replay
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "runs.rec")
+            engine = SimulationEngine(seed=1)
+            recorder = Recorder(engine, path)
+            engine.run_steps(8)
+            first = self.state(engine)
+            engine.reset(seed=2)
+            engine.run_steps(5)
+            recorder.close()
+            with open(path, "ab") as handle:
+                handle.write(b"\x02\x00\x00\x00partial")
+
+            self.assertEqual(len(Replay(path).runs), 2)
+            self.assertEqual(Replay(path).last_step, 5)
+            self.assertEqual(self.state(Replay(path, run=0).seek(8)), first)
+
+            shown = SimulationEngine(seed=9)
+            notified = []
+            shown.add_observer(notified.append)
+            Replay(path).seek(3, engine=shown)
+            self.assertEqual(shown.step_count, 3)
+            self.assertTrue(notified)
+
+
+class TestTickProfiler(unittest.TestCase):
+    def test_engine_times_each_phase_only_while_enabled(self):
+        import json
+        from controller.profiling import TickProfiler
+        engine = SimulationEngine(seed=3)
+        engine.profiler = TickProfiler()
+        engine.run_steps(10)
+        phases = engine.profiler.phases
+        for phase in ("surfer_spawn", "galactus_spawn", "heroes", "share_energy", "surfer",
+                      "galactus", "mission_checks"):
+            self.assertEqual(phases[phase].count, 10)
+        self.assertEqual(engine.profiler.ticks, 10)
+        self.assertEqual(phases["heroes.ReedRichards"].count, 10)
+
+        engine.profiler.enabled = False
+        self.assertEqual(engine.run_steps(5), 5)
+        self.assertEqual(engine.profiler.ticks, 10)
+        report = json.loads(engine.profiler.to_json())
+        self.assertEqual(report["phases"]["heroes"]["count"], 10)
+        self.assertIn("per tick", engine.profiler.summary())
+
+    def test_histogram_percentiles_are_bucket_upper_bounds(self):
+        from controller.profiling import PhaseStats
+        stats = PhaseStats()
+        for ns in [100] * 98 + [5000, 70000]:
+            stats.add(ns)
+        self.assertEqual((stats.min_ns, stats.max_ns, stats.count), (100, 70000, 100))
+        self.assertEqual(stats.percentile(0.5), 127)
+        self.assertEqual(stats.percentile(0.99), 8191)
+        self.assertEqual(stats.percentile(1.0), 70000)
+        self.assertEqual(stats.to_dict()["histogram"], {"127": 98, "8191": 1, "131071": 1})
+
+
+class TestSweep(unittest.TestCase):
+    def test_sweep_caches_runs_and_restores_classes(self):
+        import os
+        import tempfile
+        from controller import sweep
+        points = sweep.grid({"Hero.repair_rate": [5, 20], "surfer_spawn_step": [12]})
+        self.assertEqual(points, [{"Hero.repair_rate": 5, "surfer_spawn_step": 12},
+                                  {"Hero.repair_rate": 20, "surfer_spawn_step": 12}])
+        with tempfile.TemporaryDirectory() as folder:
+            first = sweep.sweep(points, cache_dir=folder, workers=1, min_seeds=4, max_seeds=8,
+                                batch_seeds=4, half_width=0.5)
+            self.assertEqual(Hero.repair_rate, 10)
+            self.assertNotIn("repair_rate", ReedRichards.__dict__)
+            self.assertEqual([p.runs for p in first], [4, 4])
+
+            # A narrower target reuses the four cached seeds and only runs the next four.
+            cached = sweep.ResultCache(folder)
+            self.assertEqual(len(cached.load(points[0], 5000, sweep.Scenario())), 4)
+            second = sweep.sweep(points, cache_dir=folder, workers=1, min_seeds=4, max_seeds=8,
+                                 batch_seeds=4, half_width=0.01)
+            self.assertEqual([p.runs for p in second], [8, 8])
+            files = os.listdir(cached.directory)
+            self.assertEqual(len(files), 2)
+            with open(os.path.join(cached.directory, files[0])) as handle:
+                self.assertEqual(len(handle.readlines()), 8)
+
+            expected = sweep.run_point(points[1], range(8))
+            self.assertEqual(second[1].completed, sum(r.outcome == "completed" for r in expected))
+
+    def test_wilson_interval_and_validation(self):
+        from controller import sweep
+        low, high = sweep.wilson_interval(50, 100)
+        self.assertAlmostEqual(low, 0.4038, places=3)
+        self.assertAlmostEqual(high, 0.5962, places=3)
+        self.assertEqual(sweep.wilson_interval(0, 0), (0.0, 1.0))
+        with self.assertRaises(ValueError):
+            sweep.validate({"Hero.nonexistent": 1})
+        with self.assertRaises(ValueError):
+            sweep.validate({"heroes": 1})
+
+    def test_grid_mode_rejects_float_ranges(self):
+        import contextlib
+        import io
+        from controller import sweep
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit):
+            sweep.main(["--param", "Hero.recharge_amount=5.0:10.0", "--cache", ""])
+        self.assertIn("--samples", stderr.getvalue())
+
+    def test_code_version_covers_the_controller_modules_runs_use(self):
+        import os
+        from controller import sweep
+        sources = sweep.controller_sources()
+        for name in ("engine", "batch", "config", "scheduler", "profiling"):
+            self.assertIn(os.path.join("controller", name + ".py"), sources)
+        self.assertNotIn(os.path.join("controller", "sweep.py"), sources)
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_compare_flags_only_regressions_beyond_threshold(self):
+        from benchmarks.suite import compare
+        baseline = {"cases": {"a": {"relative": 1.0}, "b": {"relative": 2.0}, "gone": {"relative": 1.0}}}
+        current = {"cases": {"a": {"relative": 1.2}, "b": {"relative": 2.6}, "new": {"relative": 9.0}}}
+        regressions = compare(current, baseline, threshold=25.0)
+        self.assertEqual([name for name, _ in regressions], ["b"])
+        self.assertAlmostEqual(regressions[0][1], 30.0)
+
+    def test_every_case_sets_up_and_runs(self):
+        from benchmarks.suite import cases
+        names = set()
+        for case in cases():
+            self.assertNotIn(case.name, names)
+            names.add(case.name)
+            if case.name.endswith("/20") or "/20/" in case.name:
+                case.setup()()
+        self.assertTrue(any(name.startswith("render_incremental") for name in names))
+
+
+# Turbo pacing
+class TestAdaptiveStepBatch(unittest.TestCase):
+    def test_batch_grows_towards_budget_at_most_doubling(self):
+        from controller.pacing import AdaptiveStepBatch
+        batch = AdaptiveStepBatch()
+        # 1 step took 0.1 ms against a 20 ms budget: ideal is 200, growth is capped at 2x.
+        self.assertEqual(batch.record(1, 0.0001, 20.0), 2)
+        for _ in range(10):
+            batch.record(batch.steps, batch.steps * 0.0001, 20.0)
+        self.assertEqual(batch.steps, 200)
+
+    def test_batch_shrinks_when_steps_get_slow(self):
+        from controller.pacing import AdaptiveStepBatch
+        batch = AdaptiveStepBatch(initial=64)
+        self.assertEqual(batch.record(64, 1.0, 20.0), 32)
+        self.assertEqual(batch.record(0, 0.0, 20.0), 32)
+        batch = AdaptiveStepBatch(initial=1)
+        self.assertEqual(batch.record(1, 1.0, 20.0), 1)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestFixedTimestepClock(unittest.TestCase):
+    def test_deadlines_do_not_drift_with_tick_cost(self):
+        from controller.pacing import FixedTimestepClock
+        clock = FakeClock()
+        timestep = FixedTimestepClock(10.0, clock=clock)
+        ran = 0
+        # Every tick fires 30 ms late; the schedule still averages exactly 10 steps/s.
+        for _ in range(100):
+            clock.now += timestep.delay_ms() / 1000.0 + 0.03
+            ran += timestep.due()
+        self.assertEqual(ran, int(clock.now * 10))
+        self.assertAlmostEqual(timestep.lag_ms, 30.0, delta=1.0)
+
+    def test_catch_up_is_capped(self):
+        from controller.pacing import FixedTimestepClock
+        clock = FakeClock()
+        timestep = FixedTimestepClock(10.0, max_catch_up=3, clock=clock)
+        clock.now = 2.0
+        self.assertEqual(timestep.due(), 3)
+        self.assertEqual(timestep.due(), 0)
+        self.assertAlmostEqual(timestep.delay_ms(), 100.0)
+
+    def test_rate_meter_reports_window_rate(self):
+        from controller.pacing import RateMeter
+        clock = FakeClock()
+        meter = RateMeter(window_s=1.0, clock=clock)
+        for _ in range(21):
+            meter.record(1)
+            clock.now += 0.05
+        clock.now -= 0.05
+        self.assertAlmostEqual(meter.rate(), 20.0)
+
+
+# Batch runner
+class TestBatchRunner(unittest.TestCase):
+    def test_pool_results_match_inline_runs(self):
+        from controller.batch import iter_results
+        seeds = range(6)
+        inline = sorted(iter_results(seeds, workers=1, max_steps=300))
+        pooled = sorted(iter_results(seeds, workers=2, max_steps=300, chunk_size=2))
+
+        self.assertEqual(len(inline), 6)
+        self.assertEqual(inline, pooled)
+        self.assertTrue(all(r.outcome in ("completed", "failed", "timeout") for r in inline))
+
+    def test_run_batch_streams_table_and_summary(self):
+        import io
+        from controller.batch import run_batch
+        out = io.StringIO()
+        outcomes = run_batch(3, workers=1, max_steps=300, out=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[0].startswith("seed\toutcome"))
+        self.assertTrue(lines[-1].startswith("# runs=3"))
+        self.assertEqual(sum(outcomes.values()), 3)
+
+    def test_summary_counts_heroes_off_the_grid(self):
+        from controller.batch import summarise
+        from controller.config import Scenario
+        for storage in ("objects", "arrays"):
+            engine = SimulationEngine(seed=2, scenario=Scenario(hero_storage=storage))
+            reed, sue = engine.heroes[:2]
+            engine.mars.set_agent(sue, reed.get_location())
+            engine.heroes[2].energy = 0
+
+            result = summarise(engine, 2)
+
+            self.assertEqual(result.heroes_with_energy, 3)
+            self.assertEqual(result.hero_energy, sum(hero.energy for hero in engine.heroes))
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
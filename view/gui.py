@@ -1,30 +1,26 @@
 from __future__ import annotations
 
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
 from typing import TYPE_CHECKING, Optional
 
 from controller.config import Config
+from controller.snapshot import SnapshotError
 from model.location import Location
+from view.renderer import (
+    BACKGROUND_EMPTY, BRIDGE_BUILDING, BRIDGE_COMPLETE, BRIDGE_DAMAGED, DARK_BG, WorldRenderer,
+)
 
 if TYPE_CHECKING:
+    from controller.profiling import TickProfiler
     from model.environment import Environment
     from controller.simulator import Simulator
 
-DARK_BG          = "#0b1220"
 PANEL_BG         = "#0f172a"
 PANEL_ACCENT     = "#172554"
 TEXT_PRIMARY     = "#e2e8f0"
 TEXT_MUTED       = "#94a3b8"
 
-GRID_LINE        = "#334155"
-AGENT_OUTLINE    = "#0ea5e9"
-
-BRIDGE_COMPLETE  = "#10b981"
-BRIDGE_DAMAGED   = "#f97316"
-BRIDGE_BUILDING  = "#facc15"
-BACKGROUND_EMPTY = DARK_BG
-
 
 class Gui(tk.Tk):
     def __init__(self, environment: Environment, agent_colours: dict, simulator: Optional['Simulator'] = None):
@@ -38,126 +34,51 @@ class Gui(tk.Tk):
         self.stats_labels: dict[str, tk.Label] = {}
         self.pause_button: Optional[tk.Button] = None
         self.reset_button: Optional[tk.Button] = None
+        self.turbo_button: Optional[tk.Button] = None
+        self.run_to_end_button: Optional[tk.Button] = None
+        self.record_button: Optional[tk.Button] = None
+        self.replay_button: Optional[tk.Button] = None
+        self.profile_button: Optional[tk.Button] = None
+        self.save_profile_button: Optional[tk.Button] = None
+        self.replay_frame: Optional[ttk.Frame] = None
+        self.replay_scale: Optional[ttk.Scale] = None
+        self.__syncing_replay_scale = False
         self.speed_scale: Optional[ttk.Scale] = None
         self.speed_value_label: Optional[ttk.Label] = None
 
         self.grid_container: Optional[ttk.Frame] = None
         self.world_canvas: Optional[tk.Canvas] = None
+        self.__renderer: Optional[WorldRenderer] = None
+        self.__legend_counts: Optional[dict] = None
 
         self.__init_gui()
         self.__init_layout()
 
     def render(self) -> None:
+        profiler = getattr(self.simulator, "profiler", None)
+        if profiler is not None and profiler.enabled:
+            profiler.time("render", lambda: self.__render(profiler))
+        else:
+            self.__render(None)
+
+    def __render(self, profiler: Optional[TickProfiler]) -> None:
+        def timed(phase: str, func) -> None:
+            if profiler is None:
+                func()
+            else:
+                profiler.time(phase, func)
+
         if self.simulator:
-            self._update_stats()
-        self.update_legends()
+            timed("render.stats", self._update_stats)
+        timed("render.legends", self.update_legends)
 
         if not self.world_canvas:
             return
-        self.world_canvas.delete("all")
-
-        W = self.__environment.get_width()
-        H = self.__environment.get_height()
-
-        cw = int(self.world_canvas.winfo_width() or 800)
-        ch = int(self.world_canvas.winfo_height() or 800)
-        size = min(cw, ch)
-        cell = size / max(W, H)
-
-        ox = (cw - size) / 2.0
-        oy = (ch - size) / 2.0
-
-        for i in range(W + 1):
-            x = ox + i * cell
-            self.world_canvas.create_line(x, oy, x, oy + H * cell, fill=GRID_LINE)
-        for j in range(H + 1):
-            y = oy + j * cell
-            self.world_canvas.create_line(ox, y, ox + W * cell, y, fill=GRID_LINE)
-
-        get_bridge = getattr(self.__environment, 'get_bridge', None)
-        has_bridge_api = callable(get_bridge)
-
-        for r in range(H):
-            for c in range(W):
-                loc = Location(c, r)
-                bridge = get_bridge(loc) if has_bridge_api else None
-                if bridge:
-                    if bridge.is_complete():
-                        bg = BRIDGE_COMPLETE
-                    elif getattr(bridge, "damaged", False):
-                        bg = BRIDGE_DAMAGED
-                    else:
-                        bg = BRIDGE_BUILDING
-                else:
-                    bg = BACKGROUND_EMPTY
-
-                x0 = ox + c * cell
-                y0 = oy + r * cell
-                x1 = x0 + cell
-                y1 = y0 + cell
-                self.world_canvas.create_rectangle(x0, y0, x1, y1, fill=bg, outline=GRID_LINE)
-
-        pad = max(2, int(cell * 0.25))
-        for r in range(H):
-            for c in range(W):
-                agent = self.__environment.get_agent(Location(c, r))
-                if not agent:
-                    continue
-                agent_cls = agent.__class__
-                col = self.__agent_colours.get(agent_cls, "#38bdf8")
-                x0 = ox + c * cell + pad
-                y0 = oy + r * cell + pad
-                x1 = ox + (c + 1) * cell - pad
-                y1 = oy + (r + 1) * cell - pad
-                w = x1 - x0
-                h = y1 - y0
-                cx = x0 + w / 2.0
-                cy = y0 + h / 2.0
-                if agent_cls.__name__ == "ReedRichards":
-                    self.world_canvas.create_rectangle(x0, y0, x1, y1, fill=col, outline=AGENT_OUTLINE, width=1.0)
-                elif agent_cls.__name__ == "SueStorm":
-                    points = [
-                        (cx, y0),
-                        (x1, y1),
-                        (x0, y1),
-                    ]
-                    self.world_canvas.create_polygon(points, fill=col, outline=AGENT_OUTLINE)
-                elif agent_cls.__name__ == "JohnnyStorm":
-                    points = [
-                        (cx, y0),
-                        (x1, cy),
-                        (cx, y1),
-                        (x0, cy),
-                    ]
-                    self.world_canvas.create_polygon(points, fill=col, outline=AGENT_OUTLINE)
-                elif agent_cls.__name__ == "BenGrimm":
-                    points = [
-                        (x0 + w * 0.25, y0),
-                        (x0 + w * 0.75, y0),
-                        (x1, y0 + h * 0.5),
-                        (x0 + w * 0.75, y1),
-                        (x0 + w * 0.25, y1),
-                        (x0, y0 + h * 0.5),
-                    ]
-                    self.world_canvas.create_polygon(points, fill=col, outline=AGENT_OUTLINE)
-                elif agent_cls.__name__ == "SilverSurfer":
-                    self.world_canvas.create_oval(x0, y0, x1, y1, fill=col, outline=AGENT_OUTLINE, width=1.0)
-                elif agent_cls.__name__ == "GalactusProjection":
-                    t = min(w, h) * 0.3
-                    half_t = t / 2.0
-                    points = [
-                        (cx - half_t, y0), (cx + half_t, y0),
-                        (cx + half_t, cy - half_t), (x1, cy - half_t),
-                        (x1, cy + half_t), (cx + half_t, cy + half_t),
-                        (cx + half_t, y1), (cx - half_t, y1),
-                        (cx - half_t, cy + half_t), (x0, cy + half_t),
-                        (x0, cy - half_t), (cx - half_t, cy - half_t)
-                    ]
-                    self.world_canvas.create_polygon(points, fill=col, outline=AGENT_OUTLINE)
-                else:
-                    self.world_canvas.create_oval(x0, y0, x1, y1, fill=col, outline=AGENT_OUTLINE, width=1.0)
-
-        self.update_idletasks()
+        if self.__renderer is None:
+            self.__renderer = WorldRenderer(self.world_canvas, self.__environment, self.__agent_colours)
+        timed("render.world", self.__renderer.render)
+
+        timed("render.idletasks", self.update_idletasks)
 
     def __init_gui(self):
         self.title(Config.simulation_name)
@@ -198,7 +119,7 @@ class Gui(tk.Tk):
         stats.grid(row=0, column=0, sticky="w", padx=(0, 12))
         title = ttk.Label(stats, text="Mission Telemetry", style="Dark.TLabel", font=("", 12, "bold"))
         title.pack(anchor="w", pady=(0, 6))
-        for key in ["Step", "Bridges", "Heroes", "Surfer", "Galactus", "Status"]:
+        for key in ["Step", "Rate", "Profile", "Bridges", "Heroes", "Surfer", "Galactus", "Status"]:
             lbl = ttk.Label(stats, text=f"{key}: ?", style="Dark.TLabel", font=("", 10))
             lbl.pack(anchor="w", pady=1)
             self.stats_labels[key] = lbl
@@ -209,6 +130,19 @@ class Gui(tk.Tk):
         self.pause_button.pack(side=tk.LEFT, padx=4)
         self.reset_button = ttk.Button(controls, text="Reset", style="Dark.TButton", command=self.reset_simulation)
         self.reset_button.pack(side=tk.LEFT, padx=4)
+        self.turbo_button = ttk.Button(controls, text="Turbo: off", style="Dark.TButton", command=self.toggle_turbo)
+        self.turbo_button.pack(side=tk.LEFT, padx=4)
+        self.run_to_end_button = ttk.Button(controls, text="Run to end", style="Dark.TButton", command=self.run_to_end)
+        self.run_to_end_button.pack(side=tk.LEFT, padx=4)
+        self.record_button = ttk.Button(controls, text="Record: off", style="Dark.TButton", command=self.toggle_recording)
+        self.record_button.pack(side=tk.LEFT, padx=4)
+        self.replay_button = ttk.Button(controls, text="Replay...", style="Dark.TButton", command=self.toggle_replay)
+        self.replay_button.pack(side=tk.LEFT, padx=4)
+        self.profile_button = ttk.Button(controls, text="Profile: off", style="Dark.TButton", command=self.toggle_profiling)
+        self.profile_button.pack(side=tk.LEFT, padx=4)
+        self.save_profile_button = ttk.Button(controls, text="Save profile...", style="Dark.TButton",
+                                              command=self.save_profile)
+        self.save_profile_button.pack(side=tk.LEFT, padx=4)
 
         ttk.Label(controls, text="Speed", style="Dark.TLabel").pack(side=tk.LEFT, padx=(10, 4))
         self.speed_scale = ttk.Scale(
@@ -222,6 +156,13 @@ class Gui(tk.Tk):
                                            style="Muted.TLabel")
         self.speed_value_label.pack(side=tk.LEFT)
 
+        # Shown only while replaying a recording; dragging it seeks.
+        self.replay_frame = ttk.Frame(top, style="Dark.TFrame")
+        ttk.Label(self.replay_frame, text="Replay step", style="Dark.TLabel").pack(side=tk.LEFT, padx=(0, 4))
+        self.replay_scale = ttk.Scale(self.replay_frame, from_=0, to=1, orient=tk.HORIZONTAL,
+                                      command=self.on_replay_seek, length=480)
+        self.replay_scale.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
         legend_frame = ttk.Frame(self, style="Dark.TFrame", padding=(12, 6))
         legend_frame.grid(row=1, column=0, sticky="ew")
         ttk.Label(legend_frame, text="Bridge status:", style="Dark.TLabel", font=("", 10, "bold")).pack(side=tk.LEFT, padx=(0, 8))
@@ -257,18 +198,32 @@ class Gui(tk.Tk):
             h = self.grid_container.winfo_height()
             size = min(w, h)
             self.world_canvas.config(width=size, height=size)
+            if self.__renderer is not None:
+                self.__renderer.invalidate()
             self.render()
 
         self.grid_container.bind("<Configure>", _resize)
 
     def update_legends(self):
-        counts = {}
-        for r in range(self.__environment.get_height()):
-            for c in range(self.__environment.get_width()):
-                a = self.__environment.get_agent(Location(c, r))
-                if a:
-                    cls = a.__class__
-                    counts[cls] = counts.get(cls, 0) + 1
+        count_by_type = getattr(self.__environment, 'count_by_type', None)
+        if callable(count_by_type):
+            counts = count_by_type()
+            obstacles = getattr(self.__environment, "obstacles", None)
+            if obstacles is not None and obstacles.count:
+                counts.update(obstacles.type_counts())
+        else:
+            counts = {}
+            for r in range(self.__environment.get_height()):
+                for c in range(self.__environment.get_width()):
+                    a = self.__environment.get_agent(Location(c, r))
+                    if a:
+                        cls = getattr(a, "role", a.__class__)
+                        counts[cls] = counts.get(cls, 0) + 1
+
+        # Rebuilding the legend widgets is expensive, so only do it when the counts change.
+        if counts == self.__legend_counts:
+            return
+        self.__legend_counts = dict(counts)
 
         for w in self.legend_panel.winfo_children():
             w.destroy()
@@ -303,13 +258,107 @@ class Gui(tk.Tk):
         self.simulator.reset()
         if self.pause_button:
             self.pause_button.config(text="Pause")
+        if self.replay_button:
+            self.replay_button.config(text="Replay...")
+        if self.replay_frame:
+            self.replay_frame.grid_remove()
+
+    def toggle_turbo(self) -> None:
+        if not self.simulator:
+            return
+        self.simulator.set_turbo(not self.simulator.turbo)
+        self.turbo_button.config(text="Turbo: on" if self.simulator.turbo else "Turbo: off")
+
+    def run_to_end(self) -> None:
+        if not self.simulator:
+            return
+        self.simulator.run_to_end()
+        if self.pause_button:
+            self.pause_button.config(text="Pause")
+
+    def toggle_recording(self) -> None:
+        sim = self.simulator
+        if not sim:
+            return
+        if sim.recorder is not None:
+            sim.stop_recording()
+        else:
+            path = filedialog.asksaveasfilename(title="Record to", defaultextension=".rec",
+                                                filetypes=[("Mars recordings", "*.rec")])
+            if not path:
+                return
+            sim.start_recording(path)
+        self.record_button.config(text="Record: on" if sim.recorder is not None else "Record: off")
+
+    def toggle_replay(self) -> None:
+        """Open a recording to replay, or leave replay for a fresh live run."""
+        sim = self.simulator
+        if not sim:
+            return
+        if sim.replay is not None:
+            self.reset_simulation()
+            return
+        path = filedialog.askopenfilename(title="Replay recording",
+                                          filetypes=[("Mars recordings", "*.rec"), ("All files", "*")])
+        if not path:
+            return
+        try:
+            sim.start_replay(path)
+        except (OSError, SnapshotError) as error:
+            messagebox.showerror("Replay", f"Cannot replay {path}: {error}")
+            return
+        finally:
+            self.record_button.config(text="Record: on" if sim.recorder is not None else "Record: off")
+        self.replay_button.config(text="Live")
+        self.__syncing_replay_scale = True
+        self.replay_scale.config(from_=sim.replay.first_step, to=sim.replay.last_step)
+        self.replay_scale.set(sim.step_count)
+        self.__syncing_replay_scale = False
+        self.replay_frame.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(8, 0))
+
+    def toggle_profiling(self) -> None:
+        sim = self.simulator
+        if not sim:
+            return
+        sim.profiler.enabled = not sim.profiler.enabled
+        self.profile_button.config(text="Profile: on" if sim.profiler.enabled else "Profile: off")
+        self._update_stats()
+
+    def save_profile(self) -> None:
+        """Write the phase timings collected so far to a JSON file."""
+        sim = self.simulator
+        if not sim:
+            return
+        path = filedialog.asksaveasfilename(title="Save profile", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            sim.profiler.dump(path)
+        except OSError as error:
+            messagebox.showerror("Save profile", f"Cannot write {path}: {error}")
+
+    def on_replay_seek(self, value: str) -> None:
+        sim = self.simulator
+        if not sim or sim.replay is None or self.__syncing_replay_scale:
+            return
+        try:
+            sim.seek_replay(int(float(value)))
+        except ValueError:
+            pass
+
+    def update_run_to_end_progress(self) -> None:
+        """Refresh only the step counter while the world view is suspended."""
+        sim = self.simulator
+        if sim and not self.__closed:
+            self.stats_labels["Step"].config(text=f"Step: {sim.step_count} (running to end...)")
 
     def on_speed_change(self, value: str) -> None:
         if not self.simulator:
             return
         try:
             v = float(value)
-            self.simulator.simulation_speed = v
+            self.simulator.set_speed(v)
             if self.speed_value_label:
                 self.speed_value_label.config(text=f"{v:.1f} steps/s")
         except ValueError:
@@ -319,7 +368,25 @@ class Gui(tk.Tk):
         sim = self.simulator
         if not sim:
             return
-        self.stats_labels["Step"].config(text=f"Step: {sim.step_count}")
+        turbo = f", turbo x{sim.turbo_batch.steps}" if getattr(sim, "turbo", False) else ""
+        replay = getattr(sim, "replay", None)
+        if replay is not None:
+            self.stats_labels["Step"].config(text=f"Step: {sim.step_count} of {replay.last_step} (replay, seed {sim.seed})")
+            if self.replay_scale:
+                self.__syncing_replay_scale = True
+                self.replay_scale.set(sim.step_count)
+                self.__syncing_replay_scale = False
+        else:
+            self.stats_labels["Step"].config(text=f"Step: {sim.step_count} (seed {sim.seed}{turbo})")
+        if getattr(sim, "rate_meter", None):
+            target = "turbo" if sim.turbo else f"target {sim.simulation_speed:.1f}"
+            self.stats_labels["Rate"].config(
+                text=f"Rate: {sim.rate_meter.rate():.1f} steps/s ({target}), lag {sim.step_clock.lag_ms:.1f} ms")
+        profiler = getattr(sim, "profiler", None)
+        if profiler is not None and profiler.enabled:
+            self.stats_labels["Profile"].config(text=f"Profile: {profiler.summary()}")
+        else:
+            self.stats_labels["Profile"].config(text="Profile: off")
         total = len(sim.bridges)
         complete = sum(1 for b in sim.bridges if b.is_complete())
         damaged = sum(1 for b in sim.bridges if getattr(b, "damaged", False))
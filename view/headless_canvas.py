@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+
+class HeadlessCanvas:
+    """
+    Minimal stand-in for ``tk.Canvas`` that keeps items in memory instead of on screen.
+
+    It implements just the calls WorldRenderer makes, so rendering can be tested and
+    benchmarked on machines without a display. ``calls`` counts every canvas call by name.
+    """
+
+    def __init__(self, width: int = 800, height: int = 800) -> None:
+        self.width = width
+        self.height = height
+        self.items: Dict[int, Tuple[str, List[float], dict]] = {}
+        self.calls: Dict[str, int] = {}
+        self.__next_id = 1
+
+    def __count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def winfo_width(self) -> int:
+        return self.width
+
+    def winfo_height(self) -> int:
+        return self.height
+
+    def __create(self, kind: str, coords, options: dict) -> int:
+        self.__count("create_" + kind)
+        if len(coords) == 1 and isinstance(coords[0], (list, tuple)):
+            coords = coords[0]
+        item = self.__next_id
+        self.__next_id += 1
+        self.items[item] = (kind, [float(c) for c in coords], dict(options))
+        return item
+
+    def create_rectangle(self, *coords, **options) -> int:
+        return self.__create("rectangle", coords, options)
+
+    def create_oval(self, *coords, **options) -> int:
+        return self.__create("oval", coords, options)
+
+    def create_polygon(self, *coords, **options) -> int:
+        return self.__create("polygon", coords, options)
+
+    def create_line(self, *coords, **options) -> int:
+        return self.__create("line", coords, options)
+
+    def coords(self, item: int, *coords) -> None:
+        self.__count("coords")
+        kind, _old, options = self.items[item]
+        self.items[item] = (kind, [float(c) for c in coords], options)
+
+    def itemconfigure(self, item: int, **options) -> None:
+        self.__count("itemconfigure")
+        self.items[item][2].update(options)
+
+    itemconfig = itemconfigure
+
+    def delete(self, item) -> None:
+        self.__count("delete")
+        if item == "all":
+            self.items.clear()
+        else:
+            self.items.pop(item, None)
+
+    def snapshot(self) -> List[Tuple[str, Tuple[float, ...], str]]:
+        """Returns the drawn items as sorted (kind, coords, fill) tuples, ignoring item ids."""
+        return sorted((kind, tuple(round(c, 3) for c in coords), options.get("fill", ""))
+                      for kind, coords, options in self.items.values())
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from model.location import Location
+from model.obstacles import OBSTACLE_TYPES
+
+if TYPE_CHECKING:
+    import tkinter as tk
+    from model.environment import Environment
+
+DARK_BG          = "#0b1220"
+
+GRID_LINE        = "#334155"
+AGENT_OUTLINE    = "#0ea5e9"
+
+BRIDGE_COMPLETE  = "#10b981"
+BRIDGE_DAMAGED   = "#f97316"
+BRIDGE_BUILDING  = "#facc15"
+BACKGROUND_EMPTY = DARK_BG
+
+DEFAULT_AGENT_COLOUR = "#38bdf8"
+# Obstacles fill their cell; agent_colours may override per obstacle class.
+DEFAULT_OBSTACLE_COLOUR = "#57534e"
+
+Box = Tuple[float, float, float, float]
+
+
+def _square(x0: float, y0: float, x1: float, y1: float) -> Tuple[str, List[float]]:
+    return "rectangle", [x0, y0, x1, y1]
+
+
+def _circle(x0: float, y0: float, x1: float, y1: float) -> Tuple[str, List[float]]:
+    return "oval", [x0, y0, x1, y1]
+
+
+def _triangle(x0: float, y0: float, x1: float, y1: float) -> Tuple[str, List[float]]:
+    cx = (x0 + x1) / 2.0
+    return "polygon", [cx, y0, x1, y1, x0, y1]
+
+
+def _diamond(x0: float, y0: float, x1: float, y1: float) -> Tuple[str, List[float]]:
+    cx = (x0 + x1) / 2.0
+    cy = (y0 + y1) / 2.0
+    return "polygon", [cx, y0, x1, cy, cx, y1, x0, cy]
+
+
+def _hexagon(x0: float, y0: float, x1: float, y1: float) -> Tuple[str, List[float]]:
+    w = x1 - x0
+    h = y1 - y0
+    return "polygon", [x0 + w * 0.25, y0, x0 + w * 0.75, y0, x1, y0 + h * 0.5,
+                       x0 + w * 0.75, y1, x0 + w * 0.25, y1, x0, y0 + h * 0.5]
+
+
+def _cross(x0: float, y0: float, x1: float, y1: float) -> Tuple[str, List[float]]:
+    cx = (x0 + x1) / 2.0
+    cy = (y0 + y1) / 2.0
+    half_t = min(x1 - x0, y1 - y0) * 0.3 / 2.0
+    return "polygon", [cx - half_t, y0, cx + half_t, y0,
+                       cx + half_t, cy - half_t, x1, cy - half_t,
+                       x1, cy + half_t, cx + half_t, cy + half_t,
+                       cx + half_t, y1, cx - half_t, y1,
+                       cx - half_t, cy + half_t, x0, cy + half_t,
+                       x0, cy - half_t, cx - half_t, cy - half_t]
+
+
+# Looked up once per agent class, then cached by class.
+SHAPES: Dict[str, Callable[[float, float, float, float], Tuple[str, List[float]]]] = {
+    "ReedRichards":       _square,
+    "SueStorm":           _triangle,
+    "JohnnyStorm":        _diamond,
+    "BenGrimm":           _hexagon,
+    "SilverSurfer":       _circle,
+    "GalactusProjection": _cross,
+}
+
+
+class WorldRenderer:
+    """
+    Retained-mode drawing of an environment grid onto a Tk canvas.
+
+    Canvas items are created once per cell (background) and once per agent. Each frame
+    only the cells reported by the environment's change set are revisited: backgrounds
+    are recoloured and agent items are moved with ``coords`` rather than redrawn. A full
+    rebuild only happens on the first frame, after a resize, or when the environment
+    reports that everything changed (e.g. after a reset).
+    """
+
+    def __init__(self, canvas: 'tk.Canvas', environment: 'Environment', agent_colours: dict) -> None:
+        self.canvas = canvas
+        self.environment = environment
+        self.agent_colours = agent_colours
+        self.__geometry: Optional[Tuple[int, int, int, int]] = None
+        self.__cell = 0.0
+        self.__origin = (0.0, 0.0)
+        self.__pad = 0.0
+        self.__backgrounds: List[int] = []
+        self.__background_colours: List[str] = []
+        # id(agent) -> [canvas item, agent class, cell index]
+        self.__agent_items: Dict[int, list] = {}
+        self.__cell_agents: Dict[int, int] = {}
+        self.__shape_cache: Dict[type, Callable] = {}
+        # Mars hands out cached Locations; other environments get fresh ones.
+        self.__location = getattr(environment, "location", Location)
+
+        track_changes = getattr(environment, "track_changes", None)
+        if callable(track_changes):
+            track_changes()
+
+    def invalidate(self) -> None:
+        """Force a full rebuild on the next render, e.g. after the canvas was resized."""
+        self.__geometry = None
+
+    def render(self) -> None:
+        """Bring the canvas up to date with the environment."""
+        width = self.environment.get_width()
+        height = self.environment.get_height()
+        cw = int(self.canvas.winfo_width() or 800)
+        ch = int(self.canvas.winfo_height() or 800)
+        geometry = (cw, ch, width, height)
+
+        consume_changes = getattr(self.environment, "consume_changes", None)
+        changes = consume_changes() if callable(consume_changes) else None
+        if geometry != self.__geometry:
+            self.__rebuild(geometry)
+            return
+        if changes is None:
+            changes = [(x, y) for y in range(height) for x in range(width)]
+        for x, y in changes:
+            self.__refresh_background(x, y)
+        self.__refresh_agents(changes)
+
+    def __rebuild(self, geometry: Tuple[int, int, int, int]) -> None:
+        cw, ch, width, height = geometry
+        self.canvas.delete("all")
+        self.__geometry = geometry
+        size = min(cw, ch)
+        self.__cell = size / max(width, height)
+        self.__origin = ((cw - size) / 2.0, (ch - size) / 2.0)
+        self.__pad = max(2, int(self.__cell * 0.25))
+        self.__agent_items.clear()
+        self.__cell_agents.clear()
+        self.__backgrounds = []
+        self.__background_colours = []
+
+        ox, oy = self.__origin
+        cell = self.__cell
+        for y in range(height):
+            for x in range(width):
+                colour = self.__background_colour(x, y)
+                x0 = ox + x * cell
+                y0 = oy + y * cell
+                item = self.canvas.create_rectangle(x0, y0, x0 + cell, y0 + cell,
+                                                    fill=colour, outline=GRID_LINE)
+                self.__backgrounds.append(item)
+                self.__background_colours.append(colour)
+        self.__refresh_agents([(x, y) for y in range(height) for x in range(width)])
+
+    def __background_colour(self, x: int, y: int) -> str:
+        get_bridge = getattr(self.environment, "get_bridge", None)
+        bridge = get_bridge(self.__location(x, y)) if callable(get_bridge) else None
+        if bridge:
+            if bridge.is_complete():
+                return BRIDGE_COMPLETE
+            if getattr(bridge, "damaged", False):
+                return BRIDGE_DAMAGED
+            return BRIDGE_BUILDING
+        obstacles = getattr(self.environment, "obstacles", None)
+        if obstacles is not None and obstacles.count:
+            kind = obstacles.kind_at(x, y)
+            if kind:
+                return self.agent_colours.get(OBSTACLE_TYPES[kind], DEFAULT_OBSTACLE_COLOUR)
+        return BACKGROUND_EMPTY
+
+    def __refresh_background(self, x: int, y: int) -> None:
+        index = y * self.__geometry[2] + x
+        colour = self.__background_colour(x, y)
+        if colour != self.__background_colours[index]:
+            self.__background_colours[index] = colour
+            self.canvas.itemconfigure(self.__backgrounds[index], fill=colour)
+
+    def __agent_box(self, x: int, y: int) -> Box:
+        ox, oy = self.__origin
+        cell = self.__cell
+        pad = self.__pad
+        return (ox + x * cell + pad, oy + y * cell + pad,
+                ox + (x + 1) * cell - pad, oy + (y + 1) * cell - pad)
+
+    def __shape_for(self, agent_cls: type) -> Callable:
+        shape = self.__shape_cache.get(agent_cls)
+        if shape is None:
+            shape = SHAPES.get(agent_cls.__name__, _circle)
+            self.__shape_cache[agent_cls] = shape
+        return shape
+
+    def __refresh_agents(self, cells) -> None:
+        width = self.__geometry[2]
+        get_agent = self.environment.get_agent
+        vacated: List[int] = []
+        placed = []
+        for x, y in cells:
+            index = y * width + x
+            previous = self.__cell_agents.pop(index, None)
+            if previous is not None:
+                vacated.append(previous)
+            agent = get_agent(self.__location(x, y))
+            if agent is not None:
+                placed.append((x, y, index, agent))
+
+        for x, y, index, agent in placed:
+            key = id(agent)
+            self.__cell_agents[index] = key
+            entry = self.__agent_items.get(key)
+            agent_cls = getattr(agent, "role", type(agent))
+            if entry is not None and entry[1] is agent_cls:
+                if entry[2] != index:
+                    _kind, coords = self.__shape_for(agent_cls)(*self.__agent_box(x, y))
+                    self.canvas.coords(entry[0], *coords)
+                    entry[2] = index
+                continue
+            if entry is not None:
+                self.canvas.delete(entry[0])
+            self.__agent_items[key] = [self.__create_agent_item(agent_cls, x, y), agent_cls, index]
+
+        for key in vacated:
+            entry = self.__agent_items.get(key)
+            if entry is not None and self.__cell_agents.get(entry[2]) != key:
+                self.canvas.delete(entry[0])
+                del self.__agent_items[key]
+
+    def __create_agent_item(self, agent_cls: type, x: int, y: int) -> int:
+        colour = self.agent_colours.get(agent_cls, DEFAULT_AGENT_COLOUR)
+        kind, coords = self.__shape_for(agent_cls)(*self.__agent_box(x, y))
+        if kind == "rectangle":
+            return self.canvas.create_rectangle(*coords, fill=colour, outline=AGENT_OUTLINE, width=1.0)
+        if kind == "oval":
+            return self.canvas.create_oval(*coords, fill=colour, outline=AGENT_OUTLINE, width=1.0)
+        return self.canvas.create_polygon(*coords, fill=colour, outline=AGENT_OUTLINE)